@@ -34,6 +34,7 @@ dModules = {
     ),
     ".gpl.iaf_nest": ("FFIAFNest", "RecIAFSpkInNest"),
     ".gpl.aeif_nest": "RecAEIFSpkInNest",
+    ".gpl.aeif_numba": "RecAEIFSpkInNumba",
     ".gpl.devices.dynap_hw": ("RecDynapSE", "RecDynapSEDemo"),
     ".gpl.devices.virtual_dynapse": "VirtualDynapse",
     ".gpl.rate_jax": ("RecRateEulerJax", "ForceRateEulerJax", "H_ReLU", "H_tanh"),
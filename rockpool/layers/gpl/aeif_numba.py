@@ -0,0 +1,632 @@
+###
+# aeif_numba.py - Class implementing a recurrent layer of adaptive exponential
+#                 integrate-and-fire neurons, simulated in parallel with numba
+###
+
+# - Imports
+from typing import Optional, Union, List, Tuple
+import numpy as np
+import numba
+from numba import njit, prange
+
+from ...timeseries import TSContinuous, TSEvent
+from ...utilities import SetterArray, ImmutableArray
+from ..layer import Layer
+
+# - Type alias for array-like objects
+ArrayLike = Union[np.ndarray, List, Tuple]
+
+FloatVector = Union[ArrayLike, float]
+
+# - Configure exports
+__all__ = ["RecAEIFSpkInNumba"]
+
+
+### --- Compiled simulation kernel
+
+
+@njit(cache=True, parallel=True)
+def _evolve_aeif(
+    input_raster: np.ndarray,
+    input_last: np.ndarray,
+    fanin_in_ptr: np.ndarray,
+    fanin_in_pre: np.ndarray,
+    fanin_in_weights: np.ndarray,
+    fanin_rec_ptr: np.ndarray,
+    fanin_rec_pre: np.ndarray,
+    fanin_rec_weights: np.ndarray,
+    v_mem: np.ndarray,
+    i_syn_exc: np.ndarray,
+    i_syn_inh: np.ndarray,
+    adapt: np.ndarray,
+    refractory_left: np.ndarray,
+    spikes_last: np.ndarray,
+    bias: np.ndarray,
+    v_thresh: np.ndarray,
+    v_peak: np.ndarray,
+    v_reset: np.ndarray,
+    v_rest: np.ndarray,
+    conductance: np.ndarray,
+    capacity: np.ndarray,
+    delta_t: np.ndarray,
+    subthresh_adapt: np.ndarray,
+    spike_adapt: np.ndarray,
+    tau_adapt: np.ndarray,
+    decay_exc: np.ndarray,
+    decay_inh: np.ndarray,
+    refractory_steps: np.ndarray,
+    dt: float,
+    num_timesteps: int,
+    recorded_states: np.ndarray,
+) -> (np.ndarray, np.ndarray):
+    """
+    Evolve a recurrent layer of AEIF neurons with exponential current synapses, updating the neurons of each time step in parallel
+
+    Input and recurrent spikes are delivered with a delay of one time step. Synaptic input is received through fan-in lists in CSR format: the inputs of neuron ``j`` are ``pre[ptr[j]:ptr[j+1]]`` with weights ``weights[ptr[j]:ptr[j+1]]``. Positive weights excite, negative weights inhibit. All state arrays are updated in place.
+
+    :param np.ndarray input_raster:     Number of input events per time step and channel [T, M]
+    :param np.ndarray input_last:       Input events in the last time step of the previous evolution [M,]
+    :param np.ndarray recorded_states:  Array for membrane potentials at the start of each time step [T, N], or [0, N] to skip recording
+
+    :return (np.ndarray, np.ndarray):   (event_steps, event_channels) Time steps and neuron indices of output spikes
+    """
+    size = v_mem.size
+    spikes = np.zeros(size, np.bool_)
+    record = recorded_states.shape[0] > 0
+
+    # - Buffers for output events, grown as needed
+    event_steps = np.empty(size, np.int64)
+    event_channels = np.empty(size, np.int64)
+    num_events = 0
+
+    for t in range(num_timesteps):
+        for j in prange(size):
+            if record:
+                recorded_states[t, j] = v_mem[j]
+
+            # - Synaptic input arriving in this time step
+            for idx in range(fanin_in_ptr[j], fanin_in_ptr[j + 1]):
+                pre = fanin_in_pre[idx]
+                count = input_last[pre] if t == 0 else input_raster[t - 1, pre]
+                if count != 0:
+                    weight = fanin_in_weights[idx] * count
+                    if weight > 0:
+                        i_syn_exc[j] += weight
+                    else:
+                        i_syn_inh[j] -= weight
+            for idx in range(fanin_rec_ptr[j], fanin_rec_ptr[j + 1]):
+                if spikes_last[fanin_rec_pre[idx]]:
+                    weight = fanin_rec_weights[idx]
+                    if weight > 0:
+                        i_syn_exc[j] += weight
+                    else:
+                        i_syn_inh[j] -= weight
+
+            # - Membrane potential, clamped during refractory period
+            v = v_mem[j]
+            if refractory_left[j] > 0:
+                refractory_left[j] -= 1
+                v = v_reset[j]
+            else:
+                i_leak = conductance[j] * (v - v_rest[j])
+                i_exp = 0.0
+                if delta_t[j] > 0:
+                    i_exp = (
+                        conductance[j]
+                        * delta_t[j]
+                        * np.exp((min(v, v_peak[j]) - v_thresh[j]) / delta_t[j])
+                    )
+                i_total = i_exp - i_leak + i_syn_exc[j] - i_syn_inh[j] + bias[j]
+                v += dt * (i_total - adapt[j]) / capacity[j]
+
+            # - Adaptation and synaptic currents
+            adapt[j] += (
+                dt * (subthresh_adapt[j] * (v - v_rest[j]) - adapt[j]) / tau_adapt[j]
+            )
+            i_syn_exc[j] *= decay_exc[j]
+            i_syn_inh[j] *= decay_inh[j]
+
+            # - Spikes
+            spikes[j] = v >= v_peak[j]
+            if spikes[j]:
+                v = v_reset[j]
+                adapt[j] += spike_adapt[j]
+                refractory_left[j] = refractory_steps[j]
+            v_mem[j] = v
+
+        # - Collect spikes and keep them for delivery in the next time step
+        for j in range(size):
+            spikes_last[j] = spikes[j]
+            if spikes[j]:
+                if num_events == event_steps.size:
+                    event_steps = np.concatenate(
+                        (event_steps, np.empty_like(event_steps))
+                    )
+                    event_channels = np.concatenate(
+                        (event_channels, np.empty_like(event_channels))
+                    )
+                event_steps[num_events] = t
+                event_channels[num_events] = j
+                num_events += 1
+
+    return event_steps[:num_events], event_channels[:num_events]
+
+
+## - RecAEIFSpkInNumba - Class: Recurrent AEIF layer with spiking in- and outputs
+class RecAEIFSpkInNumba(Layer):
+    """
+    Spiking recurrent layer of adaptive exponential integrate-and-fire neurons with spiking in- and outputs, simulated in-process with numba
+
+    The neuron model and parameters follow :py:class:`.RecAEIFSpkInNest`, so that this layer can replace it where NEST is not available. Membrane potentials are integrated with the forward Euler method, synaptic currents decay exactly. Input and recurrent spikes are delivered after one time step. The neurons of each time step are updated in parallel on ``num_cores`` threads.
+    """
+
+    # - Default difference between v_peak and v_thresh when delta_t != 0
+    _v_peak_offset = 0.01
+
+    ## - Constructor
+    def __init__(
+        self,
+        weights_in: np.ndarray,
+        weights_rec: np.ndarray,
+        bias: FloatVector = 0.0,
+        dt: float = 0.0001,
+        tau_mem: FloatVector = 0.02,
+        tau_syn: Optional[FloatVector] = 0.05,
+        tau_syn_exc: Optional[FloatVector] = None,
+        tau_syn_inh: Optional[FloatVector] = None,
+        v_thresh: FloatVector = -0.055,
+        v_reset: FloatVector = -0.065,
+        v_rest: FloatVector = -0.065,
+        conductance: FloatVector = 1.0,
+        refractory: FloatVector = 0.001,
+        subthresh_adapt: FloatVector = 4.0,
+        spike_adapt: FloatVector = 80.5,
+        delta_t: FloatVector = 0.002,
+        tau_adapt: FloatVector = 0.144,
+        name: str = "unnamed",
+        record: bool = False,
+        num_cores: int = 1,
+    ):
+        """
+        Construct a spiking recurrent layer with AEIF neurons and a numba backend. In- and outputs are spiking events
+
+        :param np.ndarray weights_in:           MxN input weight matrix in nA
+        :param np.ndarray weights_rec:          NxN recurrent weight matrix in nA
+        :param FloatVector bias:                Nx1 bias current vector in nA. Default: ``0.``
+        :param float dt:                        Time step in seconds. Default: ``0.1 ms``
+        :param FloatVector tau_mem:             Nx1 vector of neuron time constants in seconds. Default: ``20 ms``
+        :param Optional[FloatVector] tau_syn:   Nx1 vector of synapse time constants in seconds. Used instead of ``tau_syn_exc`` or ``tau_syn_inh`` if they are ``None``. Default: ``50 ms``
+        :param Optional[FloatVector] tau_syn_exc:   Nx1 vector of excitatory synapse time constants in seconds. If ``None``, use ``tau_syn``. Default: ``None``
+        :param Optional[FloatVector] tau_syn_inh:   Nx1 vector of inhibitory synapse time constants in seconds. If ``None``, use ``tau_syn``. Default: ``None``
+        :param FloatVector v_thresh:            Nx1 vector of neuron thresholds ("point of no return") in Volt. Default: ``-55 mV``
+        :param FloatVector v_reset:             Nx1 vector of neuron reset potentials in Volt. Default: ``-65 mV``
+        :param FloatVector v_rest:              Nx1 vector of neuron resting potentials in Volt. Default: ``-65 mV``
+        :param FloatVector conductance:         Nx1 vector of neuron leak conductances in nS. The membrane capacity is ``tau_mem * conductance``. Default: ``1.``
+        :param FloatVector refractory:          Refractory period after each spike in seconds. Default: ``1 ms``
+        :param FloatVector subthresh_adapt:     Scaling for subthreshold adaptation in nS. Default: ``4.``
+        :param FloatVector spike_adapt:         Additive value for spike triggered adaptation, in pA as in the NEST backend. Default: ``80.5``
+        :param FloatVector delta_t:             Scaling for exponential part of the activation function in Volt. Default: ``2 mV``
+        :param FloatVector tau_adapt:           Time constant for adaptation relaxation in seconds. Default: ``144 ms``
+        :param str name:                        Name for the layer. Default: ``'unnamed'``
+        :param bool record:                     Record membrane potential during evolutions. Default: ``False``
+        :param int num_cores:                   Number of threads for updating neurons in parallel. Default: ``1``
+        """
+
+        # - Call super constructor
+        super().__init__(weights=np.atleast_2d(weights_in), dt=dt, name=name)
+
+        # - Handle synaptic time constants
+        if tau_syn_exc is None:
+            tau_syn_exc = tau_syn
+        if tau_syn_inh is None:
+            tau_syn_inh = tau_syn
+
+        # - Record weights and neuron parameters
+        self.weights_in = weights_in
+        self.weights_rec = weights_rec
+        self.bias = bias
+        self.conductance = conductance
+        self.tau_mem = tau_mem
+        self.tau_syn_exc = tau_syn_exc
+        self.tau_syn_inh = tau_syn_inh
+        self.v_reset = v_reset
+        self.v_rest = v_rest
+        self.refractory = refractory
+        self.subthresh_adapt = subthresh_adapt
+        self.spike_adapt = spike_adapt
+        self.tau_adapt = tau_adapt
+        self._delta_t = self._expand_to_net_size(
+            delta_t, "delta_t", allow_none=False
+        ).astype(float)
+        self.v_thresh = v_thresh
+
+        # - Record layer settings
+        self._record = record
+        self._num_cores = num_cores
+        self.recorded_states = None
+
+        # - Initialise state
+        self.reset_state()
+
+    def reset_state(self):
+        """
+        Reset the internal state of the layer: Membrane potentials to `v_rest`, synaptic currents and adaptation to 0, clear refractory periods and spikes in transit
+        """
+        self._v_mem = self._v_rest.copy()
+        self._i_syn_exc = np.zeros(self.size)
+        self._i_syn_inh = np.zeros(self.size)
+        self._adapt = np.zeros(self.size)
+        self._refractory_left = np.zeros(self.size, int)
+        self._spikes_last = np.zeros(self.size, bool)
+        self._input_last = np.zeros(self.size_in, int)
+
+    def randomize_state(self):
+        """
+        Randomize the membrane potentials of the layer between `v_reset` and `v_thresh`
+        """
+        v_range = abs(self._v_thresh - self._v_reset)
+        self._v_mem = np.random.rand(self.size) * v_range + self._v_reset
+
+    def evolve(
+        self,
+        ts_input: Optional[TSEvent] = None,
+        duration: Optional[float] = None,
+        num_timesteps: Optional[int] = None,
+        verbose: bool = False,
+    ) -> TSEvent:
+        """
+        Function to evolve the states of this layer given an input
+
+        :param Optional[TSEvent] ts_input:  Input spike trian
+        :param Optional[float] duration:    Simulation/Evolution time
+        :param Optional[int] num_timesteps: Number of evolution time steps
+        :param bool verbose:                Currently no effect, just for conformity
+
+        :return TSEvent:                    Output spike series
+        """
+        if ts_input is not None and not isinstance(ts_input, TSEvent):
+            raise ValueError(
+                self.start_print + "This layer requires a `TSEvent` as input."
+            )
+
+        num_timesteps = self._determine_timesteps(ts_input, duration, num_timesteps)
+
+        # - Number of input events per time step and channel
+        if ts_input is not None:
+            input_raster = ts_input.raster(
+                dt=self.dt,
+                t_start=self.t,
+                num_timesteps=num_timesteps,
+                channels=np.arange(self.size_in),
+                add_events=True,
+            )[:num_timesteps]
+        else:
+            input_raster = np.zeros((num_timesteps, self.size_in), int)
+        input_raster = np.asarray(input_raster, int)
+
+        recorded_states = np.zeros((num_timesteps if self.record else 0, self.size))
+
+        # - Evolve on the requested number of threads
+        num_threads_prev = numba.get_num_threads()
+        num_threads = min(self._num_cores, numba.config.NUMBA_NUM_THREADS)
+        numba.set_num_threads(max(1, num_threads))
+        try:
+            event_steps, event_channels = _evolve_aeif(
+                input_raster,
+                self._input_last,
+                *self._fanin_in,
+                *self._fanin_rec,
+                self._v_mem,
+                self._i_syn_exc,
+                self._i_syn_inh,
+                self._adapt,
+                self._refractory_left,
+                self._spikes_last,
+                self._bias,
+                self._v_thresh,
+                self._v_peak,
+                self._v_reset,
+                self._v_rest,
+                self._conductance,
+                self._capacity,
+                self._delta_t,
+                self._subthresh_adapt,
+                # - `spike_adapt` is in pA
+                self._spike_adapt * 1e-3,
+                self._tau_adapt,
+                np.exp(-self.dt / self._tau_syn_exc),
+                np.exp(-self.dt / self._tau_syn_inh),
+                np.round(self._refractory / self.dt).astype(int),
+                self.dt,
+                num_timesteps,
+                recorded_states,
+            )
+        finally:
+            numba.set_num_threads(num_threads_prev)
+
+        # - Input events of the last time step arrive in the next evolution
+        if num_timesteps > 0:
+            self._input_last = input_raster[num_timesteps - 1].copy()
+
+        if self.record:
+            self.recorded_states = TSContinuous(
+                (np.arange(num_timesteps) + self._timestep) * self.dt,
+                recorded_states,
+                t_start=self.t,
+                name=f"{self.name} - recorded states",
+            )
+
+        # - Start and stop times for output time series
+        t_start = self.t
+        t_stop = (self._timestep + num_timesteps) * self.dt
+
+        # - Update layer time step
+        self._timestep += num_timesteps
+
+        return TSEvent(
+            np.clip(t_start + event_steps * self.dt, t_start, t_stop),
+            event_channels,
+            name="Layer spikes",
+            num_channels=self.size,
+            t_start=t_start,
+            t_stop=t_stop,
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Convert parameters of this layer to a dict if they are relevant for reconstructing an identical layer
+
+        :return Dict:   A dictionary that can be used to reconstruct the layer
+        """
+        config = {}
+        config["weights_in"] = self._weights_in.tolist()
+        config["weights_rec"] = self._weights_rec.tolist()
+        config["bias"] = self._bias.tolist()
+        config["dt"] = self.dt
+        config["tau_mem"] = self.tau_mem.tolist()
+        config["tau_syn_exc"] = self._tau_syn_exc.tolist()
+        config["tau_syn_inh"] = self._tau_syn_inh.tolist()
+        config["v_thresh"] = self._v_thresh.tolist()
+        config["v_reset"] = self._v_reset.tolist()
+        config["v_rest"] = self._v_rest.tolist()
+        config["conductance"] = self._conductance.tolist()
+        config["refractory"] = self._refractory.tolist()
+        config["subthresh_adapt"] = self._subthresh_adapt.tolist()
+        config["spike_adapt"] = self._spike_adapt.tolist()
+        config["delta_t"] = self._delta_t.tolist()
+        config["tau_adapt"] = self._tau_adapt.tolist()
+        config["name"] = self.name
+        config["record"] = self.record
+        config["num_cores"] = self.num_cores
+        config["class_name"] = "RecAEIFSpkInNumba"
+
+        return config
+
+    def _expand_param(self, value: FloatVector, name: str) -> np.ndarray:
+        """
+        Expand a neuron parameter to the size of the layer, as float array
+        """
+        return self._expand_to_net_size(value, name, allow_none=False).astype(float)
+
+    @staticmethod
+    def _fanin_lists(weights: np.ndarray) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+        Fan-in lists of nonzero weights, in CSR format wrt. postsynaptic neurons
+
+        :param np.ndarray weights:  Weight matrix [pre, post]
+
+        :return (np.ndarray, np.ndarray, np.ndarray):   (ptr, pre, weights)
+        """
+        idcs_post, idcs_pre = np.nonzero(weights.T)
+        counts = np.bincount(idcs_post, minlength=weights.shape[1])
+        ptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return ptr, idcs_pre.astype(np.int64), weights[idcs_pre, idcs_post]
+
+    ### --- Properties
+
+    @property
+    def input_type(self):
+        """ (`.TSEvent`) Input time series class for this layer (`.TSEvent`) """
+        return TSEvent
+
+    @property
+    def output_type(self):
+        """ (`.TSEvent`) Output time series class for this layer (`.TSEvent`) """
+        return TSEvent
+
+    @property
+    def weights(self):
+        """ (np.ndarray) Input weights for this layer, in nA """
+        return self.weights_in
+
+    @weights.setter
+    def weights(self, new_weights):
+        self.weights_in = new_weights
+
+    @property
+    def weights_in(self):
+        """ (np.ndarray) Input weights for this layer, in nA """
+        return SetterArray(self._weights_in, owner=self, name="weights_in")
+
+    @weights_in.setter
+    def weights_in(self, new_weights):
+        self._weights_in = self._expand_to_shape(
+            new_weights, (self.size_in, self.size), "weights_in", allow_none=False
+        ).astype(float)
+        self._weights = self._weights_in
+        self._fanin_in = self._fanin_lists(self._weights_in)
+
+    @property
+    def weights_rec(self):
+        """ (np.ndarray) Recurrent weights for this layer, in nA """
+        return SetterArray(self._weights_rec, owner=self, name="weights_rec")
+
+    @weights_rec.setter
+    def weights_rec(self, new_weights):
+        self._weights_rec = self._expand_to_shape(
+            new_weights, (self.size, self.size), "weights_rec", allow_none=False
+        ).astype(float)
+        self._fanin_rec = self._fanin_lists(self._weights_rec)
+
+    @property
+    def state(self):
+        """ (np.ndarray) Membrane potentials in Volt """
+        return SetterArray(self._v_mem, owner=self, name="state")
+
+    @state.setter
+    def state(self, new_state):
+        self._v_mem = self._expand_param(new_state, "state")
+
+    @property
+    def adapt(self):
+        """ (np.ndarray) Adaptation currents in nA """
+        return ImmutableArray(self._adapt, name=self.start_print + "`adapt`")
+
+    @property
+    def bias(self):
+        """ (np.ndarray) Bias currents in nA """
+        return SetterArray(self._bias, owner=self, name="bias")
+
+    @bias.setter
+    def bias(self, new_bias):
+        self._bias = self._expand_param(new_bias, "bias")
+
+    @property
+    def conductance(self):
+        """ (np.ndarray) Leak conductances in nS """
+        return SetterArray(self._conductance, owner=self, name="conductance")
+
+    @conductance.setter
+    def conductance(self, new_conductance):
+        tau_mem = getattr(self, "_tau_mem", None)
+        self._conductance = self._expand_param(new_conductance, "conductance")
+        if tau_mem is not None:
+            # - Keep `tau_mem` fixed
+            self._capacity = self._conductance * tau_mem
+
+    @property
+    def capacity(self):
+        """ (np.ndarray) Membrane capacities in nF (`tau_mem` * `conductance`) """
+        return ImmutableArray(self._capacity, name=self.start_print + "`capacity`")
+
+    @property
+    def tau_mem(self):
+        """ (np.ndarray) Membrane time constants in s """
+        return SetterArray(self._tau_mem, owner=self, name="tau_mem")
+
+    @tau_mem.setter
+    def tau_mem(self, new_tau_mem):
+        self._tau_mem = self._expand_param(new_tau_mem, "tau_mem")
+        self._capacity = self._conductance * self._tau_mem
+
+    @property
+    def tau_syn_exc(self):
+        """ (np.ndarray) Excitatory synaptic time constants in s """
+        return SetterArray(self._tau_syn_exc, owner=self, name="tau_syn_exc")
+
+    @tau_syn_exc.setter
+    def tau_syn_exc(self, new_tau_syn_exc):
+        self._tau_syn_exc = self._expand_param(new_tau_syn_exc, "tau_syn_exc")
+
+    @property
+    def tau_syn_inh(self):
+        """ (np.ndarray) Inhibitory synaptic time constants in s """
+        return SetterArray(self._tau_syn_inh, owner=self, name="tau_syn_inh")
+
+    @tau_syn_inh.setter
+    def tau_syn_inh(self, new_tau_syn_inh):
+        self._tau_syn_inh = self._expand_param(new_tau_syn_inh, "tau_syn_inh")
+
+    @property
+    def v_thresh(self):
+        """ (np.ndarray) Thresholds ("point of no return") in Volt """
+        return SetterArray(self._v_thresh, owner=self, name="v_thresh")
+
+    @v_thresh.setter
+    def v_thresh(self, new_v_thresh):
+        self._v_thresh = self._expand_param(new_v_thresh, "v_thresh")
+        self._update_v_peak()
+
+    @property
+    def v_peak(self):
+        """ (np.ndarray) Membrane potentials at which spikes are emitted, in Volt """
+        return ImmutableArray(self._v_peak, name=self.start_print + "`v_peak`")
+
+    def _update_v_peak(self):
+        """ Spikes are emitted at `v_thresh`, or slightly above it if `delta_t` != 0 """
+        self._v_peak = self._v_thresh.copy()
+        self._v_peak[self._delta_t != 0] += self._v_peak_offset
+
+    @property
+    def v_reset(self):
+        """ (np.ndarray) Reset potentials in Volt """
+        return SetterArray(self._v_reset, owner=self, name="v_reset")
+
+    @v_reset.setter
+    def v_reset(self, new_v_reset):
+        self._v_reset = self._expand_param(new_v_reset, "v_reset")
+
+    @property
+    def v_rest(self):
+        """ (np.ndarray) Resting potentials in Volt """
+        return SetterArray(self._v_rest, owner=self, name="v_rest")
+
+    @v_rest.setter
+    def v_rest(self, new_v_rest):
+        self._v_rest = self._expand_param(new_v_rest, "v_rest")
+
+    @property
+    def refractory(self):
+        """ (np.ndarray) Refractory periods in s """
+        return SetterArray(self._refractory, owner=self, name="refractory")
+
+    @refractory.setter
+    def refractory(self, new_refractory):
+        self._refractory = self._expand_param(new_refractory, "refractory")
+
+    @property
+    def subthresh_adapt(self):
+        """ (np.ndarray) Subthreshold adaptation in nS """
+        return SetterArray(self._subthresh_adapt, owner=self, name="subthresh_adapt")
+
+    @subthresh_adapt.setter
+    def subthresh_adapt(self, new_a):
+        self._subthresh_adapt = self._expand_param(new_a, "subthresh_adapt")
+
+    @property
+    def spike_adapt(self):
+        """ (np.ndarray) Spike triggered adaptation, in pA as in the NEST backend """
+        return SetterArray(self._spike_adapt, owner=self, name="spike_adapt")
+
+    @spike_adapt.setter
+    def spike_adapt(self, new_b):
+        self._spike_adapt = self._expand_param(new_b, "spike_adapt")
+
+    @property
+    def delta_t(self):
+        """ (np.ndarray) Scaling of the exponential part of the activation function in Volt """
+        return SetterArray(self._delta_t, owner=self, name="delta_t")
+
+    @delta_t.setter
+    def delta_t(self, new_delta_t):
+        self._delta_t = self._expand_param(new_delta_t, "delta_t")
+        self._update_v_peak()
+
+    @property
+    def tau_adapt(self):
+        """ (np.ndarray) Adaptation time constants in s """
+        return SetterArray(self._tau_adapt, owner=self, name="tau_adapt")
+
+    @tau_adapt.setter
+    def tau_adapt(self, new_tau):
+        self._tau_adapt = self._expand_param(new_tau, "tau_adapt")
+
+    @property
+    def record(self):
+        """ (bool) Record membrane potentials during evolutions """
+        return self._record
+
+    @property
+    def num_cores(self):
+        """ (int) Number of threads for updating neurons in parallel """
+        return self._num_cores
@@ -16,7 +16,7 @@ import numpy as np
 from ....timeseries import TSEvent
 from ....utilities import ArrayLike, ImmutableArray, SetterArray
 from ...layer import Layer
-from ...gpl.aeif_nest import RecAEIFSpkInNest
+from ...gpl.aeif_numba import RecAEIFSpkInNumba
 from . import params
 
 ### --- Constants
@@ -80,6 +80,7 @@ class VirtualDynapse(Layer):
         num_threads: Optional[int] = 1,
         mismatch: Optional[Union[bool, np.ndarray]] = True,
         record: Optional[bool] = False,
+        backend: str = "nest",
     ):
         """
         A recurrent layer that simulates a DynapSE neurmorphic processor
@@ -104,6 +105,7 @@ class VirtualDynapse(Layer):
         :param Optional[int] num_threads:                   Number of cpu cores available for simulation. Default: 1.
         :param Optional[Union[bool, ArrayLike[float]]] mismatch:    If ``True``, parameters for each neuron are drawn from a Gaussian distribution around provided values for core. If a float array is passed, it must be of shape ``len(_param_names) + 2*num_neurons`` x ``num_neurons`` and provide individual mismatch factors for each parameter and neuron as well as excitatory and inhibitory weights. Order of rows: ``baseweight_e``, ``baseweight_i``, ``bias``, ``refractory``, ``tau_mem_1``, ``tau_mem_2``, ``tau_syn_exc``, ``tau_syn_inh``, ``v_thresh``, ``weights_excit``, ``weights_inhib`` Default: ``True``.
         :param Optional[bool] record:                       If ``True``, record membrane potentials during evolution. NOTE: This may not be possible with actual hardware. Default: ``False``, do not record membrane potentials.
+        :param str backend:                                 Simulator for the neuron dynamics. ``"numba"``: Simulate in-process with :py:class:`.RecAEIFSpkInNumba`, updating neurons in parallel on ``num_threads`` threads. ``"nest"``: Simulate in a NEST process with :py:class:`.RecAEIFSpkInNest`. Default: ``"nest"``
         """
         # - Settings wrt connection validation
         self.validate_fanin = True
@@ -185,12 +187,26 @@ class VirtualDynapse(Layer):
         )
         self._delta_t, delta_t = self._process_parameter(delta_t, "delta_t", True)
 
-        # - Nest-layer for approximate simulation of neuron dynamics
-        self._simulator = RecAEIFSpkInNest(
+        # - Layer for approximate simulation of neuron dynamics
+        if backend == "numba":
+            simulator_class = RecAEIFSpkInNumba
+            delays = {}
+        elif backend == "nest":
+            from ...gpl.aeif_nest import RecAEIFSpkInNest
+
+            simulator_class = RecAEIFSpkInNest
+            delays = {"delay_in": dt, "delay_rec": dt}
+        else:
+            raise ValueError(
+                self.start_print + "`backend` must be either 'numba' or 'nest'."
+            )
+        self._backend = backend
+
+        # - Spikes are delivered after one time step by both backends
+        self._simulator = simulator_class(
             weights_in=weights_ext.copy(),
             weights_rec=weights_rec.copy(),
-            delay_in=dt,
-            delay_rec=dt,
+            **delays,
             bias=bias,
             v_thresh=v_thresh,
             v_reset=0,
@@ -204,7 +220,7 @@ class VirtualDynapse(Layer):
             subthresh_adapt=0.0,
             delta_t=delta_t,
             dt=dt,
-            name=self.name + "_nest_backend",
+            name=self.name + f"_{backend}_backend",
             num_cores=num_threads,
             record=record,
         )
@@ -803,6 +819,7 @@ class VirtualDynapse(Layer):
         config["num_threads"] = self.num_threads
         config["class_name"] = self.class_name
         config["record"] = self.record
+        config["backend"] = self.backend
         # - Array holding mismatch factors
         mismatch_array = np.concatenate(
             [
@@ -1436,6 +1453,13 @@ class VirtualDynapse(Layer):
         """
         return self._simulator.num_cores
 
+    @property
+    def backend(self):
+        """
+        (str) Simulator for the neuron dynamics, ``"numba"`` or ``"nest"``
+        """
+        return self._backend
+
     @property
     def record(self):
         """
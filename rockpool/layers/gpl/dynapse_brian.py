@@ -211,6 +211,22 @@ class RecDynapseBrian(Layer):
 
     ### --- State evolution
 
+    def warmup(self, num_timesteps: int = 1):
+        """
+        Generate and compile the brian2 code of this layer ahead of time
+
+        Evolves the layer with zero input, then restores the brian2 network and the layer clock.
+
+        :param int num_timesteps:   Number of time steps to evolve the layer for. Default: ``1``
+        """
+        timestep = self._timestep
+        self._net.store("warmup")
+        try:
+            self.evolve(num_timesteps=num_timesteps)
+        finally:
+            self._net.restore("warmup")
+            self._timestep = timestep
+
     def evolve(
         self,
         ts_input: Optional[TSContinuous] = None,
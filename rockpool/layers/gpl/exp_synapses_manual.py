@@ -6,7 +6,8 @@
 # - Imports
 from typing import Optional, Union, Tuple, List, Dict
 import numpy as np
-from scipy.signal import fftconvolve
+from scipy.sparse import csr_matrix
+from numba import njit
 
 from ...timeseries import TSContinuous, TSEvent
 from ..training.gpl.rr_trained_layer import RRTrainedLayer
@@ -26,6 +27,35 @@ def sigmoid(z):
     return 1.0 / (1.0 + np.exp(-z))
 
 
+@njit(cache=True)
+def _filter_exp_recursive(
+    data: np.ndarray, decay: float, state: np.ndarray, num_timesteps: int
+) -> np.ndarray:
+    """
+    Filter data with a first-order recursive exponential filter
+
+    Input at a given time step only has an effect on the next time step: ``filtered[0] = state``, ``filtered[t] = decay * filtered[t-1] + data[t-1]``. Data beyond its last sample is treated as zero.
+
+    :param np.ndarray data:     Input data [T, N]
+    :param float decay:         Decay factor per time step
+    :param np.ndarray state:    Filter state at the first time step [N,]
+    :param int num_timesteps:   Number of time steps to filter
+
+    :return np.ndarray:         Filtered data [num_timesteps + 1, N]. The last row is the state after the final time step
+    """
+    num_channels = data.shape[1]
+    num_samples = min(num_timesteps, data.shape[0])
+    filtered = np.empty((num_timesteps + 1, num_channels))
+    filtered[0] = state
+    for t in range(num_samples):
+        for c in range(num_channels):
+            filtered[t + 1, c] = decay * filtered[t, c] + data[t, c]
+    for t in range(num_samples, num_timesteps):
+        for c in range(num_channels):
+            filtered[t + 1, c] = decay * filtered[t, c]
+    return filtered
+
+
 ## - FFExpSyn - Class: define an exponential synapse layer (spiking input)
 class FFExpSyn(RRTrainedLayer):
     """ Define an exponential synapse layer with spiking inputs and current outputs
@@ -85,12 +115,14 @@ class FFExpSyn(RRTrainedLayer):
         # - Objects for training
         self._xtx = None
         self._xty = None
+        self._store_states = True
 
     def _prepare_input(
         self,
         ts_input: Optional[TSEvent] = None,
         duration: Optional[float] = None,
         num_timesteps: Optional[int] = None,
+        sparse: bool = False,
     ) -> (np.ndarray, int):
         """
         Sample input and return as raster
@@ -98,9 +130,10 @@ class FFExpSyn(RRTrainedLayer):
         :param Optional[TSEvent] ts_input:  Spiking input signals for this layer
         :param Optional[float] duration:    Duration of the desired evolution, in seconds
         :param Optional[int] num_timesteps: Number of evolution time steps
+        :param bool sparse:                 If ``True``, return the raster as a sparse CSR matrix. Default: ``False``
 
         :return (spike_raster, num_timesteps):
-            spike_raster:   (np.ndarray) Raster containing spike info
+            spike_raster:   (np.ndarray) Raster containing spike info. ``scipy.sparse.csr_matrix`` if ``sparse`` is ``True``
             num_timesteps:  (np.ndarray) Number of evolution time steps
         """
         if num_timesteps is None:
@@ -136,7 +169,8 @@ class FFExpSyn(RRTrainedLayer):
 
         if ts_input is not None:
             # Extract spike data from the input variable
-            spike_raster = ts_input.raster(
+            rasterize = ts_input.raster_sparse if sparse else ts_input.raster
+            spike_raster = rasterize(
                 dt=self.dt,
                 t_start=self.t,
                 num_timesteps=num_timesteps,
@@ -144,6 +178,9 @@ class FFExpSyn(RRTrainedLayer):
                 add_events=self.add_events,
             ).astype(float)
 
+        elif sparse:
+            spike_raster = csr_matrix((num_timesteps, self.size_in))
+
         else:
             spike_raster = np.zeros((num_timesteps, self.size_in))
 
@@ -169,9 +206,9 @@ class FFExpSyn(RRTrainedLayer):
         :return TSContinuous:               Output currents
         """
 
-        # - Prepare weighted input signal
+        # - Prepare weighted input signal, without densifying the input raster
         inp_raster, num_timesteps = self._prepare_input(
-            ts_input, duration, num_timesteps
+            ts_input, duration, num_timesteps, sparse=True
         )
         weighted_input = inp_raster @ self.weights
 
@@ -195,7 +232,9 @@ class FFExpSyn(RRTrainedLayer):
         )
 
         # - Filter input spike trains
-        filtered = self._filter_data(weighted_input, num_timesteps=time_base.size)
+        filtered, __ = self._filter_data(
+            weighted_input, num_timesteps=time_base.size
+        )
 
         # - Update time and state
         self._timestep += num_timesteps
@@ -204,6 +243,88 @@ class FFExpSyn(RRTrainedLayer):
         # - Output time series with output data and bias
         return TSContinuous(time_base, filtered + self.bias, name="Receiver current")
 
+    def evolve_batch(
+        self,
+        inputs: Union[np.ndarray, List[TSEvent]],
+        duration: Optional[float] = None,
+        num_timesteps: Optional[int] = None,
+        verbose: bool = False,
+    ) -> List[TSContinuous]:
+        """
+        Evolve a batch of independent trials in one vectorised pass
+
+        Each trial starts from the current state and time of this layer. The state and time of the layer are not modified.
+
+        :param Union[np.ndarray, List[TSEvent]] inputs: Either a ``[B, T, M]`` array of input spike counts per time step, or a list of ``B`` input spike trains
+        :param Optional[float] duration:    Simulation/Evolution time of each trial
+        :param Optional[int] num_timesteps: Number of evolution time steps of each trial
+        :param Optional[bool] verbose:      Currently no effect, just for conformity
+
+        :return List[TSContinuous]:         Output currents of each trial
+        """
+
+        if isinstance(inputs, np.ndarray) or not isinstance(inputs[0], TSEvent):
+            # - Input rasters are provided directly
+            inp_raster = np.asarray(inputs, float)
+            if inp_raster.ndim != 3 or inp_raster.shape[2] != self.size_in:
+                raise ValueError(
+                    f"FFExpSyn `{self.name}`: Batched input must be a [B, T, {self.size_in}] array or a list of `TSEvent`s."
+                )
+            if num_timesteps is None:
+                if duration is None:
+                    num_timesteps = inp_raster.shape[1]
+                else:
+                    num_timesteps = int(np.floor((duration + tol_abs) / self.dt))
+            if inp_raster.shape[1] < num_timesteps:
+                raise ValueError(
+                    f"FFExpSyn `{self.name}`: Batched input provides {inp_raster.shape[1]} "
+                    + f"time steps, but {num_timesteps} are required."
+                )
+            inp_raster = inp_raster[:, :num_timesteps]
+
+        else:
+            # - Rasterise input spike trains over a common time base
+            raster_first, num_timesteps = self._prepare_input(
+                inputs[0], duration, num_timesteps
+            )
+            inp_raster = np.stack(
+                [raster_first]
+                + [self._prepare_input(ts, None, num_timesteps)[0] for ts in inputs[1:]]
+            )
+
+        # - Weight inputs of all trials as one matrix product
+        num_trials = len(inp_raster)
+        weighted_input = inp_raster @ self.weights
+
+        # - Time base
+        time_base = (np.arange(num_timesteps + 1) + self._timestep) * self.dt
+
+        if self.noise_std > 0:
+            # - Add noise traces
+            noise = (
+                np.random.randn(*weighted_input.shape)
+                * self.noise_std
+                * np.sqrt(2 * self.dt / self.tau_syn)
+            )
+            noise[:, 0, :] = 0  # Make sure that noise traces start with 0
+            weighted_input += noise
+
+        # Add current state to input
+        weighted_input[:, 0, :] += self._state_no_bias * np.exp(-self.dt / self.tau_syn)
+
+        # - Filter all trials at once, with time as first axis
+        filtered, __ = self._filter_data(
+            weighted_input.transpose(1, 0, 2).reshape(num_timesteps, -1),
+            num_timesteps=time_base.size,
+        )
+        filtered = filtered.reshape(time_base.size, num_trials, -1).transpose(1, 0, 2)
+
+        # - Output time series with output data and bias
+        return [
+            TSContinuous(time_base, samples + self.bias, name="Receiver current")
+            for samples in filtered
+        ]
+
     def train(
         self,
         ts_target: TSContinuous,
@@ -246,32 +367,41 @@ class FFExpSyn(RRTrainedLayer):
             ts_target, ts_input, is_first=is_first, is_last=is_last, **kwargs
         )
 
-    def _filter_data(self, data: np.ndarray, num_timesteps: int):
+    def _filter_data(
+        self,
+        data: np.ndarray,
+        num_timesteps: Optional[int] = None,
+        state: Optional[np.ndarray] = None,
+    ) -> (np.ndarray, np.ndarray):
         """
-        Filter input data y convolving with the synaptic kernel
+        Filter input data with the exponential synaptic kernel
 
-        :param np.ndarray data:     Input data
-        :param int num_timesteps:   The number of time steps to return
+        The kernel is applied recursively, so that computation time and memory only scale with the number of time steps and channels, and not with ``tau_syn``. Input at a given time step only has an effect on the next time step.
 
-        :return np.ndarray:         The filtered data
+        :param np.ndarray data:         Input data [T, N]
+        :param Optional[int] num_timesteps: The number of time steps to return. Default: ``None``, same as number of samples in ``data``
+        :param Optional[np.ndarray] state:  Filter state at the first time step, e.g. from a previous batch [N,]. Default: ``None``, start from zero
+
+        :return (filtered, state_next):
+            filtered np.ndarray:        The filtered data [num_timesteps, N]
+            state_next np.ndarray:      Filter state at the time step after the last one. Can be passed as ``state`` to continue filtering [N,]
         """
 
         if num_timesteps is None:
             num_timesteps = len(data)
 
-        # - Define exponential kernel
-        # Make kernel shorter by setting values smaller than ``tol_abs`` to 0
-        len_kernel = -self.tau_syn / self.dt * np.log(tol_abs)
-        kernel = np.exp(-np.arange(len_kernel) * self.dt / self.tau_syn)
-
-        # - Make sure spikes only have effect on next time step
-        kernel = np.r_[0, kernel]
+        data = np.ascontiguousarray(data, dtype=float)
+        if state is None:
+            state = np.zeros(data.shape[1])
 
-        # - Apply kernel to spike trains
-        filtered = fftconvolve(data, kernel.reshape(-1, 1), "full", axes=0)
-        filtered = filtered[:num_timesteps]
+        filtered = _filter_exp_recursive(
+            data,
+            float(np.exp(-self.dt / self.tau_syn)),
+            np.asarray(state, dtype=float),
+            num_timesteps,
+        )
 
-        return filtered
+        return filtered[:-1], filtered[-1]
 
     def _prepare_training_data(
         self,
@@ -297,9 +427,6 @@ class FFExpSyn(RRTrainedLayer):
             ts_target, ts_input, is_first, is_last
         )
 
-        # - Prepare input data
-        inp = np.zeros((np.size(time_base), self.size_in))
-
         # - Generate spike trains from ts_input
         if ts_input is None:
             # - Assume zero input
@@ -308,6 +435,7 @@ class FFExpSyn(RRTrainedLayer):
                     self.name
                 )
             )
+            spike_raster = np.zeros((np.size(time_base), self.size_in))
 
         else:
             # - Get data within given time range
@@ -340,19 +468,19 @@ class FFExpSyn(RRTrainedLayer):
                 )
             ).astype(float)
 
-            if self._store_states and not is_first:
-                try:
-                    # - Include last state from previous batch
-                    spike_raster[0, :] += self._training_state
-                except AttributeError:
-                    pass
+        # - Continue from the synaptic state at the end of the previous batch
+        state = None
+        if self._store_states and not is_first:
+            state = getattr(self, "_training_state", None)
 
-            # - Filter input spike trains
-            inp = self._filter_data(spike_raster, num_timesteps=time_base.size)
+        # - Filter input spike trains
+        inp, state_next = self._filter_data(
+            spike_raster, num_timesteps=time_base.size, state=state
+        )
 
         if self._store_states:
-            # - Store last state for next batch
-            self._training_state = inp[-1, :].copy()
+            # - Store state at the start of the next batch
+            self._training_state = state_next
 
         return inp, target, time_base
 
@@ -360,7 +488,7 @@ class FFExpSyn(RRTrainedLayer):
         self,
         ts_target: TSContinuous,
         ts_input: Union[TSEvent, TSContinuous] = None,
-        regularize: float = 0,
+        regularize: Union[float, ArrayLike] = 0,
         is_first: bool = True,
         is_last: bool = False,
         store_states: bool = True,
@@ -376,7 +504,7 @@ class FFExpSyn(RRTrainedLayer):
 
         :param TSContinuous ts_target:                  Target for current batch
         :param Union[TSEvent, TSContinuous] ts_input:   Input to self for current batch
-        :param float regularize:                        Regularization parameter for ridge regression
+        :param Union[float, ArrayLike] regularize:      Regularization parameter for ridge regression. If several values are provided, the one with the lowest generalized cross-validation score is used. See :py:meth:`.RRTrainedLayer.train_rr`
         :param bool is_first:                           ``True`` if current batch is the first in training
         :param bool is_last:                            ``True`` if current batch is the last in training
         :param bool store_states:                       If ``True``, include last state from previous training and store state from this training. This has the same effect as if data from both trainings were presented at once.
@@ -436,95 +564,17 @@ class FFExpSyn(RRTrainedLayer):
         :param bool verbose:            Print output about training progress
         """
 
-        # - Discrete time steps for evaluating input and target time series
-        num_timesteps = int(np.round(ts_target.duration / self.dt))
-        time_base = self._gen_time_trace(ts_target.t_start, num_timesteps)
-
-        # - Discard last sample to avoid counting time points twice
-        time_base = time_base[:-1]
-
-        # - Make sure time_base does not exceed ts_target
-        time_base = time_base[time_base <= ts_target.t_stop]
-
-        # - Prepare target data
-        target = ts_target(time_base)
-
-        # - Make sure no nan is in target, as this causes learning to fail
-        assert not np.isnan(
-            target
-        ).any(), "Layer `{}`: nan values have been found in target (where: {})".format(
-            self.name, np.where(np.isnan(target))
-        )
-
-        # - Check target dimensions
-        if target.ndim == 1 and self.size == 1:
-            target = target.reshape(-1, 1)
-
-        assert (
-            target.shape[-1] == self.size
-        ), "Layer `{}`: Target dimensions ({}) does not match layer size ({})".format(
-            self.name, target.shape[-1], self.size
+        # - Rasterize and filter input, continuing from the stored training state, if any.
+        #   The last sample is discarded to avoid counting time points twice.
+        self._store_states = store_states
+        inp_filtered, target, time_base = self._prepare_training_data(
+            ts_target, ts_input, is_first=False, is_last=False
         )
+        num_timesteps = time_base.size
 
-        # - Prepare input data
-
-        # Empty input array with additional dimension for training biases
-        inp = np.zeros((np.size(time_base), self.size_in + 1))
-        inp[:, -1] = 1
-
-        # - Generate spike trains from ts_input
-        if ts_input is None:
-            # - Assume zero input
-            print(
-                "Layer `{}`: No ts_input defined, assuming input to be 0.".format(
-                    self.name
-                )
-            )
-
-        else:
-            # - Get data within given time range
-            event_times, event_channels = ts_input(
-                t_start=time_base[0], t_stop=time_base[-1]
-            )
-
-            # - Make sure that input channels do not exceed layer input dimensions
-            try:
-                assert (
-                    np.amax(event_channels) <= self.size_in - 1
-                ), "Layer `{}`: Number of input channels exceeds layer input dimensions.".format(
-                    self.name
-                )
-            except ValueError as e:
-                # - No events in input data
-                if event_channels.size == 0:
-                    print("Layer `{}`: No input spikes for training.".format(self.name))
-                else:
-                    raise e
-
-            # Extract spike data from the input
-            spike_raster = (
-                ts_input.raster(
-                    dt=self.dt,
-                    t_start=time_base[0],
-                    num_timesteps=time_base.size,
-                    channels=np.arange(self.size_in),
-                    add_events=self.add_events,
-                )
-            ).astype(float)
-
-            if store_states:
-                try:
-                    # - Include last state from previous batch
-                    spike_raster[0, :] += self._training_state
-                except AttributeError:
-                    pass
-
-            # - Define exponential kernel
-            kernel = np.exp(-(np.arange(time_base.size - 1) * self.dt) / self.tau_syn)
-
-            # - Apply kernel to spike trains and add filtered trains to input array
-            for channel, events in enumerate(spike_raster.T):
-                inp[:, channel] = fftconvolve(events, kernel, "full")[: time_base.size]
+        # - Input array with additional dimension for training biases
+        inp = np.ones((num_timesteps, self.size_in + 1))
+        inp[:, :-1] = inp_filtered
 
         # - Prepare batches for training
         if batch_size is None:
@@ -563,10 +613,6 @@ class FFExpSyn(RRTrainedLayer):
         if verbose:
             print("Layer `{}`: Finished trainig.              ".format(self.name))
 
-        if store_states:
-            # - Store last state for next batch
-            self._training_state = inp[-1, :-1].copy()
-
     def _gradients(
         self, inp: np.ndarray, target: np.ndarray, regularize: float
     ) -> np.ndarray:
@@ -1,15 +1,87 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Union
-from itertools import product
+from typing import Optional, Union, Tuple
 from multiprocessing import Pool
 
 import numpy as np
-from scipy.signal import butter, sosfilt, sosfreqz
+from scipy.signal import butter, sosfreqz
+from numba import njit
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    # - Python < 3.8: Input and output are sent with each task
+    SharedMemory = None
 
 from rockpool.timeseries import TSContinuous
 from rockpool.layers import Layer
 
 
+@njit(cache=True)
+def _sos_step(sos: np.ndarray, zi: np.ndarray, x: float) -> float:
+    """
+    Pass one sample through a cascade of second-order sections
+
+    Sections are evaluated in transposed direct form II, as in `scipy.signal.sosfilt`, so that states are interchangeable.
+
+    :param np.ndarray sos:  Second-order sections [S, 6]
+    :param np.ndarray zi:   Section states [S, 2]. Updated in place
+    :param float x:         Input sample
+
+    :return float:          Output sample
+    """
+    for s in range(sos.shape[0]):
+        y = sos[s, 0] * x + zi[s, 0]
+        zi[s, 0] = sos[s, 1] * x - sos[s, 4] * y + zi[s, 1]
+        zi[s, 1] = sos[s, 2] * x - sos[s, 5] * y
+        x = y
+    return x
+
+
+@njit(cache=True)
+def _filter_bank_envelope(
+    sos_band: np.ndarray,
+    sos_lowpass: np.ndarray,
+    signal: np.ndarray,
+    num_steps: int,
+    zi_band: np.ndarray,
+    zi_lowpass: np.ndarray,
+    start: int,
+    downsample: int,
+    output: np.ndarray,
+):
+    """
+    Band-pass filter a signal with a bank of filters, rectify, low-pass filter and decimate the result
+
+    All stages are evaluated sample by sample, so that full-rate intermediate signals are never stored. Only every ``downsample``-th sample from ``start`` is written to ``output``.
+
+    :param np.ndarray sos_band:     Second-order sections of each band-pass filter [F, S, 6]
+    :param np.ndarray sos_lowpass:  Second-order sections of the low-pass filter [S_low, 6]
+    :param np.ndarray signal:       Input signal [T,]
+    :param int num_steps:           Number of samples after which the filter states are stored
+    :param np.ndarray zi_band:      States of the band-pass filters [F, S, 2]. Updated in place
+    :param np.ndarray zi_lowpass:   States of the low-pass filter for each band [F, S_low, 2]. Updated in place
+    :param int start:               Index of the first sample to be stored
+    :param int downsample:          Store every ``downsample``-th sample
+    :param np.ndarray output:       Output array [T_out, F]. Written in place
+    """
+    state_band = zi_band.copy()
+    state_lowpass = zi_lowpass.copy()
+    for t in range(signal.size):
+        if t == num_steps:
+            # - Later samples are filtered again in the next evolution
+            zi_band[:] = state_band
+            zi_lowpass[:] = state_lowpass
+        store = t >= start and (t - start) % downsample == 0
+        for f in range(sos_band.shape[0]):
+            x = _sos_step(sos_band[f], state_band[f], signal[t])
+            x = _sos_step(sos_lowpass, state_lowpass[f], abs(x))
+            if store:
+                output[(t - start) // downsample, f] = x
+    if num_steps >= signal.size:
+        zi_band[:] = state_band
+        zi_lowpass[:] = state_lowpass
+
+
 class FilterBank(Layer, ABC):
     """
     Super-class to create a filter bank layer.
@@ -86,6 +158,18 @@ class FilterBank(Layer, ABC):
 
         self.pool = None
 
+    def _init_filters(self):
+        """
+        Stack the band-pass filters in `.filters`, split them among the workers and reset the filter states. Must be called by subclasses after defining `.filters`.
+        """
+        self._sos_bank = np.stack(self.filters)
+        chunk_size = int(np.ceil(self.num_filters / self.num_workers))
+        self.chunks = self.generate_chunks(self.filters, chunk_size)
+        self._chunk_slices = [
+            slice(i, i + chunk_size) for i in range(0, self.num_filters, chunk_size)
+        ]
+        self.reset_state()
+
     def terminate(self):
         if self.pool is not None:
             self.pool.close()
@@ -101,16 +185,84 @@ class FilterBank(Layer, ABC):
         return chunks
 
     @staticmethod
-    def process_filters(args) -> list:
-        filters, params = args
-        signal, filter_lowpass, downsample = params
-        filters_output = []
-        for f in filters:
-            sig = sosfilt(f, signal)
-            sig = np.abs(sig)
-            sig = sosfilt(filter_lowpass, sig)[::downsample]
-            filters_output.append(sig)
-        return filters_output
+    def process_filters(
+        args: Tuple
+    ) -> (Optional[np.ndarray], np.ndarray, np.ndarray):
+        """
+        Filter a signal with a group of band-pass filters, rectify, low-pass filter and decimate the result
+
+        Filter states are carried over after the first ``num_steps`` samples. Remaining samples overlap with the next evolution and do not affect the returned states.
+
+        :param Tuple args:  (sos_band, zi_band, filter_lowpass, zi_lowpass, signal, num_steps, start, downsample, output)
+            sos_band:       Second-order sections of the band-pass filters [F, S, 6]
+            zi_band:        States of the band-pass filters [F, S, 2]
+            filter_lowpass: Second-order sections of the low-pass filter [S_low, 6]
+            zi_lowpass:     States of the low-pass filter for each band [F, S_low, 2]
+            signal:         Input signal [T,], or ``(name, shape)`` of a shared memory block holding it
+            num_steps:      Number of samples after which filter states are stored
+            start:          Index of the first sample to return
+            downsample:     Return every ``downsample``-th sample from ``start``
+            output:         Output array [T_out, F], ``(name, shape, channels)`` of a shared memory block whose ``channels`` columns receive the output, or ``None`` to allocate a new array
+
+        :return (output, zi_band, zi_lowpass):
+            output:         Filter bank output [T_out, F], or ``None`` if written to shared memory
+            zi_band:        New states of the band-pass filters [F, S, 2]
+            zi_lowpass:     New states of the low-pass filter [F, S_low, 2]
+        """
+        (
+            sos_band,
+            zi_band,
+            filter_lowpass,
+            zi_lowpass,
+            signal,
+            num_steps,
+            start,
+            downsample,
+            output,
+        ) = args
+
+        shared_blocks = []
+        try:
+            if isinstance(signal, tuple):
+                # - Read input from shared memory
+                shm_signal = SharedMemory(name=signal[0])
+                shared_blocks.append(shm_signal)
+                signal = np.ndarray(signal[1], dtype=float, buffer=shm_signal.buf)
+
+            if output is None:
+                num_out = len(range(start, signal.size, downsample))
+                output = np.empty((num_out, len(sos_band)))
+                output_returned = output
+            elif isinstance(output, tuple):
+                # - Write output to shared memory
+                shm_output = SharedMemory(name=output[0])
+                shared_blocks.append(shm_output)
+                output = np.ndarray(output[1], dtype=float, buffer=shm_output.buf)[
+                    :, output[2]
+                ]
+                output_returned = None
+            else:
+                output_returned = output
+
+            _filter_bank_envelope(
+                sos_band,
+                filter_lowpass,
+                signal,
+                num_steps,
+                zi_band,
+                zi_lowpass,
+                start,
+                downsample,
+                output,
+            )
+
+        finally:
+            # - Release views on shared memory before detaching
+            signal = output = None
+            for shm in shared_blocks:
+                shm.close()
+
+        return output_returned, zi_band, zi_lowpass
 
     def evolve(
         self,
@@ -122,6 +274,8 @@ class FilterBank(Layer, ABC):
         """
         Evolve the state of the filterbanks, given an input
 
+        Filter states are kept between calls, so that a signal can be processed in consecutive blocks with the same result as in a single evolution. With several workers, input and output are exchanged with the workers through shared memory, if available.
+
         :param Optional[TSContinuous] ts_input:   Raw input signal
         :param Optional[float] duration:          Duration of evolution, in s
         :param Optional[int] num_timesteps:       Number of time steps to evolve
@@ -134,23 +288,79 @@ class FilterBank(Layer, ABC):
         time_base, input_step, num_time_steps = self._prepare_input(
             ts_input=ts_input, duration=duration, num_timesteps=num_timesteps
         )
-
-        args = list(
-            product(
-                self.chunks, [(input_step.T[0], self.filter_lowpass, self.downsample)]
+        signal = np.ascontiguousarray(input_step[:, 0], dtype=float)
+
+        # - Keep downsampling phase continuous across evolutions
+        start = -self._timestep % self.downsample
+        num_out = len(range(start, signal.size, self.downsample))
+
+        if self.num_workers == 1:
+            # - Filter in this process, updating filter states in place
+            filtOutput = np.empty((num_out, self.num_filters))
+            self.process_filters(
+                (
+                    self._sos_bank,
+                    self._zi_band,
+                    self.filter_lowpass,
+                    self._zi_lowpass,
+                    signal,
+                    num_time_steps,
+                    start,
+                    self.downsample,
+                    filtOutput,
+                )
             )
-        )
+            res = []
+
+        else:
+            if self.pool is None:
+                self.pool = Pool(self.num_workers)
 
-        if self.pool is None:
-            self.pool = Pool(self.num_workers)
+            if SharedMemory is not None:
+                shm_signal = SharedMemory(create=True, size=max(signal.nbytes, 1))
+                shm_output = SharedMemory(
+                    create=True, size=max(num_out * self.num_filters * 8, 1)
+                )
+                output_shape = (num_out, self.num_filters)
+                try:
+                    shared_signal = np.ndarray(
+                        signal.shape, dtype=float, buffer=shm_signal.buf
+                    )
+                    shared_signal[:] = signal
+                    del shared_signal
+                    res = self.pool.map(
+                        FilterBank.process_filters,
+                        self._worker_args(
+                            (shm_signal.name, signal.shape),
+                            num_time_steps,
+                            start,
+                            lambda chunk: (shm_output.name, output_shape, chunk),
+                        ),
+                    )
+                    filtOutput = np.ndarray(
+                        output_shape, dtype=float, buffer=shm_output.buf
+                    ).copy()
+                finally:
+                    for shm in (shm_signal, shm_output):
+                        shm.close()
+                        shm.unlink()
 
-        res = self.pool.map(ButterMelFilter.process_filters, args)
-        filtOutput = np.concatenate(res).T
+            else:
+                res = self.pool.map(
+                    FilterBank.process_filters,
+                    self._worker_args(
+                        signal, num_time_steps, start, lambda chunk: None
+                    ),
+                )
+                filtOutput = np.hstack([output for output, __, __ in res])
 
-        vtTimeBase = (
-            time_base[0] + np.arange(len(filtOutput)) * self.downsample / self.fs
-        )
-        self._timestep += input_step.shape[0] - 1
+        # - Store filter states from workers
+        for chunk, (__, zi_band, zi_lowpass) in zip(self._chunk_slices, res):
+            self._zi_band[chunk] = zi_band
+            self._zi_lowpass[chunk] = zi_lowpass
+
+        vtTimeBase = time_base[start::self.downsample][: len(filtOutput)]
+        self._timestep += num_time_steps
 
         if self.normalize:
             filtOutput /= np.max(np.abs(filtOutput))
@@ -160,9 +370,43 @@ class FilterBank(Layer, ABC):
 
         return TSContinuous(vtTimeBase, filtOutput, name="filteredInput")
 
+    def _worker_args(
+        self, signal: Union[np.ndarray, Tuple], num_steps: int, start: int, output
+    ) -> list:
+        """
+        Arguments to `.process_filters` for each group of filters
+
+        :param Union[np.ndarray, Tuple] signal: Input signal, or descriptor of shared memory block
+        :param int num_steps:                   Number of samples after which filter states are stored
+        :param int start:                       Index of the first sample to return
+        :param Callable output:                 Function returning the output argument for the slice of filters of a group
+
+        :return list:                           Arguments for each group
+        """
+        return [
+            (
+                self._sos_bank[chunk],
+                self._zi_band[chunk],
+                self.filter_lowpass,
+                self._zi_lowpass[chunk],
+                signal,
+                num_steps,
+                start,
+                self.downsample,
+                output(chunk),
+            )
+            for chunk in self._chunk_slices
+        ]
+
+    def reset_state(self):
+        """ Reset the states of all filters to zero """
+        self._zi_band = np.zeros(self._sos_bank.shape[:2] + (2,))
+        self._zi_lowpass = np.zeros((self.num_filters, len(self.filter_lowpass), 2))
+
     def reset_all(self):
-        """ override `reset_all` method """
+        """ Reset time and filter states """
         self.reset_time()
+        self.reset_state()
 
     @abstractmethod
     def to_dict(self) -> dict:
@@ -302,8 +546,7 @@ class ButterMelFilter(FilterBank):
             )
         )
 
-        chunk_size = int(np.ceil(self.num_filters / num_workers))
-        self.chunks = ButterMelFilter.generate_chunks(self.filters, chunk_size)
+        self._init_filters()
 
     @staticmethod
     def hz2mel(x: Union[float, np.array]) -> Union[float, np.array]:
@@ -418,9 +661,7 @@ class ButterFilter(FilterBank):
             )
         )
 
-        chunk_size = int(np.ceil(self.num_filters / num_workers))
-        self.chunks = ButterFilter.generate_chunks(self.filters, chunk_size)
-        self.pool = None
+        self._init_filters()
 
     def to_dict(self) -> dict:
         """ Return the parameters of this layer as a dict, for saving """
@@ -5,30 +5,271 @@
 import numpy as np
 from typing import Optional, Union
 from collections import deque
+from scipy.sparse import csr_matrix
+from numba import njit
 from ...timeseries import TSEvent, TSContinuous
 from ...utilities import ArrayLike
 from .. import Layer
 
 FloatVector = Union[ArrayLike, float]
 
-# - Try to import tqdm
-try:
-    from tqdm.autonotebook import tqdm
+# - Absolute tolerance, e.g. for comparing float values
+tol_abs = 1e-9
 
-    __use_tqdm = True
+__all__ = ["FFCLIAF", "RecCLIAF"]
 
-except ModuleNotFoundError:
-    __use_tqdm = False
 
-    # - Define a fake tqdm shim
-    def tqdm(iter, *args, **kwargs):
-        return iter
+### --- Compiled evolution functions
 
 
-# - Absolute tolerance, e.g. for comparing float values
-tol_abs = 1e-9
+@njit(cache=True)
+def _record_spikes(
+    spike_steps: np.ndarray,
+    spike_ids: np.ndarray,
+    num_spikes: int,
+    step: int,
+    num_spikes_step: np.ndarray,
+) -> (np.ndarray, np.ndarray, int):
+    """
+    Append the spikes of one time step to preallocated arrays, growing them if necessary
 
-__all__ = ["FFCLIAF", "RecCLIAF"]
+    :param np.ndarray spike_steps:      Time step of each recorded spike
+    :param np.ndarray spike_ids:        Neuron ID of each recorded spike
+    :param int num_spikes:              Number of spikes recorded so far
+    :param int step:                    Current time step
+    :param np.ndarray num_spikes_step:  Number of spikes of each neuron in the current time step
+
+    :return (np.ndarray, np.ndarray, int):  Updated (spike_steps, spike_ids, num_spikes)
+    """
+    num_new = np.sum(num_spikes_step)
+    if num_spikes + num_new > spike_steps.size:
+        # - Grow arrays
+        new_size = 2 * spike_steps.size + num_new
+        new_steps = np.empty(new_size, np.int64)
+        new_ids = np.empty(new_size, np.int64)
+        new_steps[:num_spikes] = spike_steps[:num_spikes]
+        new_ids[:num_spikes] = spike_ids[:num_spikes]
+        spike_steps = new_steps
+        spike_ids = new_ids
+
+    for id_neur in range(num_spikes_step.size):
+        for _ in range(num_spikes_step[id_neur]):
+            spike_steps[num_spikes] = step
+            spike_ids[num_spikes] = id_neur
+            num_spikes += 1
+
+    return spike_steps, spike_ids, num_spikes
+
+
+@njit(cache=True)
+def _evolve_ffcliaf(
+    state: np.ndarray,
+    inp_spike_ptr: np.ndarray,
+    inp_spike_ids: np.ndarray,
+    weights_in: np.ndarray,
+    bias: np.ndarray,
+    v_thresh: np.ndarray,
+    v_subtract: np.ndarray,
+    v_reset: np.ndarray,
+    subtract: bool,
+    monitor_id: np.ndarray,
+    record: np.ndarray,
+) -> (np.ndarray, np.ndarray, int):
+    """
+    Evolve a feedforward layer of integrate and fire neurons with constant leak
+
+    :param np.ndarray state:            Neuron states [N,]. Will be updated
+    :param np.ndarray inp_spike_ptr:    Index pointer of the input spike raster, in CSR format [T+1,]
+    :param np.ndarray inp_spike_ids:    Input channels of the input spike raster, in CSR format
+    :param np.ndarray weights_in:       Input weights [N_in, N]
+    :param np.ndarray bias:             Bias added in each time step [N,]
+    :param np.ndarray v_thresh:         Spiking thresholds [N,]
+    :param np.ndarray v_subtract:       Values subtracted after a spike, if ``subtract`` is ``True`` [N,]
+    :param np.ndarray v_reset:          Reset potentials, if ``subtract`` is ``False`` [N,]
+    :param bool subtract:               If ``True``, subtract from neuron states after spikes. Otherwise reset
+    :param np.ndarray monitor_id:       IDs of neurons whose states are recorded
+    :param np.ndarray record:           Recorded states before and after the spikes in each time step [2T, len(monitor_id)]. Will be filled
+
+    :return (np.ndarray, np.ndarray, int): (spike_steps, spike_ids, num_spikes)
+    """
+    num_timesteps = inp_spike_ptr.size - 1
+    size = state.size
+    update = np.zeros(size)
+    num_spikes_step = np.zeros(size, np.int64)
+
+    # - Preallocated arrays for output spikes
+    spike_steps = np.empty(size + num_timesteps, np.int64)
+    spike_ids = np.empty(size + num_timesteps, np.int64)
+    num_spikes = 0
+
+    for step in range(num_timesteps):
+        # - Sum weights of input channels that spike in this time step
+        update[:] = 0
+        for idx in range(inp_spike_ptr[step], inp_spike_ptr[step + 1]):
+            update += weights_in[inp_spike_ids[idx]]
+
+        # - State update
+        for id_neur in range(size):
+            state[id_neur] = state[id_neur] + update[id_neur] + bias[id_neur]
+
+        # - Record state before reset
+        for idx_rec in range(monitor_id.size):
+            record[2 * step, idx_rec] = state[monitor_id[idx_rec]]
+
+        # - Check threshold crossings for spikes, reset or subtract from membrane state
+        for id_neur in range(size):
+            num_spikes_step[id_neur] = 0
+            if subtract:
+                # - Neurons that are still above threshold emit another spike
+                while state[id_neur] >= v_thresh[id_neur]:
+                    state[id_neur] -= v_subtract[id_neur]
+                    num_spikes_step[id_neur] += 1
+            elif state[id_neur] >= v_thresh[id_neur]:
+                state[id_neur] = v_reset[id_neur]
+                num_spikes_step[id_neur] = 1
+
+        # - Record spikes
+        spike_steps, spike_ids, num_spikes = _record_spikes(
+            spike_steps, spike_ids, num_spikes, step, num_spikes_step
+        )
+
+        # - Record state after reset
+        for idx_rec in range(monitor_id.size):
+            record[2 * step + 1, idx_rec] = state[monitor_id[idx_rec]]
+
+    return spike_steps[:num_spikes], spike_ids[:num_spikes], num_spikes
+
+
+@njit(cache=True)
+def _evolve_reccliaf(
+    state: np.ndarray,
+    inp_spike_ptr: np.ndarray,
+    inp_spike_ids: np.ndarray,
+    weights_in: np.ndarray,
+    weights_rec: np.ndarray,
+    bias: np.ndarray,
+    is_bias: np.ndarray,
+    v_thresh: np.ndarray,
+    v_subtract: np.ndarray,
+    v_reset: np.ndarray,
+    subtract: bool,
+    min_state: float,
+    max_state: float,
+    rec_spikes_buffer: np.ndarray,
+    idx_buffer: int,
+    ts_until_refr_ends: np.ndarray,
+    ts_per_refr: np.ndarray,
+    monitor_id: np.ndarray,
+    record: np.ndarray,
+) -> (np.ndarray, np.ndarray, int, int):
+    """
+    Evolve a recurrent layer of integrate and fire neurons with constant leak
+
+    :param np.ndarray state:                Neuron states [N,], of the state type of the layer. Will be updated
+    :param np.ndarray inp_spike_ptr:        Index pointer of the input spike raster, in CSR format [T+1,]
+    :param np.ndarray inp_spike_ids:        Input channels of the input spike raster, in CSR format
+    :param np.ndarray weights_in:           Input weights [N_in, N]
+    :param np.ndarray weights_rec:          Recurrent weights [N, N]
+    :param np.ndarray bias:                 Bias values [N,]
+    :param np.ndarray is_bias:              Factor for the bias in each time step [T,]
+    :param np.ndarray v_thresh:             Spiking thresholds [N,]
+    :param np.ndarray v_subtract:           Values subtracted after a spike, if ``subtract`` is ``True`` [N,]
+    :param np.ndarray v_reset:              Reset potentials, if ``subtract`` is ``False`` [N,]
+    :param bool subtract:                   If ``True``, subtract from neuron states after spikes. Otherwise reset
+    :param float min_state:                 Lower bound for neuron states
+    :param float max_state:                 Upper bound for neuron states
+    :param np.ndarray rec_spikes_buffer:    Ring buffer with number of delayed recurrent spikes of each neuron for each time step [D, N]. Will be updated
+    :param int idx_buffer:                  Index of the buffer row with the spikes arriving in the first time step
+    :param np.ndarray ts_until_refr_ends:   Number of time steps until refractoriness of each neuron ends [N,]. Will be updated
+    :param np.ndarray ts_per_refr:          Refractory period of each neuron, in time steps [N,]
+    :param np.ndarray monitor_id:           IDs of neurons whose states are recorded
+    :param np.ndarray record:               Recorded states before and after the spikes in each time step [2T, len(monitor_id)]. Will be filled
+
+    :return (np.ndarray, np.ndarray, int, int): (spike_steps, spike_ids, num_spikes, idx_buffer)
+    """
+    num_timesteps = inp_spike_ptr.size - 1
+    size = state.size
+    delay = rec_spikes_buffer.shape[0]
+    update = np.zeros(size)
+    num_spikes_step = np.zeros(size, np.int64)
+    use_refractoriness = np.any(ts_per_refr > 0)
+
+    # - Preallocated arrays for output spikes
+    spike_steps = np.empty(size + num_timesteps, np.int64)
+    spike_ids = np.empty(size + num_timesteps, np.int64)
+    num_spikes = 0
+
+    for step in range(num_timesteps):
+        # - Input spikes
+        update[:] = 0
+        for idx in range(inp_spike_ptr[step], inp_spike_ptr[step + 1]):
+            update += weights_in[inp_spike_ids[idx]]
+
+        # - Delayed recurrent spikes arriving in this time step
+        for id_neur in range(size):
+            if rec_spikes_buffer[idx_buffer, id_neur] != 0:
+                update += rec_spikes_buffer[idx_buffer, id_neur] * weights_rec[id_neur]
+
+        # - Bias
+        update += is_bias[step] * bias
+
+        for id_neur in range(size):
+            # - Only neurons that are not refractory can receive inputs and be updated
+            if ts_until_refr_ends[id_neur] > 0:
+                update[id_neur] = 0
+
+            # - State update
+            state[id_neur] = min(
+                max(state[id_neur] + update[id_neur], min_state), max_state
+            )
+
+        # - Record state before reset
+        for idx_rec in range(monitor_id.size):
+            record[2 * step, idx_rec] = state[monitor_id[idx_rec]]
+
+        # - Check threshold crossings for spikes, reset or subtract from membrane state
+        for id_neur in range(size):
+            num_spikes_step[id_neur] = 0
+            if state[id_neur] >= v_thresh[id_neur]:
+                if subtract:
+                    state[id_neur] = min(
+                        max(state[id_neur] - v_subtract[id_neur], min_state),
+                        max_state,
+                    )
+                    num_spikes_step[id_neur] = 1
+                    # - Without refractoriness, neurons can emit multiple spikes per time step
+                    while (
+                        not use_refractoriness and state[id_neur] >= v_thresh[id_neur]
+                    ):
+                        state[id_neur] = min(
+                            max(state[id_neur] - v_subtract[id_neur], min_state),
+                            max_state,
+                        )
+                        num_spikes_step[id_neur] += 1
+                else:
+                    state[id_neur] = min(max(v_reset[id_neur], min_state), max_state)
+                    num_spikes_step[id_neur] = 1
+
+            if use_refractoriness:
+                # - Update refractoriness
+                ts_until_refr_ends[id_neur] = max(ts_until_refr_ends[id_neur] - 1, 0)
+                if num_spikes_step[id_neur] > 0:
+                    ts_until_refr_ends[id_neur] = ts_per_refr[id_neur]
+
+        # - Store recurrent spikes in place of the ones that have arrived
+        rec_spikes_buffer[idx_buffer] = num_spikes_step
+        idx_buffer = (idx_buffer + 1) % delay
+
+        # - Record spikes
+        spike_steps, spike_ids, num_spikes = _record_spikes(
+            spike_steps, spike_ids, num_spikes, step, num_spikes_step
+        )
+
+        # - Record state after reset
+        for idx_rec in range(monitor_id.size):
+            record[2 * step + 1, idx_rec] = state[monitor_id[idx_rec]]
+
+    return spike_steps[:num_spikes], spike_ids[:num_spikes], num_spikes, idx_buffer
 
 
 class CLIAF(Layer):
@@ -110,6 +351,7 @@ class CLIAF(Layer):
         ts_input: Optional[TSEvent] = None,
         duration: Optional[float] = None,
         num_timesteps: Optional[int] = None,
+        sparse: bool = False,
     ) -> (np.ndarray, int):
         """
         Sample input, set up time base
@@ -117,9 +359,10 @@ class CLIAF(Layer):
         :param Optional[TSEvent] ts_input:  TxM or Tx1 Input signals for this layer
         :param Optional[float] duration:    Duration of the desired evolution, in seconds
         :param Optional[int] num_timesteps: Number of evolution time steps
+        :param bool sparse:                 If ``True``, return the raster as a sparse CSR matrix. Default: ``False``
 
         :return (spike_raster, num_timesteps):
-            spike_raster:   (np.ndarray) Boolean raster containing spike info
+            spike_raster:   (np.ndarray) Boolean raster containing spike info. ``scipy.sparse.csr_matrix`` if ``sparse`` is ``True``
             num_timesteps:  (int) Number of evolution time steps
         """
         print("Preparing input for processing")
@@ -157,7 +400,8 @@ class CLIAF(Layer):
         # - Extract spike timings and channels
         if ts_input is not None:
             # Extract spike data from the input variable
-            spike_raster = ts_input.raster(
+            rasterize = ts_input.raster_sparse if sparse else ts_input.raster
+            spike_raster = rasterize(
                 dt=self.dt,
                 t_start=self.t,
                 t_stop=(self._timestep + num_timesteps) * self._dt,
@@ -166,6 +410,9 @@ class CLIAF(Layer):
             # - Make sure size is correct
             spike_raster = spike_raster[:num_timesteps, :]
 
+        elif sparse:
+            spike_raster = csr_matrix((num_timesteps, self.size_in), dtype=bool)
+
         else:
             spike_raster = np.zeros((num_timesteps, self.size_in), bool)
 
@@ -361,89 +608,51 @@ class FFCLIAF(CLIAF):
         :return TSEvent:                    Output spike series
         """
 
-        # - Generate input in rasterized form, get actual evolution duration
+        # - Generate input in sparse rasterized form, get actual evolution duration
         inp_spike_raster, num_timesteps = self._prepare_input(
-            ts_input, duration, num_timesteps
+            ts_input, duration, num_timesteps, sparse=True
         )
-
-        # Hold the sate of network at any time step when updated
-        state_time_series = []
-        spike_times = []
-        spike_ids = []
-
-        # Local variables
-        state = self.state.astype(np.float32)
-        v_thresh = self.v_thresh
-        weights_in = self.weights_in
-        bias = self.bias
-        dt = self.dt
-        size = self.size
-        v_subtract = self.v_subtract
-        v_reset = self.v_reset
-
         # - Indices of neurons to be monitored
-        monitor_id = None if self.monitor_id.size == 0 else self.monitor_id
-        # - Count number of spikes for each neuron in each time step
-        vnNumSpikes = np.zeros(size, int)
-        # - Time before first time step
-        t_now = self.t
-
-        if monitor_id is not None:
-            # Record initial state of the network
-            self._add_to_record(state_time_series, t_now)
-
-        # Iterate over all time steps
-        for cur_time_step in tqdm(range(inp_spike_raster.shape[0])):
-
-            # - Spikes from input synapses
-            is_inp_spike_raster = inp_spike_raster[cur_time_step]
-
-            # Update neuron states
-            update = is_inp_spike_raster @ weights_in
-
-            # State update (write this way to avoid that type casting fails)
-            state = state + update + bias
-
-            # - Update current time
-            t_now += dt
-
-            if monitor_id is not None:
-                # - Record state before reset
-                self._add_to_record(
-                    state_time_series, t_now, id_out=monitor_id, state=state
-                )
+        monitor_id = self.monitor_id.astype(int)
+        record = np.zeros((2 * num_timesteps, monitor_id.size))
+
+        # - Evolve with compiled kernel
+        state = self.state.astype(np.float32).astype(float)
+        spike_steps, spike_ids, _ = _evolve_ffcliaf(
+            state,
+            inp_spike_raster.indptr,
+            inp_spike_raster.indices,
+            np.asarray(self.weights_in, float),
+            self.bias.astype(float),
+            self.v_thresh.astype(float),
+            np.zeros(self.size) if self.v_subtract is None else self.v_subtract,
+            self.v_reset.astype(float),
+            self.v_subtract is not None,
+            monitor_id,
+            record,
+        )
 
-            # - Reset spike counter
-            vnNumSpikes[:] = 0
-
-            # - Check threshold crossings for spikes
-            rec_spike_raster = state >= v_thresh
-
-            # - Reset or subtract from membrane state after spikes
-            if v_subtract is not None:
-                while rec_spike_raster.any():
-                    # - Subtract from states
-                    state[rec_spike_raster] -= v_subtract[rec_spike_raster]
-                    # - Add to spike counter
-                    vnNumSpikes[rec_spike_raster] += 1
-                    # - Neurons that are still above threshold will emit another spike
-                    rec_spike_raster = state >= v_thresh
-            else:
-                # - Add to spike counter
-                vnNumSpikes = rec_spike_raster.astype(int)
-                # - Reset neuron states
-                state[rec_spike_raster] = v_reset[rec_spike_raster]
-
-            # - Record spikes
-            spike_times += [t_now] * np.sum(vnNumSpikes)
-            spike_ids += list(np.repeat(np.arange(size), vnNumSpikes))
-
-            if monitor_id is not None:
-                # - Record state after reset
-                self._add_to_record(
-                    state_time_series, t_now, id_out=monitor_id, state=state
-                )
-            np.set_printoptions(precision=4, suppress=True)
+        # - Time after each time step
+        times_steps = np.cumsum(np.r_[self.t, np.repeat(self.dt, num_timesteps)])[1:]
+        spike_times = times_steps[spike_steps]
+
+        if monitor_id.size > 0:
+            # - Records of initial state and of each monitored neuron before and after reset,
+            #   as rows of [t, neuron ID, state]
+            state_time_series = [
+                np.column_stack(
+                    (np.repeat(self.t, self.size), np.arange(self.size), self.state)
+                ),
+                np.column_stack(
+                    (
+                        np.repeat(times_steps, 2 * monitor_id.size),
+                        np.tile(monitor_id, 2 * num_timesteps),
+                        record.flatten(),
+                    )
+                ),
+            ]
+        else:
+            state_time_series = []
 
         # - Update state
         self._state = state
@@ -467,7 +676,9 @@ class FFCLIAF(CLIAF):
         self._timestep += num_timesteps
 
         # TODO: Is there a time series object for this too?
-        ts_state = np.array(state_time_series)
+        ts_state = (
+            np.vstack(state_time_series) if state_time_series else np.array([])
+        )
 
         # This is only for debugging purposes. Should ideally not be saved
         self._ts_state = ts_state
@@ -567,7 +778,7 @@ class RecCLIAF(CLIAF):
         :param Optional[TSEvent] ts_input:  Input spike trian
         :param Optional[float] duration:    Simulation/Evolution time
         :param Optional[int] num_timesteps: Number of evolution time steps
-        :param bool verbose:      Show progress bar during evolution
+        :param Optional[bool] verbose:      Currently no effect, just for conformity
 
         :return TSEvent:                    Output spike series
         """
@@ -577,31 +788,17 @@ class RecCLIAF(CLIAF):
             ts_input, duration, num_timesteps
         )
 
-        # Lists for recording spikes
-        ts_spikes = []
-        spike_ids = []
-
-        # Local variables
-        state = self.state
-        v_thresh = self.v_thresh
-        weights_rec = self.weights_rec
-        weights_in = self.weights_in
-        bias = self.bias
-        size = self.size
-        v_subtract = self.v_subtract
-        v_reset = self.v_reset
-
-        # - Deque of arrays with number of delayed spikes for each neuron for each time step
-        num_rec_spikes_q = self._num_rec_spikes_q
-        # - Array for storing new recurrent spikes
-        num_rec_spikes = np.zeros(self.size, int)
-
-        # - For each neuron store number time steps until refractoriness ends
-        ts_until_refr_ends = self._ts_until_refr_ends
-        ts_per_refr = self._ts_per_refr
+        # - Deque of arrays with number of delayed spikes for each neuron for each time step,
+        #   as ring buffer. Row 0 holds the spikes arriving in the first time step.
+        rec_spikes_buffer = np.array(list(self._num_rec_spikes_q), float)
+
+        # - Refractory periods in time steps
+        ts_per_refr = (
+            np.zeros(self.size, int) if self._ts_per_refr is None else self._ts_per_refr
+        )
 
         # - Indices of neurons to be monitored
-        monitor_id = None if self.monitor_id.size == 0 else self.monitor_id
+        monitor_id = self.monitor_id.astype(int)
 
         # - Boolean array indicating evolution time steps where bias is applied
         is_bias = np.zeros(num_timesteps)
@@ -611,100 +808,46 @@ class RecCLIAF(CLIAF):
             -(self._timestep + 1) % self._num_ts_per_bias :: self._num_ts_per_bias
         ] = 1
 
-        # - State type dependent variables
-        state_type = self.state_type
-        min_state = self._min_state
-        max_state = self._max_state
-
-        if monitor_id is not None:
-            # States are recorded after update and after spike-triggered reset, i.e. twice per _timestep
-            record = np.zeros((2 * num_timesteps + 1, monitor_id.size))
-            # Record initial state of the network
-            record[0, :] = state[monitor_id]
-
-        if verbose:
-            range_iter = tqdm(range(num_timesteps))
-        else:
-            range_iter = range(num_timesteps)
-
-        # Iterate over all time steps
-        for cur_time_step in range_iter:
-
-            # - Spikes from input synapses
-            is_inp_spike_raster = inp_spike_raster[cur_time_step]
-
-            # Update neuron states
-            update = (
-                (is_inp_spike_raster @ weights_in)  # Input spikes
-                + (num_rec_spikes_q.popleft() @ weights_rec)  # Recurrent spikes
-                + (is_bias[cur_time_step] * bias)  # Bias
-            )
+        # States are recorded after update and after spike-triggered reset, i.e. twice per _timestep
+        record = np.zeros((2 * num_timesteps + 1, monitor_id.size))
+        # Record initial state of the network
+        record[0, :] = self.state[monitor_id]
+
+        # - Evolve with compiled kernel
+        inp_spike_raster = csr_matrix(inp_spike_raster)
+        state = np.array(self.state, dtype=self.state_type)
+        ts_until_refr_ends = np.array(self._ts_until_refr_ends, dtype=int)
+        ts_spikes, spike_ids, _, idx_buffer = _evolve_reccliaf(
+            state,
+            inp_spike_raster.indptr,
+            inp_spike_raster.indices,
+            np.asarray(self.weights_in, float),
+            np.asarray(self.weights_rec, float),
+            self.bias.astype(float),
+            is_bias,
+            self.v_thresh.astype(float),
+            np.zeros(self.size) if self.v_subtract is None else self.v_subtract,
+            self.v_reset.astype(float),
+            self.v_subtract is not None,
+            float(self._min_state),
+            float(self._max_state),
+            rec_spikes_buffer,
+            0,
+            ts_until_refr_ends,
+            ts_per_refr,
+            monitor_id,
+            record[1:],
+        )
 
-            # - Only neurons that are not refractory can receive inputs and be updated
-            is_refractory = ts_until_refr_ends > 0
-            update[is_refractory] = 0
-
-            # State update (write this way to avoid that type casting fails)
-            state = np.clip(state + update, min_state, max_state).astype(state_type)
-
-            if monitor_id is not None:
-                # - Record state before reset
-                record[2 * cur_time_step + 1] = state[monitor_id]
-
-            # - Check threshold crossings for spikes
-            is_spiking = state >= v_thresh
-
-            # - Reset or subtract from membrane state after spikes
-            if v_subtract is not None:  # - Subtract from potential
-                if (
-                    ts_per_refr == 0
-                ).all():  # - No refractoriness - neurons can emit multiple spikes per time step
-                    # - Reset recurrent spike counter
-                    num_rec_spikes[:] = 0
-                    while is_spiking.any():
-                        # - Add to spike counter
-                        num_rec_spikes[is_spiking] += 1
-                        # - Subtract from states
-                        state[is_spiking] = np.clip(
-                            state[is_spiking] - v_subtract[is_spiking],
-                            min_state,
-                            max_state,
-                        ).astype(state_type)
-                        # - Neurons that are still above threshold will emit another spike
-                        is_spiking = state >= v_thresh
-                else:  # With refractoriness, at most one spike per time step is possible
-                    # - Add to spike counter
-                    num_rec_spikes = is_spiking.astype(int)
-                    # - Reset neuron states
-                    state[is_spiking] = np.clip(
-                        state[is_spiking] - v_subtract[is_spiking], min_state, max_state
-                    ).astype(state_type)
-            else:  # - Reset potential
-                # - Add to spike counter
-                num_rec_spikes = is_spiking.astype(int)
-                # - Reset neuron states
-                state[is_spiking] = np.clip(
-                    v_reset[is_spiking], min_state, max_state
-                ).astype(state_type)
-
-            if (ts_per_refr > 0).any():
-                # - Update refractoryness
-                ts_until_refr_ends = np.clip(ts_until_refr_ends - 1, 0, None)
-                ts_until_refr_ends[is_spiking] = ts_per_refr[is_spiking]
-
-            # - Store recurrent spikes in deque
-            num_rec_spikes_q.append(num_rec_spikes)
-
-            # - Record spikes
-            ts_spikes += [cur_time_step] * np.sum(num_rec_spikes)
-            spike_ids += list(np.repeat(np.arange(size), num_rec_spikes))
-
-            if monitor_id is not None:
-                # - Record state after reset
-                record[2 * cur_time_step + 2] = state[monitor_id]
-
-        # - Store IDs of neurons that would spike in furute time steps
-        self._num_rec_spikes_q = num_rec_spikes_q
+        # - Store numbers of spikes that will arrive in future time steps
+        num_ts_per_delay = len(rec_spikes_buffer)
+        self._num_rec_spikes_q = deque(
+            [
+                rec_spikes_buffer[(idx_buffer + i) % num_ts_per_delay]
+                for i in range(num_ts_per_delay)
+            ],
+            maxlen=num_ts_per_delay,
+        )
 
         # - Store refractoriness of neurons
         self._ts_until_refr_ends = ts_until_refr_ends
@@ -714,7 +857,7 @@ class RecCLIAF(CLIAF):
         t_stop = (self._timestep + num_timesteps) * self.dt
 
         # Generate output sime series
-        spike_times = (np.array(ts_spikes) + 1 + self._timestep) * self.dt
+        spike_times = (ts_spikes + 1 + self._timestep) * self.dt
         event_out = TSEvent(
             # Clip due to possible numerical errors,
             times=np.clip(spike_times, t_start, t_stop),
@@ -724,7 +867,7 @@ class RecCLIAF(CLIAF):
             t_stop=t_stop,
         )
 
-        if monitor_id is not None:
+        if monitor_id.size > 0:
             # - Store recorded data in timeseries
             record_times = np.repeat(
                 (self._timestep + np.arange(num_timesteps + 1)) * self.dt, 2
@@ -12,6 +12,8 @@
 from typing import Union, Optional, List, Tuple
 import numpy as np
 import heapq
+from scipy.sparse import csr_matrix
+from numba import njit
 
 from ...timeseries import TSEvent, TSContinuous
 
@@ -32,6 +34,360 @@ tol_abs = 1e-10
 tMinRefractory = 1e-9
 
 
+### --- Compiled event-driven engine
+
+
+@njit(cache=True)
+def _heap_push(
+    heap_times: np.ndarray,
+    heap_channels: np.ndarray,
+    heap_size: int,
+    t_event: float,
+    channel: int,
+) -> (np.ndarray, np.ndarray, int):
+    """
+    Push an event to a binary heap ordered by time and channel, growing the heap arrays if necessary
+
+    :return (np.ndarray, np.ndarray, int): (heap_times, heap_channels, heap_size)
+    """
+    if heap_size == heap_times.size:
+        heap_times = np.concatenate((heap_times, np.empty(heap_times.size + 1)))
+        heap_channels = np.concatenate(
+            (heap_channels, np.empty(heap_channels.size + 1, np.int64))
+        )
+
+    # - Sift up
+    pos = heap_size
+    while pos > 0:
+        parent = (pos - 1) // 2
+        if heap_times[parent] < t_event or (
+            heap_times[parent] == t_event and heap_channels[parent] <= channel
+        ):
+            break
+        heap_times[pos] = heap_times[parent]
+        heap_channels[pos] = heap_channels[parent]
+        pos = parent
+    heap_times[pos] = t_event
+    heap_channels[pos] = channel
+
+    return heap_times, heap_channels, heap_size + 1
+
+
+@njit(cache=True)
+def _heap_pop(
+    heap_times: np.ndarray, heap_channels: np.ndarray, heap_size: int
+) -> (float, int, int):
+    """
+    Pop the earliest event from a binary heap ordered by time and channel
+
+    :return (float, int, int): (t_event, channel, heap_size)
+    """
+    t_event = heap_times[0]
+    channel = heap_channels[0]
+    heap_size -= 1
+    t_last = heap_times[heap_size]
+    channel_last = heap_channels[heap_size]
+
+    # - Sift down the last element
+    pos = 0
+    while True:
+        child = 2 * pos + 1
+        if child >= heap_size:
+            break
+        if child + 1 < heap_size and (
+            heap_times[child + 1] < heap_times[child]
+            or (
+                heap_times[child + 1] == heap_times[child]
+                and heap_channels[child + 1] < heap_channels[child]
+            )
+        ):
+            child += 1
+        if heap_times[child] > t_last or (
+            heap_times[child] == t_last and heap_channels[child] >= channel_last
+        ):
+            break
+        heap_times[pos] = heap_times[child]
+        heap_channels[pos] = heap_channels[child]
+        pos = child
+    heap_times[pos] = t_last
+    heap_channels[pos] = channel_last
+
+    return t_event, channel, heap_size
+
+
+@njit(cache=True)
+def _record_monitor(
+    rec_times: np.ndarray,
+    rec_states: np.ndarray,
+    rec_channels: np.ndarray,
+    num_rec: int,
+    t_event: float,
+    state: np.ndarray,
+    monitor_id: np.ndarray,
+    channel: float,
+) -> (np.ndarray, np.ndarray, np.ndarray, int):
+    """
+    Append states of monitored neurons to growable record arrays
+
+    :return (np.ndarray, np.ndarray, np.ndarray, int): (rec_times, rec_states, rec_channels, num_rec)
+    """
+    if num_rec == rec_times.size:
+        rec_times = np.concatenate((rec_times, np.empty(rec_times.size)))
+        rec_channels = np.concatenate((rec_channels, np.empty(rec_channels.size)))
+        rec_states_new = np.empty((2 * rec_states.shape[0], rec_states.shape[1]))
+        rec_states_new[:num_rec] = rec_states
+        rec_states = rec_states_new
+
+    rec_times[num_rec] = t_event
+    rec_channels[num_rec] = channel
+    for idx_rec in range(monitor_id.size):
+        rec_states[num_rec, idx_rec] = state[monitor_id[idx_rec]]
+
+    return rec_times, rec_states, rec_channels, num_rec + 1
+
+
+@njit(cache=True)
+def _evolve_recdiaf(
+    state: np.ndarray,
+    heap_times: np.ndarray,
+    heap_channels: np.ndarray,
+    heap_size: int,
+    t_start: float,
+    t_final: float,
+    weights_ptr: np.ndarray,
+    weights_ids: np.ndarray,
+    weights_vals: np.ndarray,
+    leak_channel: int,
+    size_in: int,
+    v_thresh: np.ndarray,
+    v_reset: np.ndarray,
+    v_rest: np.ndarray,
+    use_v_rest: bool,
+    v_subtract: np.ndarray,
+    subtract: bool,
+    refractory: np.ndarray,
+    delay: float,
+    min_state: float,
+    max_state: float,
+    monitor_id: np.ndarray,
+):
+    """
+    Evolve a recurrent layer of digital IAF neurons, processing events in temporal order
+
+    Each event only updates the neurons it projects to, according to a sparse (CSR) representation of the total weight matrix. Neurons that are above threshold while refractory are tracked separately, so that they can spike as soon as they stop being refractory. The cost of the evolution therefore scales with the number of synaptic events instead of with the number of events times the layer size.
+
+    :param np.ndarray state:            Neuron states [N,], of the state type of the layer. Will be updated
+    :param np.ndarray heap_times:       Times of the events on the heap. Must be a valid heap together with ``heap_channels``
+    :param np.ndarray heap_channels:    Channels of the events on the heap. Channel -1 denotes the end of a refractory period
+    :param int heap_size:               Number of events on the heap
+    :param float t_start:               Start time of the evolution
+    :param float t_final:               End time of the evolution. Later events remain on the heap
+    :param np.ndarray weights_ptr:      Index pointer of the total weight matrix, in CSR format
+    :param np.ndarray weights_ids:      Target neurons of the total weight matrix, in CSR format
+    :param np.ndarray weights_vals:     Weights of the total weight matrix, in CSR format
+    :param int leak_channel:            Channel that corresponds to the leak
+    :param int size_in:                 Number of input channels
+    :param np.ndarray v_thresh:         Spiking thresholds [N,]
+    :param np.ndarray v_reset:          Reset potentials, if ``subtract`` is ``False`` [N,]
+    :param np.ndarray v_rest:           Resting potentials, if ``use_v_rest`` is ``True`` [N,]
+    :param bool use_v_rest:             If ``True``, the leak drives neuron states towards ``v_rest``
+    :param np.ndarray v_subtract:       Values subtracted after a spike, if ``subtract`` is ``True`` [N,]
+    :param bool subtract:               If ``True``, subtract from neuron states after spikes. Otherwise reset
+    :param np.ndarray refractory:       Refractory periods [N,]
+    :param float delay:                 Delay of recurrent spikes
+    :param float min_state:             Lower bound for neuron states
+    :param float max_state:             Upper bound for neuron states
+    :param np.ndarray monitor_id:       IDs of neurons whose states are recorded
+
+    :return: (spike_times, spike_ids, heap_times, heap_channels, heap_size, rec_times, rec_states, rec_channels)
+    """
+    size = state.size
+    row_silent = weights_ptr.size - 2
+
+    # - Times when neurons are able to spike again
+    t_refractory_ends = np.zeros(size)
+
+    # - Neurons that are above threshold, but may be refractory
+    pending = np.empty(size, np.int64)
+    is_pending = np.zeros(size, np.bool_)
+    num_pending = 0
+    for id_neur in range(size):
+        if state[id_neur] >= v_thresh[id_neur]:
+            pending[num_pending] = id_neur
+            is_pending[id_neur] = True
+            num_pending += 1
+
+    # - Neurons that are spiking in the current event
+    spiking = np.empty(size, np.int64)
+    idx_last_spike = np.full(size, -1, np.int64)
+
+    # - Preallocated arrays for output spikes
+    spike_times = np.empty(size + heap_size)
+    spike_ids = np.empty(size + heap_size, np.int64)
+    num_spikes = 0
+
+    # - Preallocated arrays for recorded states
+    rec_times = np.empty(3 * heap_size + 1)
+    rec_channels = np.empty(3 * heap_size + 1)
+    rec_states = np.empty((3 * heap_size + 1, monitor_id.size))
+    num_rec = 0
+    if monitor_id.size > 0:
+        rec_times, rec_states, rec_channels, num_rec = _record_monitor(
+            rec_times,
+            rec_states,
+            rec_channels,
+            num_rec,
+            t_start,
+            state,
+            monitor_id,
+            np.nan,
+        )
+
+    idx_event = 0
+    while heap_size > 0 and heap_times[0] <= t_final + tol_abs:
+        # - Iterate over events in temporal order
+        t_event, channel, heap_size = _heap_pop(heap_times, heap_channels, heap_size)
+        row = row_silent if channel < 0 else channel
+
+        if monitor_id.size > 0:
+            # - Record state before updates
+            rec_times, rec_states, rec_channels, num_rec = _record_monitor(
+                rec_times,
+                rec_states,
+                rec_channels,
+                num_rec,
+                t_event,
+                state,
+                monitor_id,
+                channel,
+            )
+
+        # - Update states of target neurons that are not refractory
+        num_spiking = 0
+        for idx_w in range(weights_ptr[row], weights_ptr[row + 1]):
+            id_neur = weights_ids[idx_w]
+            if t_refractory_ends[id_neur] <= t_event:
+                weight = weights_vals[idx_w]
+                # - Resting potential: Sign of leak so that it drives neuron states to v_rest
+                if use_v_rest and channel == leak_channel:
+                    if state[id_neur] < v_rest[id_neur]:
+                        weight = -weight
+                    elif state[id_neur] == v_rest[id_neur]:
+                        weight = 0.0
+                state[id_neur] = min(max(state[id_neur] + weight, min_state), max_state)
+                if state[id_neur] >= v_thresh[id_neur]:
+                    spiking[num_spiking] = id_neur
+                    idx_last_spike[id_neur] = idx_event
+                    num_spiking += 1
+
+        # - Neurons above threshold whose refractory periods have ended
+        for idx_pending in range(num_pending):
+            id_neur = pending[idx_pending]
+            if (
+                idx_last_spike[id_neur] != idx_event
+                and t_refractory_ends[id_neur] <= t_event
+                and state[id_neur] >= v_thresh[id_neur]
+            ):
+                spiking[num_spiking] = id_neur
+                idx_last_spike[id_neur] = idx_event
+                num_spiking += 1
+        spiking[:num_spiking] = np.sort(spiking[:num_spiking])
+
+        if monitor_id.size > 0:
+            # - Record state after update but before subtraction/resetting
+            rec_times, rec_states, rec_channels, num_rec = _record_monitor(
+                rec_times,
+                rec_states,
+                rec_channels,
+                num_rec,
+                t_event,
+                state,
+                monitor_id,
+                np.nan,
+            )
+
+        for idx_spiking in range(num_spiking):
+            id_neur = spiking[idx_spiking]
+            if subtract:
+                # - Subtract from state
+                state[id_neur] = min(
+                    max(state[id_neur] - v_subtract[id_neur], min_state), max_state
+                )
+                if state[id_neur] >= v_thresh[id_neur]:
+                    # - Neuron can spike again after its refractory period
+                    heap_times, heap_channels, heap_size = _heap_push(
+                        heap_times,
+                        heap_channels,
+                        heap_size,
+                        refractory[id_neur] + t_event + tol_abs,
+                        -1,
+                    )
+            else:
+                # - Set state to reset potential
+                state[id_neur] = v_reset[id_neur]
+
+            # - Time when refractory period will end
+            t_refractory_ends[id_neur] = t_event + refractory[id_neur]
+
+            # - Record spike
+            if num_spikes == spike_times.size:
+                spike_times = np.concatenate((spike_times, np.empty(spike_times.size)))
+                spike_ids = np.concatenate(
+                    (spike_ids, np.empty(spike_ids.size, np.int64))
+                )
+            spike_times[num_spikes] = t_event
+            spike_ids[num_spikes] = id_neur
+            num_spikes += 1
+
+            # - Delay spike. Set ID off by size_in in order to distinguish it from input
+            heap_times, heap_channels, heap_size = _heap_push(
+                heap_times, heap_channels, heap_size, t_event + delay, id_neur + size_in
+            )
+
+        if monitor_id.size > 0:
+            # - Record state after subtraction/resetting
+            rec_times, rec_states, rec_channels, num_rec = _record_monitor(
+                rec_times,
+                rec_states,
+                rec_channels,
+                num_rec,
+                t_event,
+                state,
+                monitor_id,
+                np.nan,
+            )
+
+        # - Update neurons above threshold. Spiking neurons are among the targets or pending
+        num_pending_new = 0
+        for idx_pending in range(num_pending):
+            id_neur = pending[idx_pending]
+            if state[id_neur] >= v_thresh[id_neur]:
+                pending[num_pending_new] = id_neur
+                num_pending_new += 1
+            else:
+                is_pending[id_neur] = False
+        num_pending = num_pending_new
+        for idx_w in range(weights_ptr[row], weights_ptr[row + 1]):
+            id_neur = weights_ids[idx_w]
+            if not is_pending[id_neur] and state[id_neur] >= v_thresh[id_neur]:
+                pending[num_pending] = id_neur
+                is_pending[id_neur] = True
+                num_pending += 1
+
+        idx_event += 1
+
+    return (
+        spike_times[:num_spikes],
+        spike_ids[:num_spikes],
+        heap_times,
+        heap_channels,
+        heap_size,
+        rec_times[:num_rec],
+        rec_states[:num_rec],
+        rec_channels[:num_rec],
+    )
+
+
 # - RecDIAF - Class: define a spiking recurrent layer based on digital IAF neurons
 
 
@@ -57,6 +413,7 @@ class RecDIAF(Layer):
         state_type: Union[type, str] = "int8",
         monitor_id: Optional[Union[bool, int, ArrayLike]] = [],
         name: str = "unnamed",
+        use_numba: bool = True,
     ):
         """
         Construct a spiking recurrent layer with digital IAF neurons
@@ -75,6 +432,7 @@ class RecDIAF(Layer):
         :param Union[type, str] state_type:                 Data type for the membrane potential. Default: ``"int8"``
         :param Optional[ArrayLike] monitor_id:      IDs of neurons to be recorded. Default: ``[]``
         :param str name:                  Name for the layer. Default: ``'unnamed'``
+        :param bool use_numba:            If ``True``, evolve with a compiled event-driven engine that only updates the targets of each event. Otherwise use the heap-based reference implementation in python. Default: ``True``
         """
 
         # - Call super constructor
@@ -110,6 +468,8 @@ class RecDIAF(Layer):
         self.state_type = state_type
         # - Record states of these neurons
         self.monitor_id = monitor_id
+        # - Choose evolution engine
+        self.use_numba = use_numba
 
         self.reset_state()
 
@@ -176,6 +536,142 @@ class RecDIAF(Layer):
         event_channels = np.r_[event_channels, np.ones_like(leak) * self._leak_channel]
         event_times = np.r_[event_times, leak]
 
+        if self.use_numba:
+            spike_times, spike_ids, record = self._evolve_numba(
+                event_times, event_channels, t_final
+            )
+        else:
+            spike_times, spike_ids, record = self._evolve_heap(
+                event_times, event_channels, t_final, duration, verbose
+            )
+
+        # - Start and stop times for output time series
+        t_start = self._timestep * self.dt
+        t_stop = (self._timestep + num_timesteps) * self.dt
+
+        # - Update time
+        self._timestep += num_timesteps
+
+        if record is not None:
+            # - Store evolution of states
+            self.ts_recorded = TSContinuous(*record)
+
+        # - Output time series
+        return TSEvent(
+            np.clip(spike_times, t_start, t_stop),
+            spike_ids,
+            num_channels=self.size,
+            t_start=t_start,
+            t_stop=t_stop,
+        )
+
+    def _evolve_numba(
+        self, event_times: np.ndarray, event_channels: np.ndarray, t_final: float
+    ) -> (np.ndarray, np.ndarray, Optional[Tuple[np.ndarray, np.ndarray]]):
+        """
+        Evolve the state of this layer with the compiled event-driven engine
+
+        :param np.ndarray event_times:      Times of input and leak events
+        :param np.ndarray event_channels:   Channels of input and leak events
+        :param float t_final:               End time of evolution
+
+        :return (spike_times, spike_ids, record):
+            spike_times:    (np.ndarray) Output spike times
+            spike_ids:      (np.ndarray) Output spike channels
+            record:         (Optional[Tuple]) Times and samples of recorded states, or ``None`` if no neurons are monitored
+        """
+        # - Include spikes from previous evolution that might fall into this time interval.
+        #   Events sorted by time and channel form a valid heap.
+        heap_times = np.r_[
+            [t for t, _ in self.heap_remaining_spikes], event_times
+        ].astype(float)
+        heap_channels = np.r_[
+            [c for _, c in self.heap_remaining_spikes], event_channels
+        ].astype(np.int64)
+        order = np.lexsort((heap_channels, heap_times))
+        heap_times = heap_times[order]
+        heap_channels = heap_channels[order]
+
+        # - Sparse representation of weights, for fan-out of each event
+        weights_total = csr_matrix(self._weights_total)
+        monitor_id = self._id_monitor.astype(np.int64)
+
+        # - Evolve
+        state = self.state.copy()
+        (
+            spike_times,
+            spike_ids,
+            heap_times,
+            heap_channels,
+            heap_size,
+            rec_times,
+            rec_states,
+            rec_channels,
+        ) = _evolve_recdiaf(
+            state,
+            heap_times,
+            heap_channels,
+            heap_times.size,
+            self.t,
+            t_final,
+            weights_total.indptr.astype(np.int64),
+            weights_total.indices.astype(np.int64),
+            weights_total.data.astype(float),
+            self._leak_channel,
+            self.size_in,
+            self.v_thresh.astype(float),
+            self.v_reset.astype(float),
+            np.zeros(self.size) if self.v_rest is None else self.v_rest.astype(float),
+            self.v_rest is not None,
+            np.zeros(self.size)
+            if self.v_subtract is None
+            else self.v_subtract.astype(float),
+            self.v_subtract is not None,
+            self.refractory.astype(float),
+            float(self.delay),
+            float(self._min_state),
+            float(self._max_state),
+            monitor_id,
+        )
+
+        # - Update state variable
+        self._state = state
+
+        # - Store remaining spikes (happening after t_final) for next call of evolution
+        self.heap_remaining_spikes = list(
+            zip(heap_times[:heap_size].tolist(), heap_channels[:heap_size].tolist())
+        )
+
+        if monitor_id.size > 0:
+            record = (rec_times, np.hstack((rec_states, rec_channels.reshape(-1, 1))))
+        else:
+            record = None
+
+        return spike_times, spike_ids, record
+
+    def _evolve_heap(
+        self,
+        event_times: np.ndarray,
+        event_channels: np.ndarray,
+        t_final: float,
+        duration: Optional[float] = None,
+        verbose: bool = False,
+    ) -> (np.ndarray, np.ndarray, Optional[Tuple[np.ndarray, np.ndarray]]):
+        """
+        Evolve the state of this layer with a heap of events. Reference implementation in python
+
+        :param np.ndarray event_times:      Times of input and leak events
+        :param np.ndarray event_channels:   Channels of input and leak events
+        :param float t_final:               End time of evolution
+        :param Optional[float] duration:    Evolution duration, for progress display
+        :param bool verbose:                If ``True``, print progress
+
+        :return (spike_times, spike_ids, record):
+            spike_times:    (np.ndarray) Output spike times
+            spike_ids:      (np.ndarray) Output spike channels
+            record:         (Optional[Tuple]) Times and samples of recorded states, or ``None`` if no neurons are monitored
+        """
+
         # - Push spike timings and IDs to a heap, ordered by spike time
         # - Include spikes from previous evolution that might fall into this time interval
         heap_spikes = self.heap_remaining_spikes + list(
@@ -218,8 +714,11 @@ class RecDIAF(Layer):
             times = [t_time]
             channels = [np.nan]
 
-        while t_time <= t_final:
+        while True:
             try:
+                # - Stop before events after t_final. They remain on the heap
+                if heap_spikes[0][0] > t_final + tol_abs:
+                    break
                 # - Iterate over spikes in temporal order
                 t_time, channel = heapq.heappop(heap_spikes)
                 # print(i, t_time, channel, "                       ", end="\r")
@@ -327,26 +826,13 @@ class RecDIAF(Layer):
         # - Store remaining spikes (happening after t_final) for next call of evolution
         self.heap_remaining_spikes = heap_spikes
 
-        # - Start and stop times for output time series
-        t_start = self._timestep * self.dt
-        t_stop = (self._timestep + num_timesteps) * self.dt
-
-        # - Update time
-        self._timestep += num_timesteps
-
         if monitor_id is not None:
             # - Store evolution of states in lists
-            states = np.hstack((states, np.reshape(channels, (-1, 1))))
-            self.ts_recorded = TSContinuous(times, states)
+            record = (times, np.hstack((states, np.reshape(channels, (-1, 1)))))
+        else:
+            record = None
 
-        # - Output time series
-        return TSEvent(
-            np.clip(spike_times, t_start, t_stop),
-            spike_ids,
-            num_channels=self.size,
-            t_start=t_start,
-            t_stop=t_stop,
-        )
+        return spike_times, spike_ids, record
 
     def _prepare_input(
         self,
@@ -450,6 +936,7 @@ class RecDIAF(Layer):
         config["v_rest"] = self.v_rest.tolist()
         config["state_type"] = self.state_type
         config["monitor_id"] = self.monitor_id.tolist()
+        config["use_numba"] = self.use_numba
         return config
 
     ### --- Properties
@@ -11,7 +11,7 @@ FloatVector = Union[float, np.ndarray]
 
 
 from ...timeseries import TSContinuous, TSEvent
-from ...utilities import SetterArray, ImmutableArray
+from ...utilities import SetterArray, ImmutableArray, SharedArrayBuffer
 from ..layer import Layer
 
 if util.find_spec("nest") is None:
@@ -42,6 +42,9 @@ COMMAND_RESET = 2
 COMMAND_EVOLVE = 3
 COMMAND_EXEC = 4
 
+# - Initial size of shared memory buffers for evolution input and output, in bytes
+SHARED_BUFFER_CAPACITY = 2 ** 22
+
 
 class _BaseNestProcess(multiprocessing.Process):
     """Base Class for running NEST in its own process """
@@ -80,6 +83,10 @@ class _BaseNestProcess(multiprocessing.Process):
         self.num_cores = num_cores
         self.model = model
 
+        # - Shared memory buffers for evolution input and output
+        self.buffer_in = SharedArrayBuffer()
+        self.buffer_out = SharedArrayBuffer()
+
     ######### DEFINE IPC COMMANDS ######
 
     def nest_exec(self, command):
@@ -188,6 +195,23 @@ class _BaseNestProcess(multiprocessing.Process):
         """
         return self.evolve_nest(num_timesteps)
 
+    def evolve_shared(
+        self, name_out: Optional[str], inputs: Tuple, num_timesteps: int
+    ) -> Tuple:
+        """
+        evolve_shared - IPC command for evolving. Input arrays are read from shared memory, and
+                        results are written to the shared result buffer of the layer, so that
+                        only small messages are sent through the queues.
+        :param name_out:       Name of the shared memory block for the results
+        :param inputs:         Message with the arguments to `self.evolve`, from `SharedArrayBuffer.put`
+        :param num_timesteps:  Number of timesteps over which to evolve.
+        :return:
+            Message with event times, event channels and recorded states, from `SharedArrayBuffer.put`
+        """
+        self.buffer_out.attach(name_out)
+        results = self.evolve(*self.buffer_in.get(inputs), num_timesteps)
+        return self.buffer_out.put(*results)
+
     def read_weights(self, pop_pre: Tuple[int], pop_post: Tuple[int]):
         # - Read out connections and convert to array
         connections = self.nest_module.GetConnections(pop_pre, pop_post)
@@ -417,7 +441,7 @@ class _BaseNestProcess(multiprocessing.Process):
             COMMAND_GET: self.get_param,
             COMMAND_SET: self.set_param,
             COMMAND_RESET: self.reset,
-            COMMAND_EVOLVE: self.evolve,
+            COMMAND_EVOLVE: self.evolve_shared,
             COMMAND_EXEC: self.nest_exec,
         }
 
@@ -799,6 +823,10 @@ class FFIAFNest(Layer):
         self._num_cores = num_cores
         self.request_q = multiprocessing.Queue()
         self.result_q = multiprocessing.Queue()
+        # - Shared memory buffers for evolution input and output
+        self._buffer_in = SharedArrayBuffer(SHARED_BUFFER_CAPACITY)
+        self._buffer_out = SharedArrayBuffer(SHARED_BUFFER_CAPACITY)
+        self._num_bytes_events = 0
 
         # - Start a process for running nest
         self._setup_nest()
@@ -861,24 +889,47 @@ class FFIAFNest(Layer):
 
     # --- State evolution
 
+    def _request_evolution(self, inputs: Tuple[np.ndarray, ...], num_timesteps: int):
+        """
+        Internal method for sending evolution inputs to the nest process. Arrays are passed through shared memory, so that only a small message is sent through the request queue.
+        :param Tuple[np.ndarray, ...] inputs:  Input arrays for the `evolve` method of the nest process
+        :param int num_timesteps:  Evolution duration in timesteps
+        """
+        self._buffer_in.reserve(sum(np.asarray(inp).nbytes for inp in inputs))
+
+        # - Make room for recorded states and, judging from the last evolution, events
+        num_bytes_states = 8 * self.size * (num_timesteps + 1) if self.record else 0
+        self._buffer_out.reserve(num_bytes_states + 2 * self._num_bytes_events)
+
+        self.request_q.put(
+            [
+                COMMAND_EVOLVE,
+                self._buffer_out.name,
+                self._buffer_in.put(*inputs),
+                num_timesteps,
+            ]
+        )
+
     def _process_evolution_output(self, num_timesteps: int) -> TSEvent:
         """
         Internal method for processing recorded event data and neuron states after evolution into `.TSEvent` objects.
         :param int num_timesteps:  Evolution duration in timesteps
         :return `.TSEvent`: `.TSEvent` with the recorded events
         """
+        (
+            event_time_out,
+            event_channel_out,
+            recorded_states_array,
+        ) = self._buffer_out.get(self.result_q.get())
+        self._num_bytes_events = event_time_out.nbytes + event_channel_out.nbytes
+
         if self.record:
-            event_time_out, event_channel_out, recorded_states_array = (
-                self.result_q.get()
-            )
             self.recorded_states = TSContinuous(
                 (np.arange(recorded_states_array.shape[1]) + self._timestep) * self.dt,
                 recorded_states_array.T,
                 t_start=self.t,
                 name=f"{self.name} - recorded states",
             )
-        else:
-            event_time_out, event_channel_out, _ = self.result_q.get()
 
         # - Start and stop times for output time series
         t_start = self.t
@@ -896,6 +947,14 @@ class FFIAFNest(Layer):
             t_stop=t_stop,
         )
 
+    def warmup(self, num_timesteps: int = 1):
+        """
+        NEST layers are simulated in a separate process and are not compiled, so there is nothing to warm up
+
+        :param int num_timesteps:   Has no effect
+        """
+        pass
+
     def evolve(
         self,
         ts_input: Optional[TSContinuous] = None,
@@ -925,7 +984,7 @@ class FFIAFNest(Layer):
             ts_input, duration, num_timesteps
         )
 
-        self.request_q.put([COMMAND_EVOLVE, time_base, input_steps, num_timesteps])
+        self._request_evolution((time_base, input_steps), num_timesteps)
 
         return self._process_evolution_output(num_timesteps)
 
@@ -939,6 +998,8 @@ class FFIAFNest(Layer):
         self.result_q.cancel_join_thread()
         self._nest_process.terminate()
         self._nest_process.join()
+        self._buffer_in.close()
+        self._buffer_out.close()
 
     def to_dict(self) -> dict:
         """
@@ -1348,7 +1409,7 @@ class RecIAFSpkInNest(FFIAFNest):
             event_times = np.array([])
             event_channels = np.array([])
 
-        self.request_q.put([COMMAND_EVOLVE, event_times, event_channels, num_timesteps])
+        self._request_evolution((event_times, event_channels), num_timesteps)
 
         return self._process_evolution_output(num_timesteps)
 
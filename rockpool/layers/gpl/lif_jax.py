@@ -5,15 +5,17 @@
 # - Imports
 from ..layer import Layer
 from ...timeseries import TSContinuous, TSEvent
+from ...utilities import BucketSpec, pad_to_bucket, get_kernel
 
 from jax import numpy as np
 import numpy as onp
 
-from jax import jit, custom_gradient
+from jax import jit, vmap, custom_gradient, checkpoint
 from jax.lax import scan
 import jax.random as rand
 
-from typing import Optional, Tuple, Union, Dict, Callable
+from functools import partial
+from typing import Optional, Tuple, Union, Dict, Callable, List, Any
 
 # - Define a float / array type
 FloatVector = Union[float, np.ndarray]
@@ -27,6 +29,44 @@ LayerState = Dict[
 __all__ = ["RecLIFJax", "RecLIFCurrentInJax", "RecLIFJax_IO"]
 
 
+def _scan_checkpointed(
+    f: Callable, carry: Any, xs: Tuple[np.ndarray, ...], segment_length: int
+) -> Tuple[Any, Tuple[np.ndarray, ...]]:
+    """
+    Scan a function over its inputs in segments, which are rematerialised when differentiating
+
+    Only the carry at the start of each segment is stored for the backward pass; all values within a segment are recomputed. Memory for differentiation then grows with ``T / segment_length + segment_length`` instead of ``T``. Inputs are zero-padded to a multiple of ``segment_length``; ``f`` must leave the carry unchanged on padded time steps, e.g. by using a boolean mask of valid time steps as one of the inputs.
+
+    :param Callable f:              Scan body ``f(carry, x_t) -> (carry, y_t)``, where ``y_t`` is a tuple of arrays
+    :param Any carry:               Initial carry
+    :param Tuple xs:                Tuple of input arrays with time as first axis [T, ...]
+    :param int segment_length:      Number of time steps per segment
+
+    :return (Any, Tuple): (carry, ys)
+        carry:  Carry at the end of the scan
+        ys:     Tuple of stacked outputs [T, ...]
+    """
+    num_timesteps = xs[0].shape[0]
+    num_segments = -(-num_timesteps // segment_length)
+    num_padded = num_segments * segment_length
+
+    def to_segments(x: np.ndarray) -> np.ndarray:
+        x = np.pad(x, [(0, num_padded - num_timesteps)] + [(0, 0)] * (x.ndim - 1))
+        return x.reshape((num_segments, segment_length) + x.shape[1:])
+
+    @checkpoint
+    def scan_segment(carry: Any, xs_segment: Tuple[np.ndarray, ...]):
+        return scan(f, carry, xs_segment)
+
+    carry, ys = scan(scan_segment, carry, tuple(to_segments(x) for x in xs))
+
+    # - Concatenate segments and remove padding
+    return (
+        carry,
+        tuple(y.reshape((num_padded,) + y.shape[2:])[:num_timesteps] for y in ys),
+    )
+
+
 def _evolve_lif_jax(
     state0: LayerState,
     w_in: np.ndarray,
@@ -40,6 +80,8 @@ def _evolve_lif_jax(
     I_input_ts: np.ndarray,
     key: int,
     dt: float,
+    valid_ts: Optional[np.ndarray] = None,
+    checkpoint_segment: Optional[int] = None,
 ) -> (
     LayerState,
     np.ndarray,
@@ -98,6 +140,8 @@ def _evolve_lif_jax(
     :param np.ndarray I_input_ts:       Time trace of currents injected on input channels (direct current injection) [T, I]
     :param int key:                     pRNG key for JAX
     :param float dt:                    Time step in seconds
+    :param Optional[np.ndarray] valid_ts:   Boolean mask of valid time steps [T,]. The state is not updated on invalid (padding) time steps. Default: ``None``, all time steps are valid
+    :param Optional[int] checkpoint_segment:    If provided, the evolution is split into segments of this many time steps, which are rematerialised when differentiating. Only the states at segment boundaries are then stored for the backward pass, trading computation for memory. Must be a static value. Default: ``None``, store all intermediate values
 
     :return: (state, Irec_ts, output_ts, surrogate_ts, spikes_ts, Vmem_ts, Isyn_ts)
         state:          (LayerState) Layer state at end of evolution
@@ -152,7 +196,7 @@ def _evolve_lif_jax(
         Single-step LIF dynamics for a recurrent LIF layer
 
         :param LayerState state:
-        :param Tuple[np.ndarray, np.ndarray] inputs_t: (spike_inputs_ts, current_inputs_ts)
+        :param Tuple[np.ndarray, np.ndarray, np.ndarray] inputs_t: (spike_inputs_ts, current_inputs_ts, valid_ts)
 
         :return: (state, Irec_ts, output_ts, surrogate_ts, spikes_ts, Vmem_ts, Isyn_ts)
             state:          (LayerState) Layer state at end of evolution
@@ -164,9 +208,10 @@ def _evolve_lif_jax(
             Isyn_ts:        (np.ndarray) Synaptic input current received by each neuron over time [T, N]
         """
         # - Unpack inputs
-        (sp_in_t, I_in_t) = inputs_t
+        (sp_in_t, I_in_t, valid_t) = inputs_t
         sp_in_t = sp_in_t.reshape(-1)
         Iin = I_in_t.reshape(-1)
+        state_prev = dict(state)
 
         # - Synaptic input
         Irec = np.dot(state["spikes"], w_rec)
@@ -183,6 +228,9 @@ def _evolve_lif_jax(
         # - Detect next spikes (with custom gradient)
         state["spikes"] = step_pwl(state["Vmem"])
 
+        # - Keep previous state on invalid time steps
+        state = {k: np.where(valid_t, v, state_prev[k]) for k, v in state.items()}
+
         # - Return state and outputs
         return state, (Irec, state["spikes"], state["Vmem"], state["Isyn"])
 
@@ -190,17 +238,21 @@ def _evolve_lif_jax(
     # - Build noise trace
     # - Compute random numbers for reservoir noise
     num_timesteps = sp_input_ts.shape[0]
+    if valid_ts is None:
+        valid_ts = np.ones(num_timesteps, dtype=bool)
     _, subkey = rand.split(key)
     noise_ts = noise_std * rand.normal(
         subkey, shape=(num_timesteps, np.size(state0["Vmem"]))
     )
 
     # - Evolve over spiking inputs
-    state, (Irec_ts, spikes_ts, Vmem_ts, Isyn_ts) = scan(
-        forward,
-        state0,
-        (np.dot(sp_input_ts, w_in), np.dot(I_input_ts, w_in) + noise_ts),
-    )
+    inputs = (np.dot(sp_input_ts, w_in), np.dot(I_input_ts, w_in) + noise_ts, valid_ts)
+    if checkpoint_segment is None:
+        state, (Irec_ts, spikes_ts, Vmem_ts, Isyn_ts) = scan(forward, state0, inputs)
+    else:
+        state, (Irec_ts, spikes_ts, Vmem_ts, Isyn_ts) = _scan_checkpointed(
+            forward, state0, inputs, checkpoint_segment
+        )
 
     # - Generate output surrogate
     surrogate_ts = sigmoid(Vmem_ts * 10)
@@ -273,6 +325,7 @@ class RecLIFJax(Layer):
         dt: Optional[float] = None,
         name: Optional[str] = None,
         rng_key: Optional[int] = None,
+        time_buckets: BucketSpec = None,
     ):
         """
         A basic recurrent spiking neuron layer, with a JAX-implemented forward Euler solver.
@@ -285,6 +338,7 @@ class RecLIFJax(Layer):
         :param Optional[float] dt:                      Forward Euler solver time step. Default: min(tau_mem, tau_syn) / 10
         :param Optional[str] name:                      Name of this layer. Default: `None`
         :param Optional[int] rng_key:                   JAX pRNG key. Default: generate a new key
+        :param BucketSpec time_buckets:                 Pad inputs to a small set of lengths, so that compiled evolution functions are reused for inputs of different durations. ``"pow2"``: pad to powers of two, or a list of lengths. See :py:func:`~rockpool.utilities.bucket_length`. The bucket length used by the latest evolution is stored in `.bucket_last_evolution`. Default: ``None``, do not pad
         """
         # - Ensure that weights are 2D
         w_recurrent = np.atleast_2d(w_recurrent)
@@ -308,8 +362,21 @@ class RecLIFJax(Layer):
         self._w_in = 1
         self._w_out = 1
 
-        # - Get compiled evolution function
-        self._evolve_jit = jit(_evolve_lif_jax)
+        # - Bucketing of input lengths
+        self.time_buckets = time_buckets
+        self.bucket_last_evolution = None
+
+        # - Get compiled evolution function without checkpointing. It is shared by all
+        #   LIF layers with the same `checkpoint_segment`
+        self.checkpoint_segment = None
+
+        # - Get compiled batched evolution function, mapping over inputs and RNG keys
+        in_axes = (None, None, None, None, None, None, None, None, 0, 0, 0, None, None)
+        self._evolve_batch_jit = get_kernel(
+            "lif_jax.evolve_batch",
+            _evolve_lif_jax,
+            lambda: jit(vmap(_evolve_lif_jax, in_axes=in_axes)),
+        )
 
         # - Reset layer state
         self.reset_all()
@@ -357,6 +424,30 @@ class RecLIFJax(Layer):
         """(TSContinuous) Recurrent synaptic input current traces saved during the most recent evolution"""
         return self._i_rec_last_evolution
 
+    @property
+    def checkpoint_segment(self) -> Optional[int]:
+        """
+        (Optional[int]) Number of time steps per segment, in which the evolution is rematerialised when differentiating. Reduces memory for training on long trials at the cost of recomputation. ``None``: Store all intermediate values for differentiation
+        """
+        return self._checkpoint_segment
+
+    @checkpoint_segment.setter
+    def checkpoint_segment(self, new_segment: Optional[int]):
+        if new_segment is not None:
+            new_segment = int(new_segment)
+            if new_segment < 1:
+                raise ValueError(
+                    f"Layer `{self.name}`: `checkpoint_segment` must be a positive integer or `None`."
+                )
+        self._checkpoint_segment = new_segment
+
+        # - Get compiled evolution function for this segment length
+        self._evolve_jit = get_kernel(
+            "lif_jax.evolve",
+            new_segment,
+            lambda: jit(partial(_evolve_lif_jax, checkpoint_segment=new_segment)),
+        )
+
     def reset_state(self):
         """
         Reset the membrane potentials, synaptic currents and refractory state for this layer
@@ -463,6 +554,86 @@ class RecLIFJax(Layer):
         # - Wrap spiking outputs as time series
         return self._spikes_last_evolution
 
+    def evolve_batch(
+        self,
+        inputs: Union[onp.ndarray, List[Union[TSEvent, TSContinuous]]],
+        duration: Optional[float] = None,
+        num_timesteps: Optional[int] = None,
+        verbose: bool = False,
+    ) -> List[Union[TSEvent, TSContinuous]]:
+        """
+        Evolve a batch of independent trials with a single vectorised call
+
+        Each trial starts from the current state and time of this layer, and uses its own noise. The state and time of the layer are not modified, and the `..._last_evolution` attributes are not updated.
+
+        :param Union[ndarray, List[TimeSeries]] inputs: Either a ``[B, T, I]`` array of input samples (spike counts or currents, depending on `.input_type`) on the evolution time base, or a list of ``B`` input time series
+        :param Optional[float] duration:        Simulation/Evolution time of each trial, in seconds. If not provided, then `num_timesteps` or the duration of the input is used to determine evolution time
+        :param Optional[int] num_timesteps:     Number of evolution time steps of each trial, in units of `.dt`. If not provided, then `duration` or the duration of the input is used to determine evolution time
+        :param bool verbose:           Currently no effect, just for conformity
+
+        :return List[TimeSeries]:               Output time series of each trial, of class `.output_type`
+        """
+
+        # - Prepare time base and inputs of all trials
+        time_base, inps, num_timesteps = self._prepare_input_batch(
+            inputs, duration, num_timesteps
+        )
+        # - Pad inputs to bucket length, to reuse compiled evolution functions
+        inps, valid_ts, self.bucket_last_evolution = pad_to_bucket(
+            inps, self.time_buckets, axis=1
+        )
+        inps = np.array(inps)
+
+        # - Spiking or current input, depending on layer class
+        if issubclass(self.input_type, TSEvent):
+            sp_input_ts, I_input_ts = inps, inps * 0.0
+        else:
+            sp_input_ts, I_input_ts = inps * 0.0, inps
+
+        # - Call compiled Euler solver, mapped over trials
+        _, _, output_ts, _, spike_raster_ts, _, _ = self._evolve_batch_jit(
+            self._state,
+            self._w_in,
+            self._weights,
+            self._w_out,
+            self._tau_mem,
+            self._tau_syn,
+            self._bias,
+            self._noise_std,
+            sp_input_ts,
+            I_input_ts,
+            rand.split(self._rng_key, inps.shape[0]),
+            self._dt,
+            valid_ts,
+        )
+
+        # - Remove padding
+        output_ts = output_ts[:, : num_timesteps + 1]
+        spike_raster_ts = spike_raster_ts[:, : num_timesteps + 1]
+
+        if issubclass(self.output_type, TSContinuous):
+            # - Wrap weighted outputs as time series
+            return [
+                TSContinuous(time_base, output, name="$O$ " + self.name)
+                for output in onp.array(output_ts)
+            ]
+
+        # - Wrap spiking outputs as time series
+        outputs = []
+        for spike_raster in onp.array(spike_raster_ts):
+            spikes_ids = onp.argwhere(spike_raster)
+            outputs.append(
+                TSEvent(
+                    spikes_ids[:, 0] * self.dt + time_base[0],
+                    spikes_ids[:, 1],
+                    t_start=time_base[0],
+                    t_stop=time_base[-1],
+                    name="Spikes " + self.name,
+                    num_channels=self.size,
+                )
+            )
+        return outputs
+
     def _evolve_raw(
         self, sp_input_ts: np.ndarray, I_input_ts: np.ndarray
     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
@@ -480,6 +651,13 @@ class RecLIFJax(Layer):
                 Vmem_ts:         (np.ndarray) Time trace of neuron membrane potentials [T, N]
                 Isyn_ts:         (np.ndarray) Time trace of output synaptic currents [T, N]
         """
+        # - Pad inputs to bucket length, to reuse compiled evolution functions
+        num_timesteps = sp_input_ts.shape[0]
+        sp_input_ts, valid_ts, self.bucket_last_evolution = pad_to_bucket(
+            sp_input_ts, self.time_buckets
+        )
+        I_input_ts, _, _ = pad_to_bucket(I_input_ts, self.time_buckets)
+
         # - Call compiled Euler solver to evolve reservoir
         self._state, Irec_ts, output_ts, surrogate_ts, spike_raster_ts, Vmem_ts, Isyn_ts = self._evolve_jit(
             self._state,
@@ -494,13 +672,21 @@ class RecLIFJax(Layer):
             I_input_ts,
             self._rng_key,
             self._dt,
+            valid_ts,
         )
 
         # - Increment timesteps attribute
-        self._timestep += sp_input_ts.shape[0] - 1
-
-        # - Return layer activity
-        return Irec_ts, output_ts, surrogate_ts, spike_raster_ts, Vmem_ts, Isyn_ts
+        self._timestep += num_timesteps - 1
+
+        # - Return layer activity, without padding
+        return (
+            Irec_ts[:num_timesteps],
+            output_ts[:num_timesteps],
+            surrogate_ts[:num_timesteps],
+            spike_raster_ts[:num_timesteps],
+            Vmem_ts[:num_timesteps],
+            Isyn_ts[:num_timesteps],
+        )
 
     def randomize_state(self):
         """
@@ -527,6 +713,11 @@ class RecLIFJax(Layer):
         config["tau_syn"] = self.tau_syn.tolist()
         config["bias"] = self.bias.tolist()
         config["rng_key"] = self._rng_key.tolist()
+        config["time_buckets"] = (
+            self.time_buckets
+            if self.time_buckets is None or isinstance(self.time_buckets, str)
+            else onp.asarray(self.time_buckets).tolist()
+        )
         return config
 
     @property
@@ -834,6 +1025,7 @@ class RecLIFJax_IO(RecLIFJax):
         dt: Optional[float] = None,
         name: Optional[str] = None,
         rng_key: Optional[int] = None,
+        time_buckets: BucketSpec = None,
     ):
         """
         Build a spiking recurrent layer with weighted spiking inputs and weighted surrogate outputs, and a JAX backend.
@@ -848,6 +1040,7 @@ class RecLIFJax_IO(RecLIFJax):
         :param Optional[float] dt:      Time step for simulation, in s. Default: ``None``, will be determined automatically from ``tau_...``
         :param Optional[str] name:      Name of this layer. Default: ``None``
         :param Optional[int] rng_key:   JAX pRNG key. Default: Generate a new key
+        :param BucketSpec time_buckets: Pad inputs to a small set of lengths, to reuse compiled evolution functions. See :py:class:`.RecLIFJax`. Default: ``None``, do not pad
         """
         # - Convert arguments to arrays
         w_in = np.array(w_in)
@@ -863,6 +1056,7 @@ class RecLIFJax_IO(RecLIFJax):
             dt=dt,
             name=name,
             rng_key=rng_key,
+            time_buckets=time_buckets,
         )
 
         # - Set correct information about network size
@@ -1159,6 +1353,7 @@ class FFLIFJax_IO(RecLIFJax_IO):
         dt: Optional[float] = None,
         name: Optional[str] = None,
         rng_key: Optional[int] = None,
+        time_buckets: BucketSpec = None,
     ):
         """
         Create a feedforward spiking LIF layer, with a JAX-accelerated backend.
@@ -1172,6 +1367,7 @@ class FFLIFJax_IO(RecLIFJax_IO):
         :param float dt:                Euler solver time-step. Must be at least 10 times smaller than the smallest time constant, for numerical stability
         :param Optional[str] name:      A string to use as the name of this layer
         :param Optional[int] rng_key:   A JAX RNG key, used internally when generating noise and randomness. If not provided, a new RNG key will be generated.
+        :param BucketSpec time_buckets: Pad inputs to a small set of lengths, to reuse compiled evolution functions. See :py:class:`.RecLIFJax`. Default: ``None``, do not pad
         """
         # - Determine network shape
         w_in = np.atleast_2d(w_in)
@@ -1190,6 +1386,7 @@ class FFLIFJax_IO(RecLIFJax_IO):
             dt=dt,
             name=name,
             rng_key=rng_key,
+            time_buckets=time_buckets,
         )
 
         # - Set recurrent weights to zero
@@ -120,7 +120,7 @@ class FFExpSynTorch(FFExpSyn):
 
         # - Prepare input signal
         inp_raster, num_timesteps = self._prepare_input(
-            ts_input, duration, num_timesteps
+            ts_input, duration, num_timesteps, sparse=True
         )
         weighted_input = inp_raster @ self.weights
 
@@ -24,6 +24,95 @@ tol_abs = 1e-9
 MAX_NUM_TIMESTEPS_DEFAULT = 400
 
 
+@torch.jit.script
+def _evolve_iaf_torch(
+    neural_input: torch.Tensor,
+    state: torch.Tensor,
+    alpha: torch.Tensor,
+    v_thresh: torch.Tensor,
+    v_reset: torch.Tensor,
+    matr_is_spiking: torch.Tensor,
+    num_timesteps: int,
+    record_states: Optional[torch.Tensor] = None,
+    nums_refr_ctdwn_steps: Optional[torch.Tensor] = None,
+    num_refractory_steps: int = 0,
+    kernels_rec: Optional[torch.Tensor] = None,
+    weights_rec: Optional[torch.Tensor] = None,
+    v_leak: Optional[torch.Tensor] = None,
+    v_rest: Optional[torch.Tensor] = None,
+    state_min: Optional[torch.Tensor] = None,
+) -> torch.Tensor:
+    """
+    Scripted time loop for the torch IAF layers
+
+    All tensors are updated in place: ``state``, ``matr_is_spiking`` and, if provided, ``record_states`` and ``nums_refr_ctdwn_steps``. For recurrent layers, filtered recurrent spikes are added to ``neural_input``.
+
+    :param torch.Tensor neural_input:                   Input to neurons [T(+1), N]. Includes resting potential and bias, unless ``v_leak`` is given
+    :param torch.Tensor state:                          Neuron states [N,]
+    :param torch.Tensor alpha:                          ``dt / tau_mem`` [N,]
+    :param torch.Tensor v_thresh:                       Firing thresholds [N,]
+    :param torch.Tensor v_reset:                        Reset potentials [N,]
+    :param torch.Tensor matr_is_spiking:                Preallocated spike raster [T, N]
+    :param int num_timesteps:                           Number of time steps
+    :param Optional[torch.Tensor] record_states:        Preallocated tensor for states before and after spikes [2T, N]. If ``None``, states are not recorded
+    :param Optional[torch.Tensor] nums_refr_ctdwn_steps:    Refractory countdown [N,]. If ``None``, neurons are not refractory
+    :param int num_refractory_steps:                    Refractory period, in time steps
+    :param Optional[torch.Tensor] kernels_rec:          Filter kernels for recurrent spikes [K, N]. Recurrent layers only
+    :param Optional[torch.Tensor] weights_rec:          Recurrent weights [N, N]. Recurrent layers only
+    :param Optional[torch.Tensor] v_leak:               Constant leak per time step [N,]. If given, input is integrated without leak towards the input
+    :param Optional[torch.Tensor] v_rest:               Resting potential that the constant leak drives states towards [N,]
+    :param Optional[torch.Tensor] state_min:            Lower limits for neuron states [N,]
+
+    :return torch.Tensor:   Neuron states after evolution
+    """
+    for step in range(num_timesteps):
+        # - Determine refractory neurons and decrement refractory countdown
+        is_not_refractory = torch.ones_like(state)
+        if nums_refr_ctdwn_steps is not None:
+            is_not_refractory = (nums_refr_ctdwn_steps == 0).float()
+            nums_refr_ctdwn_steps -= 1
+            nums_refr_ctdwn_steps.clamp_(min=0)
+        # - Incremental state update from input
+        if v_leak is not None:
+            # - Constant leak, moving state towards `v_rest` if it is given
+            v_leak_update = v_leak
+            if v_rest is not None:
+                v_leak_update = v_leak * (
+                    (state < v_rest).float() - (state > v_rest).float()
+                )
+            state += is_not_refractory * alpha * (neural_input[step] + v_leak_update)
+            if state_min is not None:
+                # - Keep states above lower limits
+                state = torch.max(state, state_min)
+        elif nums_refr_ctdwn_steps is not None:
+            state += alpha * (neural_input[step] - state) * is_not_refractory
+        else:
+            state += alpha * (neural_input[step] - state)
+        # - Store updated state before spike
+        if record_states is not None:
+            record_states[2 * step] = state
+        # - Spiking
+        is_spiking = (state > v_thresh).float()
+        # - State reset
+        state += (v_reset - state) * is_spiking
+        # - Store spikes
+        matr_is_spiking[step] = is_spiking
+        # - Update refractory countdown
+        if nums_refr_ctdwn_steps is not None:
+            nums_refr_ctdwn_steps += num_refractory_steps * is_spiking
+        # - Store updated state after spike
+        if record_states is not None:
+            record_states[2 * step + 1] = state
+        # - Add filtered recurrent spikes to input
+        if kernels_rec is not None and weights_rec is not None:
+            ts_recurrent = min(kernels_rec.shape[0], num_timesteps - step)
+            neural_input[step + 1 : step + 1 + ts_recurrent] += kernels_rec[
+                :ts_recurrent
+            ] * torch.mm(is_spiking.reshape(1, -1), weights_rec)
+
+    return state
+
+
 class _RefractoryBase:
     """ Base class for providing refractoriness-related properties and methods so that refractory layers can inherit them """
 
@@ -76,29 +165,18 @@ class _RefractoryBase:
         neural_input += self._v_rest + self._bias
 
         # - Evolve neuron states
-        for step in range(num_timesteps):
-            # - Determine refractory neurons
-            is_not_refractory = (nums_refr_ctdwn_steps == 0).float()
-            # - Decrement refractory countdown
-            nums_refr_ctdwn_steps -= 1
-            nums_refr_ctdwn_steps.clamp_(min=0)
-            # - Incremental state update from input
-            state += alpha * (neural_input[step] - state) * is_not_refractory
-            # - Store updated state before spike
-            if record:
-                record_states[2 * step] = state
-            # - Spiking
-            is_spiking = (state > v_thresh).float()
-            # - State reset
-            state += (v_reset - state) * is_spiking
-            # - Store spikes
-            matr_is_spiking[step] = is_spiking
-            # - Update refractory countdown
-            nums_refr_ctdwn_steps += num_refractory_steps * is_spiking
-            # - Store updated state after spike
-            if record:
-                record_states[2 * step + 1] = state
-            del is_spiking
+        state = _evolve_iaf_torch(
+            neural_input,
+            state,
+            alpha,
+            v_thresh,
+            v_reset,
+            matr_is_spiking,
+            num_timesteps,
+            record_states if record else None,
+            nums_refr_ctdwn_steps,
+            num_refractory_steps,
+        )
 
         # - Store recorded neuron states
         if record:
@@ -365,22 +443,16 @@ class FFIAFTorch(Layer):
         neural_input += self._v_rest + self._bias
 
         # - Evolve neuron states
-        for step in range(num_timesteps):
-            # - Incremental state update from input
-            state += alpha * (neural_input[step] - state)
-            # - Store updated state before spike
-            if record:
-                record_states[2 * step] = state
-            # - Spiking
-            is_spiking = (state > v_thresh).float()
-            # - State reset
-            state += (v_reset - state) * is_spiking
-            # - Store spikes
-            matr_is_spiking[step] = is_spiking
-            # - Store updated state after spike
-            if record:
-                record_states[2 * step + 1] = state
-            del is_spiking
+        state = _evolve_iaf_torch(
+            neural_input,
+            state,
+            alpha,
+            v_thresh,
+            v_reset,
+            matr_is_spiking,
+            num_timesteps,
+            record_states if record else None,
+        )
 
         # - Store recorded neuron states
         if record:
@@ -1129,7 +1201,6 @@ class RecIAFTorch(FFIAFTorch):
         v_reset = self._v_reset
         record = self.record
         matr_kernels = self._mfKernelsRec
-        num_ts_kernel = matr_kernels.shape[0]
         weights_rec = self._weights
 
         # - Include resting potential and bias in input for fewer computations
@@ -1137,28 +1208,18 @@ class RecIAFTorch(FFIAFTorch):
         neural_input[:-1] += self._v_rest + self._bias
 
         # - Evolve neuron states
-        for step in range(num_timesteps):
-            # - Incremental state update from input
-            state += alpha * (neural_input[step] - state)
-            # - Store updated state before spike
-            if record:
-                record_states[2 * step] = state
-            # - Spiking
-            is_spiking = (state > v_thresh).float()
-            # - State reset
-            state += (v_reset - state) * is_spiking
-            # - Store spikes
-            matr_is_spiking[step] = is_spiking
-            # - Store updated state after spike
-            if record:
-                record_states[2 * step + 1] = state
-            # - Add filtered recurrent spikes to input
-            ts_recurrent = min(num_ts_kernel, num_timesteps - step)
-            neural_input[step + 1 : step + 1 + ts_recurrent] += matr_kernels[
-                :ts_recurrent
-            ] * torch.mm(is_spiking.reshape(1, -1), weights_rec)
-
-            del is_spiking
+        state = _evolve_iaf_torch(
+            neural_input,
+            state,
+            alpha,
+            v_thresh,
+            v_reset,
+            matr_is_spiking,
+            num_timesteps,
+            record_states if record else None,
+            kernels_rec=matr_kernels,
+            weights_rec=weights_rec,
+        )
 
         # - Store recorded neuron and synapse states
         if record:
@@ -1361,7 +1422,6 @@ class RecIAFRefrTorch(_RefractoryBase, RecIAFTorch):
         v_reset = self._v_reset
         record = self.record
         matr_kernels = self._mfKernelsRec
-        num_ts_kernel = matr_kernels.shape[0]
         weights_rec = self._weights
         num_refractory_steps = self._num_refractory_steps
         nums_refr_ctdwn_steps = self._nums_refr_ctdwn_steps.clone()
@@ -1371,35 +1431,20 @@ class RecIAFRefrTorch(_RefractoryBase, RecIAFTorch):
         neural_input[:-1] += self._v_rest + self._bias
 
         # - Evolve neuron states
-        for step in range(num_timesteps):
-            # - Determine refractory neurons
-            is_not_refractory = (nums_refr_ctdwn_steps == 0).float()
-            # - Decrement refractory countdown
-            nums_refr_ctdwn_steps -= 1
-            nums_refr_ctdwn_steps.clamp_(min=0)
-            # - Incremental state update from input
-            state += alpha * (neural_input[step] - state) * is_not_refractory
-            # - Store updated state before spike
-            if record:
-                record_states[2 * step] = state
-            # - Spiking
-            is_spiking = (state > v_thresh).float()
-            # - State reset
-            state += (v_reset - state) * is_spiking
-            # - Store spikes
-            matr_is_spiking[step] = is_spiking
-            # - Update refractory countdown
-            nums_refr_ctdwn_steps += num_refractory_steps * is_spiking
-            # - Store updated state after spike
-            if record:
-                record_states[2 * step + 1] = state
-            # - Add filtered recurrent spikes to input
-            ts_recurrent = min(num_ts_kernel, num_timesteps - step)
-            neural_input[step + 1 : step + 1 + ts_recurrent] += matr_kernels[
-                :ts_recurrent
-            ] * torch.mm(is_spiking.reshape(1, -1), weights_rec)
-
-            del is_spiking
+        state = _evolve_iaf_torch(
+            neural_input,
+            state,
+            alpha,
+            v_thresh,
+            v_reset,
+            matr_is_spiking,
+            num_timesteps,
+            record_states if record else None,
+            nums_refr_ctdwn_steps,
+            num_refractory_steps,
+            matr_kernels,
+            weights_rec,
+        )
 
         # - Store recorded neuron and synapse states
         if record:
@@ -1988,7 +2033,6 @@ class RecIAFSpkInRefrTorch(_RefractoryBase, RecIAFSpkInTorch):
         v_reset = self._v_reset
         record = self.record
         matr_kernels = self._mfKernelsRec
-        num_ts_kernel = matr_kernels.shape[0]
         weights_rec = self._weights
         num_refractory_steps = self._num_refractory_steps
         nums_refr_ctdwn_steps = self._nums_refr_ctdwn_steps.clone()
@@ -1998,35 +2042,20 @@ class RecIAFSpkInRefrTorch(_RefractoryBase, RecIAFSpkInTorch):
         neural_input[:-1] += self._v_rest + self._bias
 
         # - Evolve neuron states
-        for step in range(num_timesteps):
-            # - Determine refractory neurons
-            is_not_refractory = (nums_refr_ctdwn_steps == 0).float()
-            # - Decrement refractory countdown
-            nums_refr_ctdwn_steps -= 1
-            nums_refr_ctdwn_steps.clamp_(min=0)
-            # - Incremental state update from input
-            state += alpha * (neural_input[step] - state) * is_not_refractory
-            # - Store updated state before spike
-            if record:
-                record_states[2 * step] = state
-            # - Spiking
-            is_spiking = (state > v_thresh).float()
-            # - State reset
-            state += (v_reset - state) * is_spiking
-            # - Store spikes
-            matr_is_spiking[step] = is_spiking
-            # - Update refractory countdown
-            nums_refr_ctdwn_steps += num_refractory_steps * is_spiking
-            # - Store updated state after spike
-            if record:
-                record_states[2 * step + 1] = state
-            # - Add filtered recurrent spikes to input
-            ts_recurrent = min(num_ts_kernel, num_timesteps - step)
-            neural_input[step + 1 : step + 1 + ts_recurrent] += matr_kernels[
-                :ts_recurrent
-            ] * torch.mm(is_spiking.reshape(1, -1), weights_rec)
-
-            del is_spiking
+        state = _evolve_iaf_torch(
+            neural_input,
+            state,
+            alpha,
+            v_thresh,
+            v_reset,
+            matr_is_spiking,
+            num_timesteps,
+            record_states if record else None,
+            nums_refr_ctdwn_steps,
+            num_refractory_steps,
+            matr_kernels,
+            weights_rec,
+        )
 
         # - Store recorded neuron and synapse states
         if record:
@@ -2172,52 +2201,28 @@ class RecIAFSpkInRefrCLTorch(RecIAFSpkInRefrTorch):
         state_min = self._state_min
         record = self.record
         matr_kernels = self._mfKernelsRec
-        num_ts_kernel = matr_kernels.shape[0]
         weights_rec = self._weights
         num_refractory_steps = self._num_refractory_steps
         nums_refr_ctdwn_steps = self._nums_refr_ctdwn_steps.clone()
 
-        if v_rest is None:
-            v_leak_update = v_leak
-
         # - Evolve neuron states
-        for step in range(num_timesteps):
-            # - Determine refractory neurons
-            is_not_refractory = (nums_refr_ctdwn_steps == 0).float()
-            # - Decrement refractory countdown
-            nums_refr_ctdwn_steps -= 1
-            nums_refr_ctdwn_steps.clamp_(min=0)
-            # - Incremental state update from input
-            if v_rest is not None:
-                # - Leak moves state towards `v_rest`
-                v_leak_update = v_leak * (
-                    (state < v_rest).float() - (state > v_rest).float()
-                )
-            state += is_not_refractory * alpha * (neural_input[step] + v_leak_update)
-            if state_min is not None:
-                # - Keep states above lower limits
-                state = torch.max(state, state_min)
-            # - Store updated state before spike
-            if record:
-                record_states[2 * step] = state
-            # - Spiking
-            is_spiking = (state > v_thresh).float()
-            # - State reset
-            state += (v_reset - state) * is_spiking
-            # - Store spikes
-            matr_is_spiking[step] = is_spiking
-            # - Update refractory countdown
-            nums_refr_ctdwn_steps += num_refractory_steps * is_spiking
-            # - Store updated state after spike
-            if record:
-                record_states[2 * step + 1] = state
-            # - Add filtered recurrent spikes to input
-            ts_recurrent = min(num_ts_kernel, num_timesteps - step)
-            neural_input[step + 1 : step + 1 + ts_recurrent] += matr_kernels[
-                :ts_recurrent
-            ] * torch.mm(is_spiking.reshape(1, -1), weights_rec)
-
-            del is_spiking
+        state = _evolve_iaf_torch(
+            neural_input,
+            state,
+            alpha,
+            v_thresh,
+            v_reset,
+            matr_is_spiking,
+            num_timesteps,
+            record_states if record else None,
+            nums_refr_ctdwn_steps,
+            num_refractory_steps,
+            matr_kernels,
+            weights_rec,
+            v_leak,
+            v_rest,
+            state_min,
+        )
 
         # - Store recorded neuron and synapse states
         if record:
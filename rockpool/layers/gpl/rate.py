@@ -9,6 +9,7 @@ import numpy as np
 from numba import njit
 
 from ...timeseries import TSContinuous
+from ...utilities import get_kernel
 from ..layer import Layer
 from ..training.gpl.rr_trained_layer import RRTrainedLayer
 
@@ -47,14 +48,14 @@ def print_progress(curr: int, total: int, passed: float):
     )
 
 
-@njit
+@njit(cache=True)
 def re_lu(x: np.ndarray) -> np.ndarray:
     cop = np.copy(x)
     cop[np.where(x < 0)] = 0
     return cop
 
 
-@njit
+@njit(cache=True)
 def noisy(x: np.ndarray, std_dev: float) -> np.ndarray:
     """
     noisy - Add randomly distributed noise to each element of x
@@ -68,7 +69,7 @@ def noisy(x: np.ndarray, std_dev: float) -> np.ndarray:
 ### --- Functions used in connection with FFRateEuler class
 
 
-@njit
+@njit(cache=True)
 def re_lu(x: np.ndarray) -> np.ndarray:
     """
     Activation function for rectified linear units.
@@ -82,7 +83,23 @@ def re_lu(x: np.ndarray) -> np.ndarray:
 
 def get_ff_evolution_function(activation_func: Callable[[np.ndarray], np.ndarray]):
     """
-    get_ff_evolution_function: Construct a compiled Euler solver for a given activation function
+    get_ff_evolution_function: Return a compiled Euler solver for a given activation function
+
+    Solvers are kept in a process-wide registry (see :py:func:`.get_kernel`), so that layers with the same activation function object share one compiled solver.
+
+    :param activation_func: Callable (x) -> f(x)
+    :return: Compiled function evolve_Euler_complete(state, inp, weights, size, num_steps, gain, bias, alpha, noise_std)
+    """
+    return get_kernel(
+        "rate.ff_evolve",
+        activation_func,
+        lambda: _build_ff_evolution_function(activation_func),
+    )
+
+
+def _build_ff_evolution_function(activation_func: Callable[[np.ndarray], np.ndarray]):
+    """
+    _build_ff_evolution_function: Construct a compiled Euler solver for a given activation function
 
     :param activation_func: Callable (x) -> f(x)
     :return: Compiled function evolve_Euler_complete(state, inp, weights, size, num_steps, gain, bias, alpha, noise_std)
@@ -128,7 +145,23 @@ def get_ff_evolution_function(activation_func: Callable[[np.ndarray], np.ndarray
 
 def get_rec_evolution_function(activation_func: Callable[[np.ndarray], np.ndarray]):
     """
-   get_rec_evolution_function: Construct a compiled Euler solver for a given activation function
+    get_rec_evolution_function: Return a compiled Euler solver for a given activation function
+
+    Solvers are kept in a process-wide registry (see :py:func:`.get_kernel`), so that layers with the same activation function object share one compiled solver.
+
+    :param activation_func: Callable (x) -> f(x)
+    :return: Compiled function evolve_Euler_complete(state, size, weights, input_steps, dt, num_steps, bias, tau)
+    """
+    return get_kernel(
+        "rate.rec_evolve",
+        activation_func,
+        lambda: _build_rec_evolution_function(activation_func),
+    )
+
+
+def _build_rec_evolution_function(activation_func: Callable[[np.ndarray], np.ndarray]):
+    """
+   _build_rec_evolution_function: Construct a compiled Euler solver for a given activation function
 
    :param activation_func: Callable (x) -> f(x)
    :return: Compiled function evolve_Euler_complete(state, size, weights, input_steps, dt, num_steps, bias, tau)
@@ -171,6 +204,92 @@ def get_rec_evolution_function(activation_func: Callable[[np.ndarray], np.ndarra
     return evolve_Euler_complete
 
 
+def evolve_ff_batch(
+    activation_func: Callable[[np.ndarray], np.ndarray],
+    states: np.ndarray,
+    weighted_input: np.ndarray,
+    num_steps: int,
+    gain: np.ndarray,
+    bias: np.ndarray,
+    alpha: np.ndarray,
+    noise_std: float,
+) -> np.ndarray:
+    """
+    evolve_ff_batch: Euler solver for a feed-forward layer, vectorised over a batch of trials
+
+    :param activation_func: Callable (x) -> f(x), applied element-wise
+    :param states:          [BxN] Initial neuron states of each trial. Will be updated
+    :param weighted_input:  [BxTxN] Weighted input of each trial
+    :param num_steps:       Number of evolution time steps
+    :param gain:            [N] Neuron gains
+    :param bias:            [N] Neuron biases
+    :param alpha:           [N] dt / tau of each neuron
+    :param noise_std:       Std. dev. of noise added to the input in each time step
+    :return:                [Bx(num_steps+1)xN] Activities of each trial
+    """
+    num_trials, size = states.shape
+    activities = np.zeros((num_trials, num_steps + 1, size))
+
+    for step in range(num_steps):
+        # - Store layer activity
+        activities[:, step] = activation_func(states + bias)
+
+        # - Evolve layer states of all trials
+        d_state = -states + gain * weighted_input[:, step]
+        if noise_std > 0:
+            d_state += noise_std * np.random.randn(num_trials, size)
+        states += d_state * alpha
+
+    # - Compute final activity
+    activities[:, -1] = activation_func(states + bias)
+
+    return activities
+
+
+def evolve_rec_batch(
+    activation_func: Callable[[np.ndarray], np.ndarray],
+    states: np.ndarray,
+    weights: np.ndarray,
+    input_steps: np.ndarray,
+    num_steps: int,
+    dt: float,
+    bias: np.ndarray,
+    tau: np.ndarray,
+) -> np.ndarray:
+    """
+    evolve_rec_batch: Euler solver for a recurrent layer, vectorised over a batch of trials
+
+    :param activation_func: Callable (x) -> f(x), applied element-wise
+    :param states:          [BxN] Initial neuron states of each trial. Will be updated
+    :param weights:         [NxN] Recurrent weights
+    :param input_steps:     [BxTxN] Input (including noise) of each trial
+    :param num_steps:       Number of evolution time steps
+    :param dt:              Time step
+    :param bias:            [N] Neuron biases
+    :param tau:             [N] Neuron time constants
+    :return:                [Bx(num_steps+1)xN] Activities of each trial
+    """
+    num_trials, size = states.shape
+    activity = np.zeros((num_trials, num_steps + 1, size))
+
+    # - Precompute dt / tau
+    lambda_ = dt / tau
+
+    for step in range(num_steps):
+        # - Evolve network states of all trials; recurrent input as one matrix product
+        this_act = activation_func(states + bias)
+        d_state = -states + input_steps[:, step] + this_act @ weights
+        states += d_state * lambda_
+
+        # - Store network states
+        activity[:, step] = this_act
+
+    # - Get final activation
+    activity[:, -1] = activation_func(states + bias)
+
+    return activity
+
+
 ### --- FFRateLayer base class
 
 
@@ -644,6 +763,44 @@ class FFRateEuler(FFRateLayer):
 
         return TSContinuous(time_base, sample_act)
 
+    def evolve_batch(
+        self,
+        inputs: Union[np.ndarray, List[TSContinuous]],
+        duration: Optional[float] = None,
+        num_timesteps: Optional[int] = None,
+        verbose: bool = False,
+    ) -> List[TSContinuous]:
+        """
+        Evolve a batch of independent trials in one vectorised pass
+
+        Each trial starts from the current state and time of this layer. The state and time of the layer are not modified.
+
+        :param Union[ndarray, List[TSContinuous]] inputs:   Either a ``[B, T, M]`` array of input samples on the evolution time base, or a list of ``B`` input time series
+        :param Optional[float] duration:        Duration of each trial, in seconds. If not provided, then `num_timesteps` or the duration of the input is used to determine evolution time
+        :param Optional[int] num_timesteps:     Number of evolution time steps of each trial, in units of `.dt`. If not provided, then `duration` or the duration of the input is used to determine evolution time
+        :param bool verbose:                    Currently no effect, just for conformity
+
+        :return List[TSContinuous]:             Output time series of each trial
+        """
+
+        # - Prepare time base and inputs of all trials
+        time_base, inp, num_timesteps = self._prepare_input_batch(
+            inputs, duration, num_timesteps
+        )
+
+        activities = evolve_ff_batch(
+            activation_func=self._activation,
+            states=np.repeat(self._state.reshape(1, -1), len(inp), axis=0),
+            weighted_input=inp @ self._weights,
+            num_steps=num_timesteps,
+            gain=self._gain,
+            bias=self._bias,
+            alpha=self._alpha,
+            noise_std=self._noise_std * np.sqrt(2.0 / self._alpha),
+        )
+
+        return [TSContinuous(time_base, act) for act in activities]
+
     def stream(
         self, duration: float, dt: float, verbose: bool = False
     ) -> Tuple[float, List[float]]:
@@ -925,6 +1082,51 @@ class RecRateEuler(Layer):
         # - Construct a return TimeSeries
         return TSContinuous(time_base, activity)
 
+    def evolve_batch(
+        self,
+        inputs: Union[np.ndarray, List[TSContinuous]],
+        duration: Optional[float] = None,
+        num_timesteps: Optional[int] = None,
+        verbose: bool = False,
+    ) -> List[TSContinuous]:
+        """
+        Evolve a batch of independent trials in one vectorised pass
+
+        Each trial starts from the current state and time of this layer. The state and time of the layer are not modified.
+
+        :param Union[ndarray, List[TSContinuous]] inputs:   Either a ``[B, T, M]`` array of input samples on the evolution time base, or a list of ``B`` input time series
+        :param Optional[float] duration:        Duration of each trial, in seconds. If not provided, then `num_timesteps` or the duration of the input will determine evolution duration
+        :param Optional[int] num_timesteps:     Number of evolution time steps of each trial, in units of `.dt`. If not provided, then `duration` or the duration of the input will determine evolution duration
+        :param bool verbose:                    Currently no effect, just for conformity
+
+        :return List[TSContinuous]:             Output time series of each trial
+        """
+
+        # - Prepare time base and inputs of all trials
+        time_base, input_steps, num_timesteps = self._prepare_input_batch(
+            inputs, duration, num_timesteps
+        )
+
+        # - Generate noise traces
+        noise_step = (
+            np.random.randn(*input_steps.shape[:2], self.size)
+            * self.noise_std
+            * np.sqrt(2.0 * self._tau / self._dt)
+        )
+
+        activity = evolve_rec_batch(
+            self._activation,
+            np.repeat(self._state.reshape(1, -1), len(input_steps), axis=0),
+            self._weights,
+            input_steps + noise_step,
+            num_timesteps,
+            self._dt,
+            self._bias,
+            self._tau,
+        )
+
+        return [TSContinuous(time_base, act) for act in activity]
+
     def stream(
         self, duration: float, dt: float, verbose: bool = False
     ) -> Tuple[float, List[float]]:
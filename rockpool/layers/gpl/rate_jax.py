@@ -11,17 +11,18 @@
 
 # -- Imports
 import jax.numpy as np
-from jax import jit
+from jax import jit, vmap
 from jax.lax import scan
 import jax.random as rand
 import numpy as onp
-from typing import Optional, Tuple, Callable, Union
+from typing import Optional, Tuple, Callable, Union, List
 from warnings import warn
 
 FloatVector = Union[float, np.ndarray]
 
 from ..layer import Layer
 from ...timeseries import TimeSeries, TSContinuous
+from ...utilities import BucketSpec, pad_to_bucket, get_kernel
 
 
 # -- Define module exports
@@ -45,7 +46,7 @@ def _get_rec_evolve_jit(H: Callable[[float], float]):
     _get_rec_evolve_jit() - Return a compiled raw reservoir evolution function
 
     :param H:   Callable[[float], float] Neuron activation function
-    :return:     f(x0, w_in, w_recurrent, w_out, bias, tau, inputs, noise_std, key, dt) -> (x, res_inputs, rec_inputs, res_acts, outputs)
+    :return:     f(x0, w_in, w_recurrent, w_out, bias, tau, inputs, noise_std, key, dt, valid_ts) -> (x, res_inputs, rec_inputs, res_acts, outputs)
     """
 
     @jit
@@ -60,6 +61,7 @@ def _get_rec_evolve_jit(H: Callable[[float], float]):
         noise_std: float,
         key,
         dt: float,
+        valid_ts: Optional[np.ndarray] = None,
     ):
         """
         rec_evolve_jit() - Compiled recurrent evolution function
@@ -74,6 +76,7 @@ def _get_rec_evolve_jit(H: Callable[[float], float]):
         :param noise_std:   float Standard deviation of noise injected into reservoir units
         :param key:         Jax RNG key to use in noise generation
         :param dt:          float Time step for forward Euler solver
+        :param valid_ts:    Optional[np.ndarray] Boolean mask of valid time steps [T]. The state is not updated on invalid (padding) time steps. Default: all time steps are valid
 
         :return:    (x, res_inputs, rec_inputs, res_acts, outputs)
                 x:          np.ndarray State of
@@ -95,12 +98,12 @@ def _get_rec_evolve_jit(H: Callable[[float], float]):
 
             :return:    xnext, (rec_input, activation)
             """
-            inp, rand = inps
+            inp, rand, valid = inps
             activation = H(x)
             rec_input = np.dot(activation, w_recurrent)
             dx = dt_tau * (-x + inp + bias + rand + rec_input)
 
-            return x + dx, (rec_input, activation)
+            return np.where(valid, x + dx, x), (rec_input, activation)
 
         # - Evaluate passthrough input layer
         res_inputs = np.dot(inputs, w_in)
@@ -109,8 +112,14 @@ def _get_rec_evolve_jit(H: Callable[[float], float]):
         __all__, subkey = rand.split(key)
         noise = noise_std * rand.normal(subkey, shape=(inputs.shape[0], np.size(x0)))
 
+        # - All time steps are valid by default
+        if valid_ts is None:
+            valid_ts = np.ones(inputs.shape[0], dtype=bool)
+
         # - Use `scan` to evaluate reservoir
-        x, (rec_inputs, res_acts) = scan(reservoir_step, x0, (res_inputs, noise))
+        x, (rec_inputs, res_acts) = scan(
+            reservoir_step, x0, (res_inputs, noise, valid_ts)
+        )
 
         # - Evaluate passthrough output layer
         outputs = np.dot(res_acts, w_out)
@@ -208,6 +217,7 @@ class RecRateEulerJax(Layer):
         dt: Optional[float] = None,
         name: Optional[str] = None,
         rng_key: Optional[int] = None,
+        time_buckets: BucketSpec = None,
     ):
         """
         RecRateEulerJax - ``JAX``-backed firing rate reservoir
@@ -222,6 +232,7 @@ class RecRateEulerJax(Layer):
         :param Optional[float] dt:                  Reservoir time step. Default: ``np.min(tau) / 10.0``
         :param Optional[str] name:                  Name of the layer. Default: ``None``
         :param Optional[Jax RNG key] rng_key        Jax RNG key to use for noise. Default: Internally generated
+        :param BucketSpec time_buckets:             Pad inputs to a small set of lengths, so that compiled evolution functions are reused for inputs of different durations. ``"pow2"``: pad to powers of two, or a list of lengths. The bucket length used by the latest evolution is stored in `.bucket_last_evolution`. Default: ``None``, do not pad
         """
 
         # - Everything should be 2D
@@ -245,6 +256,10 @@ class RecRateEulerJax(Layer):
         self.bias = bias
         self._H = activation_func
 
+        # - Bucketing of input lengths
+        self.time_buckets = time_buckets
+        self.bucket_last_evolution = None
+
         if dt is None:
             dt = np.min(tau) / 10.0
 
@@ -255,8 +270,20 @@ class RecRateEulerJax(Layer):
         self._size_in = w_in.shape[0]
         self._size_out = w_out.shape[1]
 
-        # - Get compiled evolution function
-        self._evolve_jit = _get_rec_evolve_jit(activation_func)
+        # - Get compiled evolution function, shared by layers with the same activation
+        self._evolve_jit = get_kernel(
+            "rate_jax.rec_evolve",
+            activation_func,
+            lambda: _get_rec_evolve_jit(activation_func),
+        )
+
+        # - Get compiled batched evolution function, mapping over inputs and RNG keys
+        in_axes = (None, None, None, None, None, None, 0, None, 0, None, None)
+        self._evolve_batch_jit = get_kernel(
+            "rate_jax.rec_evolve_batch",
+            activation_func,
+            lambda: jit(vmap(self._evolve_jit, in_axes=in_axes)),
+        )
 
         # - Reset layer state
         self.reset_all()
@@ -298,6 +325,57 @@ class RecRateEulerJax(Layer):
         # - Wrap outputs as time series
         return TSContinuous(time_base, onp.array(outputs))
 
+    def evolve_batch(
+        self,
+        inputs: Union[onp.ndarray, List[TSContinuous]],
+        duration: Optional[float] = None,
+        num_timesteps: Optional[int] = None,
+        verbose: bool = False,
+    ) -> List[TSContinuous]:
+        """
+        evolve_batch() - Evolve a batch of independent trials with a single vectorised call
+
+        Each trial starts from the current state and time of this layer, and uses its own noise. The state and time of the layer are not modified.
+
+        :param inputs:          Union[np.ndarray, List[TSContinuous]] Either a [B, T, I] array of input samples on the evolution time base, or a list of B input time series
+        :param duration:        float Duration of evolution of each trial in seconds
+        :param num_timesteps:   int Number of time steps to evolve in each trial (based on self.dt)
+        :param verbose:         bool Currently no effect, just for conformity
+
+        :return: List[TSContinuous] Output time series of each trial
+        """
+
+        # - Prepare time base and inputs of all trials
+        time_base, inps, num_timesteps = self._prepare_input_batch(
+            inputs, duration, num_timesteps
+        )
+
+        # - Pad inputs to bucket length, to reuse compiled evolution functions
+        inps, valid_ts, self.bucket_last_evolution = pad_to_bucket(
+            inps, self.time_buckets, axis=1
+        )
+
+        # - Call compiled Euler solver, mapped over trials
+        _, _, _, _, outputs = self._evolve_batch_jit(
+            self._state,
+            self._weights,
+            self._w_recurrent,
+            self._w_out,
+            self._bias,
+            self._tau,
+            np.array(inps),
+            self._noise_std,
+            rand.split(self._rng_key, inps.shape[0]),
+            self._dt,
+            valid_ts,
+        )
+
+        # - Wrap outputs as time series, without padding
+        return [
+            TSContinuous(time_base, out)
+            for out in onp.array(outputs[:, : num_timesteps + 1])
+        ]
+
     def _evolve_raw(
         self, inps: np.ndarray
     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
@@ -312,6 +390,12 @@ class RecRateEulerJax(Layer):
                 res_acts        np.ndarray Reservoir activity trace [T, N]
                 outputs         np.ndarray Output of network [T, O]
         """
+        # - Pad inputs to bucket length, to reuse compiled evolution functions
+        num_timesteps = inps.shape[0]
+        inps, valid_ts, self.bucket_last_evolution = pad_to_bucket(
+            inps, self.time_buckets
+        )
+
         # - Call compiled Euler solver to evolve reservoir
         self._state, res_inputs, rec_inputs, res_acts, outputs = self._evolve_jit(
             self._state,
@@ -324,12 +408,19 @@ class RecRateEulerJax(Layer):
             self._noise_std,
             self._rng_key,
             self._dt,
+            valid_ts,
         )
 
         # - Increment timesteps
-        self._timestep += inps.shape[0] - 1
-
-        return res_inputs, rec_inputs, res_acts, outputs
+        self._timestep += num_timesteps - 1
+
+        # - Remove padding
+        return (
+            res_inputs[:num_timesteps],
+            rec_inputs[:num_timesteps],
+            res_acts[:num_timesteps],
+            outputs[:num_timesteps],
+        )
 
     def _prepare_input(
         self,
@@ -410,6 +501,11 @@ class RecRateEulerJax(Layer):
         config["dt"] = self.dt
         config["name"] = self.name
         config["rng_key"] = [int(k) for k in self._rng_key]
+        config["time_buckets"] = (
+            self.time_buckets
+            if self.time_buckets is None or isinstance(self.time_buckets, str)
+            else onp.asarray(self.time_buckets).tolist()
+        )
         warn(
             f"RecRateEulerJax `{self.name}`: `activation_func` can not be stored with this "
             + "method. When creating a new instance from this dict, it will use the "
@@ -574,7 +670,19 @@ class ForceRateEulerJax(RecRateEulerJax):
         self._size_out = w_out.shape[1]
 
         # - Get compiled evolution function for forced reservoir
-        self._evolve_jit = _get_force_evolve_jit(activation_func)
+        self._evolve_jit = get_kernel(
+            "rate_jax.force_evolve",
+            activation_func,
+            lambda: _get_force_evolve_jit(activation_func),
+        )
+
+        # - Get compiled batched evolution function, mapping over inputs, forces and keys
+        in_axes = (None, None, None, None, None, 0, 0, None, 0, None)
+        self._evolve_batch_jit = get_kernel(
+            "rate_jax.force_evolve_batch",
+            activation_func,
+            lambda: jit(vmap(self._evolve_jit, in_axes=in_axes)),
+        )
 
     def evolve(
         self,
@@ -611,6 +719,76 @@ class ForceRateEulerJax(RecRateEulerJax):
         # - Wrap outputs as time series
         return TSContinuous(time_base, outputs)
 
+    def evolve_batch(
+        self,
+        inputs: Union[onp.ndarray, List[TSContinuous]],
+        forces: Union[onp.ndarray, List[TSContinuous], None] = None,
+        duration: Optional[float] = None,
+        num_timesteps: Optional[int] = None,
+        verbose: bool = False,
+    ) -> List[TSContinuous]:
+        """
+        evolve_batch() - Evolve a batch of independent trials with a single vectorised call
+
+        Each trial starts from the current state and time of this layer, and uses its own noise and forcing signal. The state and time of the layer are not modified.
+
+        :param inputs:          Union[np.ndarray, List[TSContinuous]] Either a [B, T, I] array of input samples on the evolution time base, or a list of B input time series
+        :param forces:          Union[np.ndarray, List[TSContinuous], None] Either a [B, T, N] array of forcing samples on the evolution time base, or a list of B forcing time series. Default: ``None``, no forcing
+        :param duration:        float Duration of evolution of each trial in seconds
+        :param num_timesteps:   int Number of time steps to evolve in each trial (based on self.dt)
+        :param verbose:         bool Currently no effect, just for conformity
+
+        :return: List[TSContinuous] Output time series of each trial
+        """
+
+        # - Prepare time base and inputs of all trials
+        time_base, inps, num_timesteps = self._prepare_input_batch(
+            inputs, duration, num_timesteps
+        )
+
+        # - Sample forcing signals on the same time base
+        batch_shape = (inps.shape[0], num_timesteps + 1, self._size)
+        if forces is None:
+            forces = onp.zeros(batch_shape)
+        elif isinstance(forces, onp.ndarray) or not isinstance(
+            forces[0], TSContinuous
+        ):
+            forces = onp.asarray(forces, float)[:, : num_timesteps + 1]
+        else:
+            forces = onp.stack([ts_force(time_base) for ts_force in forces])
+        if forces.shape != batch_shape:
+            raise ValueError(
+                self.start_print
+                + f"Batched forces must be of shape {batch_shape}, not {forces.shape}."
+            )
+
+        # - Pad inputs and forces to bucket length. Padding follows the valid time
+        #   steps, so that outputs are not affected
+        inps, __, self.bucket_last_evolution = pad_to_bucket(
+            inps, self.time_buckets, axis=1
+        )
+        forces, __, __ = pad_to_bucket(forces, self.time_buckets, axis=1)
+
+        # - Call compiled Euler solver, mapped over trials
+        _, _, _, outputs = self._evolve_batch_jit(
+            self._state,
+            self._weights,
+            self._w_out,
+            self._bias,
+            self._tau,
+            np.array(inps),
+            np.array(forces),
+            self._noise_std,
+            rand.split(self._rng_key, inps.shape[0]),
+            self._dt,
+        )
+
+        # - Wrap outputs as time series, without padding
+        return [
+            TSContinuous(time_base, out)
+            for out in onp.array(outputs[:, : num_timesteps + 1])
+        ]
+
     def _evolve_raw(
         self, inps: np.ndarray, forces: np.ndarray
     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
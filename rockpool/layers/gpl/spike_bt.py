@@ -8,7 +8,6 @@ from ..layer import Layer
 from ...timeseries import *
 import numpy as np
 from typing import Union, Callable, Optional, Tuple, Any
-import copy
 
 from numba import njit
 
@@ -25,7 +24,7 @@ __all__ = ["RecFSSpikeEulerBT"]
 ### --- Functions implementing membrane and synapse dynamics
 
 
-@njit
+@njit(cache=True)
 def neuron_dot_v(
     t,
     V,
@@ -44,16 +43,177 @@ def neuron_dot_v(
     return (V_rest - V + I_s_S + I_s_F + I_ext + I_bias) / tau_V
 
 
-@njit
+@njit(cache=True)
 def syn_dot_I(t, I, dt, I_spike, tau_Syn):
     return -I / tau_Syn + I_spike / dt
 
 
-@njit
+@njit(cache=True)
 def _backstep(vCurrent, vLast, tStep, tDesiredStep):
     return (vCurrent - vLast) / tStep * tDesiredStep + vLast
 
 
+@njit(cache=True)
+def _evolve_backstep(
+    t_time: float,
+    t_last: float,
+    t_start: float,
+    final_time: float,
+    step: int,
+    spike_pointer: int,
+    return_on_spike: bool,
+    weights: np.ndarray,
+    weights_slow: np.ndarray,
+    static_input: np.ndarray,
+    state: np.ndarray,
+    I_s_S: np.ndarray,
+    I_s_F: np.ndarray,
+    v_last: np.ndarray,
+    I_s_S_Last: np.ndarray,
+    I_s_F_Last: np.ndarray,
+    vec_refractory: np.ndarray,
+    v_reset: np.ndarray,
+    v_rest: np.ndarray,
+    v_thresh: np.ndarray,
+    bias: np.ndarray,
+    tau_mem: np.ndarray,
+    tau_syn_r_slow: np.ndarray,
+    tau_syn_r_fast: np.ndarray,
+    refractory: float,
+    dt: float,
+    min_delta: float,
+    times: np.ndarray,
+    v: np.ndarray,
+    s: np.ndarray,
+    f: np.ndarray,
+    dot_v: np.ndarray,
+    spike_times: np.ndarray,
+    spike_indices: np.ndarray,
+) -> (float, float, int, int, int):
+    """
+    Euler integrator loop with back-tick spike detection
+
+    Neuron and synapse states are updated in place, and the network states and spikes of each step are written to the preallocated storage arrays. The loop runs until ``final_time``, unless the storage arrays are full, or a neuron spikes and ``return_on_spike`` is ``True``. The loop can then be resumed by calling this function again with the returned values.
+
+    :return (float, float, int, int, int): (t_time, t_last, step, spike_pointer, first_spike_id)
+        first_spike_id:     ID of the neuron that spiked, if the function returned because of a spike. ``-1`` otherwise
+    """
+    size = state.size
+    num_input_steps = static_input.shape[0]
+    I_spike_slow = np.zeros(size)
+    I_spike_fast = np.zeros(size)
+
+    while t_time < final_time:
+        # - Return if storage needs to be extended
+        if step >= times.size or spike_pointer >= spike_times.size:
+            return t_time, t_last, step, spike_pointer, -1
+
+        # - Enforce refractory period by clamping membrane potential to reset
+        for id_neur in range(size):
+            if vec_refractory[id_neur] > 0:
+                state[id_neur] = v_reset[id_neur]
+
+        ## - Back-tick spike detector
+
+        # - Find the earliest spike, predicting precise spike times using linear interpolation
+        first_spike_id = -1
+        spike_delta = np.inf
+        for id_neur in range(size):
+            if state[id_neur] > v_thresh[id_neur]:
+                delta = (
+                    (v_thresh[id_neur] - v_last[id_neur])
+                    * dt
+                    / (state[id_neur] - v_last[id_neur])
+                )
+                if delta < spike_delta:
+                    spike_delta = delta
+                    first_spike_id = id_neur
+
+        # - Were there any spikes?
+        if first_spike_id > -1:
+            # - Find time of actual spike
+            shortest_step = t_last + min_delta
+            spike = clip_scalar(t_last + spike_delta, shortest_step, t_time)
+            spike_delta = spike - t_last
+
+            # - Back-step time to spike
+            t_time = spike
+            vec_refractory += dt - spike_delta
+
+            # - Back-step all membrane and synaptic potentials to time of spike (linear interpolation)
+            state[:] = _backstep(state, v_last, dt, spike_delta)
+            I_s_S[:] = _backstep(I_s_S, I_s_S_Last, dt, spike_delta)
+            I_s_F[:] = _backstep(I_s_F, I_s_F_Last, dt, spike_delta)
+
+            # - Apply reset to spiking neuron
+            state[first_spike_id] = v_reset[first_spike_id]
+
+            # - Begin refractory period for spiking neuron
+            vec_refractory[first_spike_id] = refractory
+
+            # - Set spike currents
+            I_spike_slow[:] = weights_slow[:, first_spike_id]
+            I_spike_fast[:] = weights[:, first_spike_id]
+
+            # - Record spiking neuron
+            spike_times[spike_pointer] = t_time
+            spike_indices[spike_pointer] = first_spike_id
+            spike_pointer += 1
+
+        else:
+            # - Clear spike currents
+            I_spike_slow[:] = 0.0
+            I_spike_fast[:] = 0.0
+
+        ### End of back-tick spike detector
+
+        # - Save synapse and neuron states for previous time step
+        v_last[:] = state
+        I_s_S_Last[:] = I_s_S + I_spike_slow
+        I_s_F_Last[:] = I_s_F + I_spike_fast
+
+        # - Update synapse and neuron states (Euler step)
+        I_s_S += syn_dot_I(t_time, I_s_S, dt, I_spike_slow, tau_syn_r_slow) * dt
+        I_s_F += syn_dot_I(t_time, I_s_F, dt, I_spike_fast, tau_syn_r_fast) * dt
+
+        int_time = min(int((t_time - t_start) // dt), num_input_steps - 1)
+        dot_v_step = neuron_dot_v(
+            t_time,
+            state,
+            dt,
+            I_s_S,
+            I_s_F,
+            static_input[int_time, :],
+            bias,
+            v_rest,
+            v_reset,
+            v_thresh,
+            tau_mem,
+            tau_syn_r_slow,
+            tau_syn_r_fast,
+        )
+        state += dot_v_step * dt
+
+        # - Store the network states for this time step
+        times[step] = t_time
+        v[:, step] = state
+        s[:, step] = I_s_S
+        f[:, step] = I_s_F
+        dot_v[:, step] = dot_v_step
+
+        # - Next nominal time step
+        t_last = t_time
+        t_time += dt
+        step += 1
+        vec_refractory -= dt
+
+        # - Return to call spike-based learning callback
+        if return_on_spike and first_spike_id > -1:
+            return t_time, t_last, step, spike_pointer, first_spike_id
+
+    return t_time, t_last, step, spike_pointer, -1
+
+
 ### --- RecFSSpikeEulerBT class implementation
 
 
@@ -195,17 +355,17 @@ class RecFSSpikeEulerBT(Layer):
         static_input += noise_step
 
         # - Allocate state storage variables
-        spike_pointer = 0
+        step = 0
         times = full_nan(num_timesteps)
         v = full_nan((self.size, num_timesteps))
         s = full_nan((self.size, num_timesteps))
         f = full_nan((self.size, num_timesteps))
         dot_v = full_nan((self.size, num_timesteps))
 
-        # - Allocate storage for spike times
-        max_spike_pointer = num_timesteps * self.size
-        spike_times = full_nan(max_spike_pointer)
-        spike_indices = full_nan(max_spike_pointer)
+        # - Allocate storage for spike times. At most one spike per step
+        spike_pointer = 0
+        spike_times = full_nan(num_timesteps)
+        spike_indices = np.full(num_timesteps, -1, dtype=int)
 
         # - Refractory time variable
         vec_refractory = np.zeros(self.size)
@@ -213,224 +373,79 @@ class RecFSSpikeEulerBT(Layer):
         # - Initialise step and "previous step" variables
         t_time = self._t
         t_start = self._t
-        step = 0
         t_last = 0.0
+        self._state = np.asarray(self._state, dtype=float).copy()
         v_last = self._state.copy()
         I_s_S_Last = self.I_s_S.copy()
         I_s_F_Last = self.I_s_F.copy()
 
-        zeros = np.zeros(self.size)
-        # spike = np.nan
-        # first_spike_id = 0
+        # - Parameters as float vectors for the compiled kernel
+        bias = rep_to_net_size(self.bias, self.size).astype(float)
+        tau_mem = rep_to_net_size(self.tau_mem, self.size).astype(float)
+        tau_syn_r_slow = rep_to_net_size(self.tau_syn_r_slow, self.size).astype(float)
+        tau_syn_r_fast = rep_to_net_size(self.tau_syn_r_fast, self.size).astype(float)
 
-        # - Euler integrator loop
+        # - Euler integrator loop. The compiled kernel only returns early to extend the storage, or to call the learning callback
         while t_time < final_time:
-
-            ### --- Numba-compiled inner function for speed
-            # @njit
-            def _evolve_backstep(
-                t_time,
-                weights,
-                weights_slow,
-                state,
-                I_s_S,
-                I_s_F,
-                dt,
-                v_last,
-                I_s_S_Last,
-                I_s_F_Last,
-                v_reset,
-                v_rest,
-                v_thresh,
-                bias,
-                tau_mem,
-                tau_syn_r_slow,
-                tau_syn_r_fast,
-                refractory,
-                vec_refractory,
-                zeros,
-            ):
-                # - Enforce refractory period by clamping membrane potential to reset
-                state[vec_refractory > 0] = v_reset[vec_refractory > 0]
-
-                ## - Back-tick spike detector
-
-                # - Locate spiking neurons
-                spike_ids = state > v_thresh
-                spike_ids = argwhere(spike_ids)
-                num_spikes = np.sum(spike_ids)
-
-                # - Were there any spikes?
-                if num_spikes > 0:
-                    # - Predict the precise spike times using linear interpolation
-                    spike_deltas = (
-                        (v_thresh[spike_ids] - v_last[spike_ids])
-                        * dt
-                        / (state[spike_ids] - v_last[spike_ids])
-                    )
-
-                    # - Was there more than one neuron above threshold?
-                    if num_spikes > 1:
-                        # - Find the earliest spike
-                        spike_delta, first_spike_id = min_argmin(spike_deltas)
-                        first_spike_id = spike_ids[first_spike_id]
-                    else:
-                        spike_delta = spike_deltas[0]
-                        first_spike_id = spike_ids[0]
-
-                    # - Find time of actual spike
-                    shortest_step = t_last + min_delta
-                    spike = clip_scalar(t_last + spike_delta, shortest_step, t_time)
-                    spike_delta = spike - t_last
-
-                    # - Back-step time to spike
-                    t_time = spike
-                    vec_refractory = vec_refractory + dt - spike_delta
-
-                    # - Back-step all membrane and synaptic potentials to time of spike (linear interpolation)
-                    state = _backstep(state, v_last, dt, spike_delta)
-                    I_s_S = _backstep(I_s_S, I_s_S_Last, dt, spike_delta)
-                    I_s_F = _backstep(I_s_F, I_s_F_Last, dt, spike_delta)
-
-                    # - Apply reset to spiking neuron
-                    state[first_spike_id] = v_reset[first_spike_id]
-
-                    # - Begin refractory period for spiking neuron
-                    vec_refractory[first_spike_id] = refractory
-
-                    # - Set spike currents
-                    I_spike_slow = weights_slow[:, first_spike_id]
-                    I_spike_fast = weights[:, first_spike_id]
-
-                else:
-                    # - Clear spike currents
-                    first_spike_id = -1
-                    I_spike_slow = zeros
-                    I_spike_fast = zeros
-
-                ### End of back-tick spike detector
-
-                # - Save synapse and neuron states for previous time step
-                v_last[:] = state
-                I_s_S_Last[:] = I_s_S + I_spike_slow
-                I_s_F_Last[:] = I_s_F + I_spike_fast
-
-                # - Update synapse and neuron states (Euler step)
-                dot_I_s_S = syn_dot_I(t_time, I_s_S, dt, I_spike_slow, tau_syn_r_slow)
-                I_s_S += dot_I_s_S * dt
-
-                dot_I_s_F = syn_dot_I(t_time, I_s_F, dt, I_spike_fast, tau_syn_r_fast)
-                I_s_F += dot_I_s_F * dt
-
-                int_time = int((t_time - t_start) // dt)
-                I_ext = static_input[int_time, :]
-                dot_v = neuron_dot_v(
-                    t_time,
-                    state,
-                    dt,
-                    I_s_S,
-                    I_s_F,
-                    I_ext,
-                    bias,
-                    v_rest,
-                    v_reset,
-                    v_thresh,
-                    tau_mem,
-                    tau_syn_r_slow,
-                    tau_syn_r_fast,
-                )
-                state += dot_v * dt
-
-                return (
-                    t_time,
-                    first_spike_id,
-                    dot_v,
-                    state,
-                    I_s_S,
-                    I_s_F,
-                    dt,
-                    v_last,
-                    I_s_S_Last,
-                    I_s_F_Last,
-                    vec_refractory,
-                )
-
-            ### --- END of compiled inner function
-
-            # - Call compiled inner function
-            (
+            t_time, t_last, step, spike_pointer, first_spike_id = _evolve_backstep(
                 t_time,
-                first_spike_id,
-                dot_v,
+                t_last,
+                t_start,
+                final_time,
+                step,
+                spike_pointer,
+                self.spike_callback is not None,
+                np.asarray(self._weights, dtype=float),
+                np.asarray(self.weights_slow, dtype=float),
+                static_input,
                 self._state,
                 self.I_s_S,
                 self.I_s_F,
-                self._dt,
                 v_last,
                 I_s_S_Last,
                 I_s_F_Last,
                 vec_refractory,
-            ) = _evolve_backstep(
-                t_time,
-                self._weights,
-                self.weights_slow,
-                self._state,
-                self.I_s_S,
-                self.I_s_F,
-                self._dt,
-                v_last,
-                I_s_S_Last,
-                I_s_F_Last,
                 self.v_reset,
                 self.v_rest,
                 self.v_thresh,
-                self.bias,
-                self.tau_mem,
-                self.tau_syn_r_slow,
-                self.tau_syn_r_fast,
+                bias,
+                tau_mem,
+                tau_syn_r_slow,
+                tau_syn_r_fast,
                 self.refractory,
-                vec_refractory,
-                zeros,
+                float(self._dt),
+                float(min_delta),
+                times,
+                v,
+                s,
+                f,
+                dot_v,
+                spike_times,
+                spike_indices,
             )
 
             # - Call spike-based learning callback
-            if first_spike_id > -1 and self.spike_callback is not None:
-                self.spike_callback(self, t_time, first_spike_id)
+            if first_spike_id > -1:
+                self.spike_callback(
+                    self, spike_times[spike_pointer - 1], first_spike_id
+                )
 
             # - Extend spike record, if necessary
-            if spike_pointer >= max_spike_pointer:
-                extend = int(max_spike_pointer // 2)
+            if spike_pointer >= spike_times.size:
+                extend = spike_times.size
                 spike_times = np.append(spike_times, full_nan(extend))
-                spike_indices = np.append(spike_indices, full_nan(extend))
-                max_spike_pointer += extend
-
-            # - Record spiking neuron
-            spike_times[spike_pointer] = t_time
-            spike_indices[spike_pointer] = first_spike_id
-            spike_pointer += 1
+                spike_indices = np.append(
+                    spike_indices, np.full(extend, -1, dtype=int)
+                )
 
             # - Extend state storage variables, if needed
-            if step >= num_timesteps:
-                extend = num_timesteps
+            if step >= times.size:
+                extend = times.size
                 times = np.append(times, full_nan(extend))
                 v = np.append(v, full_nan((self.size, extend)), axis=1)
                 s = np.append(s, full_nan((self.size, extend)), axis=1)
                 f = np.append(f, full_nan((self.size, extend)), axis=1)
                 dot_v = np.append(dot_v, full_nan((self.size, extend)), axis=1)
-                num_timesteps += extend
-
-            # - Store the network states for this time step
-            times[step] = t_time
-            v[:, step] = self._state
-            s[:, step] = self.I_s_S
-            f[:, step] = self.I_s_F
-            dot_v[:, step] = dot_v
-
-            # - Next nominal time step
-            t_last = copy.copy(t_time)
-            t_time += self._dt
-            step += 1
-            vec_refractory -= self.dt
         ### End of Euler integration loop
 
         ## - Back-step to exact final time
@@ -464,7 +479,7 @@ class RecFSSpikeEulerBT(Layer):
             "static_input": static_input,
         }
 
-        use_hv, _ = get_global_ts_plotting_backend()
+        use_hv = get_global_ts_plotting_backend() == "holoviews"
         if use_hv:
             spikes = {"times": spike_times, "vnNeuron": spike_indices}
 
@@ -564,7 +579,7 @@ def full_nan(shape: Union[tuple, int]):
 ### --- Compiled concenience functions
 
 
-@njit
+@njit(cache=True)
 def min_argmin(data: np.ndarray) -> Tuple[float, int]:
     """
     Accelerated function to find minimum and location of minimum
@@ -585,7 +600,7 @@ def min_argmin(data: np.ndarray) -> Tuple[float, int]:
     return min_val, min_loc
 
 
-@njit
+@njit(cache=True)
 def argwhere(data: np.ndarray) -> list:
     """
     Accelerated argwhere function
@@ -604,7 +619,7 @@ def argwhere(data: np.ndarray) -> list:
     return vnLocs
 
 
-@njit
+@njit(cache=True)
 def clip_vector(v: np.ndarray, f_min: float, f_max: float) -> np.ndarray:
     """
     Accelerated vector clip function
@@ -620,7 +635,7 @@ def clip_vector(v: np.ndarray, f_min: float, f_max: float) -> np.ndarray:
     return v
 
 
-@njit
+@njit(cache=True)
 def clip_scalar(val: float, f_min: float, f_max: float) -> float:
     """
     Accelerated scalar clip function
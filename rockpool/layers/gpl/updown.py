@@ -8,6 +8,7 @@ from typing import Optional, Union, Tuple
 import json
 
 import numpy as np
+from numba import njit
 
 # - Local imports
 from ...timeseries import TSContinuous, TSEvent
@@ -19,6 +20,93 @@ MAX_NUM_TIMESTEPS_DEFAULT = 5000
 
 __all__ = ["FFUpDown"]
 
+
+@njit(cache=True)
+def _updown_events(
+    inp: np.ndarray,
+    state: np.ndarray,
+    thr_up: np.ndarray,
+    thr_down: np.ndarray,
+    decay_factor: np.ndarray,
+    multiplex_spikes: bool,
+    repeat_output: int,
+    multi_channels: int,
+    idx_event_start: int,
+) -> (np.ndarray, np.ndarray):
+    """
+    Convert analogue inputs to up- and down-events, for all time steps and channels
+
+    Events are emitted in the order of time steps and, within each time step, of output channels. Each event is repeated ``repeat_output`` times, and consecutive events are distributed cyclically over the ``multi_channels`` output channels that belong to each up- or down-channel.
+
+    :param np.ndarray inp:          Input [TxN]
+    :param np.ndarray state:        Tracking states [N,]. Will be updated
+    :param np.ndarray thr_up:       Thresholds for up-events [N,]
+    :param np.ndarray thr_down:     Thresholds for down-events [N,]
+    :param np.ndarray decay_factor: Decay factors of the tracking states [N,]
+    :param bool multiplex_spikes:   If ``True``, emit multiple events per time step, according to how much a threshold is exceeded
+    :param int repeat_output:       Number of times each event is repeated
+    :param int multi_channels:      Number of output channels over which the events of each up- or down-channel are distributed
+    :param int idx_event_start:     Number of events emitted before, for distributing the events over output channels
+
+    :return (np.ndarray, np.ndarray): (timestep_ids, channel_ids) of the events
+    """
+    num_timesteps, size_in = inp.shape
+
+    # - Preallocate event arrays, to be extended if needed
+    timestep_ids = np.empty(max(inp.size, 1), np.int64)
+    channel_ids = np.empty(max(inp.size, 1), np.int64)
+    num_events = 0
+    idx_event = idx_event_start
+
+    for idx_t in range(num_timesteps):
+        for idx_in in range(size_in):
+            # - Decay mechanism
+            state[idx_in] *= decay_factor[idx_in]
+
+            if multiplex_spikes:
+                # - By how many times are the upper and lower thresholds exceeded
+                num_up = max(
+                    int(np.floor((inp[idx_t, idx_in] - state[idx_in]) / thr_up[idx_in])),
+                    0,
+                )
+                num_down = max(
+                    int(
+                        np.floor((state[idx_in] - inp[idx_t, idx_in]) / thr_down[idx_in])
+                    ),
+                    0,
+                )
+            else:
+                # - Are upper and lower thresholds passed
+                num_up = int(inp[idx_t, idx_in] > state[idx_in] + thr_up[idx_in])
+                num_down = int(inp[idx_t, idx_in] < state[idx_in] - thr_down[idx_in])
+
+            # - Update state
+            state[idx_in] += thr_up[idx_in] * num_up
+            state[idx_in] -= thr_down[idx_in] * num_down
+
+            # - Extend event arrays if necessary
+            num_new = (num_up + num_down) * repeat_output
+            if num_events + num_new > timestep_ids.size:
+                size_new = max(2 * timestep_ids.size, num_events + num_new)
+                timestep_ids_new = np.empty(size_new, np.int64)
+                channel_ids_new = np.empty(size_new, np.int64)
+                timestep_ids_new[:num_events] = timestep_ids[:num_events]
+                channel_ids_new[:num_events] = channel_ids[:num_events]
+                timestep_ids = timestep_ids_new
+                channel_ids = channel_ids_new
+
+            # - Emit up-events on channel 2*idx_in and down-events on 2*idx_in+1
+            for idx_new in range(num_new):
+                channel = 2 * idx_in + int(idx_new >= num_up * repeat_output)
+                timestep_ids[num_events] = idx_t
+                channel_ids[num_events] = (
+                    channel * multi_channels + idx_event % multi_channels
+                )
+                num_events += 1
+                idx_event += 1
+
+    return timestep_ids[:num_events], channel_ids[:num_events]
+
 ## - FFUpDown - Class: Define a spiking feedforward layer to convert analogue inputs to up and down channels
 class FFUpDown(Layer):
     """
@@ -136,48 +224,25 @@ class FFUpDown(Layer):
         #         + " or decreasing vtThrUp and vtTrhDown."
         #     )
 
-        # - Matrix for collecting output spike raster
-        mnOutputSpikes = np.zeros((num_timesteps, 2 * self.size_in))
-
-        # # - Record states for debugging
-        # record = np.zeros((num_timesteps, self.size_in))
-
         # - Iterate over batches and run evolution
+        list_ts_spike = []
+        list_spike_ids = []
         idx_curr = 0
+        num_events = 0
         for matr_input_curr, num_ts_curr in self._batch_data(
             inp, num_timesteps, self.max_num_timesteps
         ):
-            # (
-            #     mnOutputSpikes[idx_curr : idx_curr+num_ts_curr],
-            #     record[idx_curr : idx_curr+num_ts_curr]
-            # ) = self._single_batch_evolution(
-            mnOutputSpikes[
-                idx_curr : idx_curr + num_ts_curr
-            ] = self._single_batch_evolution(matr_input_curr, num_ts_curr, verbose)
+            vnTSSpike, spike_ids = self._single_batch_evolution(
+                matr_input_curr, num_ts_curr, num_events, verbose
+            )
+            list_ts_spike.append(vnTSSpike + idx_curr)
+            list_spike_ids.append(spike_ids)
             idx_curr += num_ts_curr
+            num_events += spike_ids.size
 
-        ## -- Distribute output spikes over output channels by assigning to each channel
-        ##    an interval of length self._multi_channels.
-        # - Set each event to the first element of its corresponding interval
-        vnTSSpike, spike_ids = np.nonzero(mnOutputSpikes)
-        if self.multiplex_spikes:
-            # - How many times is each spike repeated
-            vnSpikeCounts = mnOutputSpikes[vnTSSpike, spike_ids].astype(int)
-            vnTSSpike = vnTSSpike.repeat(vnSpikeCounts)
-            spike_ids = spike_ids.repeat(vnSpikeCounts)
-        if self.repeat_output > 1:
-            # - Repeat output spikes
-            spike_ids = spike_ids.repeat(self.repeat_output)
-            vnTSSpike = vnTSSpike.repeat(self.repeat_output)
-        if self._multi_channels > 1:
-            # - Add a repeating series of (0,1,2,..,self._multi_channels) to distribute the
-            #   events over the interval
-            spike_ids *= self._multi_channels
-            vnDistribute = np.tile(
-                np.arange(self._multi_channels),
-                int(np.ceil(spike_ids.size / self._multi_channels)),
-            )[: spike_ids.size]
-            spike_ids += vnDistribute
+        # - Output events are already repeated and distributed over output channels
+        vnTSSpike = np.concatenate(list_ts_spike)
+        spike_ids = np.concatenate(list_spike_ids)
 
         # self.tsRecord = TSContinuous(self.dt * (np.arange(num_timesteps) + self._timestep), record)
 
@@ -224,63 +289,46 @@ class FFUpDown(Layer):
 
     # @profile
     def _single_batch_evolution(
-        self, inp: np.ndarray, num_timesteps: int, verbose: bool = False
-    ) -> TSEvent:
+        self,
+        inp: np.ndarray,
+        num_timesteps: int,
+        idx_event_start: int = 0,
+        verbose: bool = False,
+    ) -> (np.ndarray, np.ndarray):
         """
         evolve : Function to evolve the states of this layer given an input for a single batch
 
-        :param inp:     np.ndarray   Input
-        :param num_timesteps:   int      Number of evolution time steps
-        :param verbose:        bool     Currently no effect, just for conformity
-        :return:            TSEvent  output spike series
+        :param inp:             np.ndarray  Input
+        :param num_timesteps:   int         Number of evolution time steps
+        :param idx_event_start: int         Number of events emitted in previous batches of this evolution
+        :param verbose:         bool        Currently no effect, just for conformity
+        :return:                (np.ndarray, np.ndarray)    Time step indices and output channels of events
 
         """
 
-        # - Prepare local variables
-        thr_up = self.thr_up
-        thr_down = self.thr_down
-        vfDecayFactor = self._vfDecayFactor
-
-        # - Arrays for collecting spikes
-        spike_raster = np.zeros((num_timesteps, 2 * self.size_in))
-
-        # record = np.zeros((num_timesteps, self.size_in))
-
         # - Initialize state for comparing values: If self.state exists, assume input continues from
         #   previous evolution. Otherwise start with initial input data
-        state = inp[0] if self._state is None else self._state.copy()
-
-        for iCurrentTS in range(num_timesteps):
-            # - Decay mechanism
-            state *= vfDecayFactor
-
-            # record[iCurrentTS] = state.copy()
+        state = (
+            inp[0].astype(float) if self._state is None else self._state.astype(float)
+        )
 
-            if self.multiplex_spikes:
-                # - By how many times are the upper thresholds exceeded for each input
-                vnUp = np.clip(
-                    np.floor((inp[iCurrentTS] - state) / thr_up).astype(int), 0, None
-                )
-                # - By how many times are the lower thresholds exceeded for each input
-                vnDown = np.clip(
-                    np.floor((state - inp[iCurrentTS]) / thr_down).astype(int), 0, None
-                )
-            else:
-                # - Inputs where upper threshold is passed
-                vnUp = inp[iCurrentTS] > state + thr_up
-                # - Inputs where lower threshold is passed
-                vnDown = inp[iCurrentTS] < state - thr_down
-            # - Update state
-            state += thr_up * vnUp
-            state -= thr_down * vnDown
-            # - Append spikes to array
-            spike_raster[iCurrentTS, ::2] = vnUp
-            spike_raster[iCurrentTS, 1::2] = vnDown
+        # - Compiled evolution
+        vnTSSpike, spike_ids = _updown_events(
+            np.asarray(inp[:num_timesteps], dtype=float),
+            state,
+            self.thr_up.astype(float),
+            self.thr_down.astype(float),
+            self._vfDecayFactor.astype(float),
+            self.multiplex_spikes,
+            int(self.repeat_output),
+            self._multi_channels,
+            idx_event_start,
+        )
 
         # - Store state for future evolutions
-        self._state = state.copy()
+        self._state = state
 
-        return spike_raster  # , record
+        return vnTSSpike, spike_ids
 
     def reset_state(self):
         # - Store None as state to indicate that future evolutions do not continue from previous input
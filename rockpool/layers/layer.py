@@ -1,10 +1,12 @@
 from warnings import warn
 from abc import ABC, abstractmethod
 from functools import reduce
-from typing import Optional, Any
+from copy import copy
+from typing import Optional, Any, List, Union
 import json
 
 import numpy as np
+from scipy.sparse import csr_matrix, issparse
 
 from ..timeseries import TimeSeries, TSContinuous, TSEvent
 from ..utilities import to_scalar
@@ -205,6 +207,7 @@ class Layer(ABC):
         ts_input: Optional[TSEvent] = None,
         duration: Optional[float] = None,
         num_timesteps: Optional[int] = None,
+        sparse: bool = False,
     ) -> (np.ndarray, int):
         """
         Sample input from a :py:class:`TSEvent` time series, set up evolution time base
@@ -214,9 +217,10 @@ class Layer(ABC):
         :param Optional[TSEvent] ts_input:  TimeSeries of TxM or Tx1 Input signals for this layer
         :param Optional[float] duration:    Duration of the desired evolution, in seconds. If not provided, then either ``num_timesteps`` or the duration of ``ts_input`` will determine evolution itme
         :param Optional[int] num_timesteps: Number of evolution time steps, in units of ``.dt``. If not provided, then either ``duration`` or the duration of ``ts_input`` will determine evolution time
+        :param bool sparse:                 If ``True``, return the raster as a :py:class:`scipy.sparse.csr_matrix` (see :py:meth:`.TSEvent.raster_sparse`). Default: ``False``, return a dense raster
 
         :return (ndarray, int):
-            spike_raster:   Boolean or integer raster containing spike information. T1xM array
+            spike_raster:   Boolean or integer raster containing spike information. T1xM array, or sparse CSR matrix if ``sparse`` is ``True``
             num_timesteps:  Actual number of evolution time steps, in units of ``.dt``
         """
         num_timesteps = self._determine_timesteps(ts_input, duration, num_timesteps)
@@ -227,7 +231,8 @@ class Layer(ABC):
         # - Extract spike timings and channels
         if ts_input is not None:
             # Extract spike data from the input variable
-            spike_raster = ts_input.raster(
+            rasterize = ts_input.raster_sparse if sparse else ts_input.raster
+            spike_raster = rasterize(
                 dt=self.dt,
                 t_start=self.t,
                 num_timesteps=num_timesteps + 1,
@@ -238,6 +243,9 @@ class Layer(ABC):
             # - Make sure duration of raster is correct
             spike_raster = spike_raster[: num_timesteps + 1, :]
 
+        elif sparse:
+            spike_raster = csr_matrix((num_timesteps + 1, self.size_in))
+
         else:
             spike_raster = np.zeros((num_timesteps + 1, self.size_in))
 
@@ -246,17 +254,83 @@ class Layer(ABC):
 
         return time_base, spike_raster, num_timesteps
 
+    def _prepare_input_batch(
+        self,
+        inputs: Union[np.ndarray, List[TimeSeries]],
+        duration: Optional[float] = None,
+        num_timesteps: Optional[int] = None,
+    ) -> (np.ndarray, np.ndarray, int):
+        """
+        Prepare input for a batch of trials, set up a common evolution time base
+
+        Each trial is evolved over the same time base, starting at :py:attr:`.t`. Input time series are sampled with :py:meth:`._prepare_input`, or rasterised with :py:meth:`._prepare_input_events` if the layer takes :py:class:`.TSEvent` input.
+
+        :param Union[ndarray, List[TimeSeries]] inputs: Either a ``[B, T, M]`` array of input samples on the evolution time base, or a list of ``B`` input time series
+        :param Optional[float] duration:        Duration of each trial, in seconds. If not provided, then either ``num_timesteps`` or the duration of the input will determine the evolution time
+        :param Optional[int] num_timesteps:     Number of evolution time steps of each trial, in units of ``.dt``. If not provided, then either ``duration`` or the duration of the input will determine the evolution time
+
+        :return (ndarray, ndarray, int): (time_base, input_steps, num_timesteps)
+            time_base:      T1 Discretised time base for evolution
+            input_steps:    (BxT1xM) Discretised input signal for each trial
+            num_timesteps:  Actual number of evolution time steps, in units of ``.dt``
+        """
+        if isinstance(inputs, np.ndarray) or not isinstance(inputs[0], TimeSeries):
+            # - Input samples are provided directly
+            inputs = np.asarray(inputs, float)
+            if inputs.ndim != 3:
+                raise ValueError(
+                    f"Layer `{self.name}`: Batched input must be a [B, T, M] array or a list of time series."
+                )
+            if num_timesteps is None:
+                if duration is None:
+                    num_timesteps = inputs.shape[1] - 1
+                else:
+                    num_timesteps = int(np.floor((duration + tol_abs) / self.dt))
+            if inputs.shape[1] < num_timesteps + 1:
+                raise ValueError(
+                    f"Layer `{self.name}`: Batched input provides {inputs.shape[1]} samples, "
+                    + f"but {num_timesteps + 1} are required."
+                )
+
+            # - Check input dimensions for each trial
+            input_steps = np.stack(
+                [self._check_input_dims(inp[: num_timesteps + 1]) for inp in inputs]
+            )
+            time_base = self._gen_time_trace(self.t, num_timesteps)
+
+        else:
+            # - Sample or rasterise each input time series over a common time base
+            num_timesteps = self._determine_timesteps(
+                inputs[0], duration, num_timesteps
+            )
+            if issubclass(self.input_type, TSEvent):
+                prepare_input = self._prepare_input_events
+            else:
+                prepare_input = self._prepare_input
+            trials = [prepare_input(ts, num_timesteps=num_timesteps) for ts in inputs]
+            time_base = trials[0][0]
+            input_steps = np.stack([np.asarray(trial[1], float) for trial in trials])
+
+        return time_base, input_steps, num_timesteps
+
     def _check_input_dims(self, inp: np.ndarray) -> np.ndarray:
         """
         Verify if dimensions of an input matches this layer instance
 
         If input dimension == 1, scale it up to self._size_in by repeating signal.
 
-        :param ndarray inp: ArrayLike containing input data
+        :param ndarray inp: ArrayLike containing input data, or a sparse matrix
         :return ndarray: ``inp``, possibly with dimensions repeated
         """
         # - Replicate input data if necessary
-        if inp.ndim == 1 or (inp.ndim > 1 and inp.shape[1]) == 1:
+        if issparse(inp) and inp.shape[1] == 1:
+            if self.size_in > 1:
+                warn(
+                    f"Layer `{self.name}`: Only one channel provided in input - will "
+                    + f"be copied to all {self.size_in} input channels."
+                )
+            inp = inp.tocsc()[:, np.zeros(self._size_in, int)].tocsr()
+        elif inp.ndim == 1 or (inp.ndim > 1 and inp.shape[1]) == 1:
             if self.size_in > 1:
                 warn(
                     f"Layer `{self.name}`: Only one channel provided in input - will "
@@ -430,6 +504,27 @@ class Layer(ABC):
     #     """
     #     pass
 
+    def warmup(self, num_timesteps: int = 1):
+        """
+        Compile the evolution functions of this layer ahead of time
+
+        Evolves the layer with zero input for ``num_timesteps`` time steps, so that any compiled kernels are built before the layer is used. Afterwards the clock, state and all other attributes of the layer are restored, so that warming up has no effect on later evolutions. Layers that pad their input to bucket lengths are compiled for the bucket that holds ``num_timesteps``.
+
+        :param int num_timesteps:   Number of time steps to evolve the layer for. Default: ``1``
+        """
+        # - Store attributes, copying containers that may be updated in place
+        attributes = {
+            name: copy(value) if isinstance(value, (np.ndarray, list, dict)) else value
+            for name, value in self.__dict__.items()
+        }
+
+        try:
+            self.evolve(num_timesteps=num_timesteps)
+        finally:
+            # - Restore layer
+            self.__dict__.clear()
+            self.__dict__.update(attributes)
+
     def reset_time(self):
         """
         Reset the internal clock of this layer to 0
@@ -7,8 +7,9 @@ rr_trained_layer.py - Define a super class that layers can inherit from if they
 
 # - Built-ins
 from abc import ABC, abstractmethod
-from typing import Union, Dict, Optional
+from typing import Union, Dict, Optional, List, Iterable, Tuple
 from warnings import warn
+from multiprocessing import Pool, cpu_count
 
 # - Third party packages
 import numpy as np
@@ -27,7 +28,7 @@ class RRTrainedLayer(Layer, ABC):
 
     When writing a new layer class, simply inherit from `.RRTrainedLayer` instead of from `.Layer`. Subclasses must provide a concrete implementation of the the `._prepare_training_data` abstract method. See the documentation for that method below, to understand how this can be implemented. `.RRTrainedLayer` provides an implementation that can be called with :py:func:`super`.
 
-    This class provides the `.train_rr` method, which performs ridge regression training over multiple batches, called independently for each batch.
+    This class provides the `.train_rr` method, which performs ridge regression training over multiple batches, called independently for each batch. `.train_rr_parallel` trains on many independent data shards at once, in parallel worker processes.
 
     `.RRTrainedLayer` also provides the `._batch_update` private method
 
@@ -38,7 +39,7 @@ class RRTrainedLayer(Layer, ABC):
         self,
         ts_target: TSContinuous,
         ts_input: Optional[Union[TSEvent, TSContinuous]] = None,
-        regularize: float = 0,
+        regularize: Union[float, List[float], np.ndarray] = 0,
         is_first: bool = True,
         is_last: bool = False,
         train_biases: bool = True,
@@ -53,7 +54,7 @@ class RRTrainedLayer(Layer, ABC):
 
         :param TSContinuous ts_target:                      Target signal for current batch
         :param Optional[TimeSeries] ts_input:               Input to layer for current batch. Default: ``None``, no input for this batch
-        :param float regularize:                  Regularization parameter for ridge regression. Default: ``0``, no regularization
+        :param Union[float, ArrayLike] regularize:    Regularization parameter for ridge regression. If several values are provided, weights are computed for all of them from a single eigendecomposition, and the value with the lowest generalized cross-validation score is used for the layer. Default: ``0``, no regularization
         :param bool is_first:                     Set to ``True`` if current batch is the first in training. Default: ``True``, initialise training with this batch as the first batch
         :param bool is_last:                      Set to ``True`` if current batch is the last in training. This has the same effect as if data from both trainings were presented at once.
         :param bool train_biases:                 If ``True``, train biases as if they were weights. Otherwise present biases will be ignored in training and not be changed. Default: ``True``, train biases as well as weights
@@ -67,6 +68,7 @@ class RRTrainedLayer(Layer, ABC):
             If ``return_training_progress`` is ``True``, return a dict with current training variables (xtx, xty, kahan_comp_xtx, kahan_comp_xty).
             Weights and biases are returned if ``is_last`` is ``True`` or if ``calc_intermediate_results`` is ``True``.
             If ``return_trained_output`` is ``True``, the dict contains the output of evolving the layer with the newly trained weights.
+            If several regularization parameters are provided, the training progress contains the selected parameter (``regularize_best``) and the weights, biases and scores for all parameters (``regularization_path``), whenever weights are updated.
         """
         inp, target, time_base = self._prepare_training_data(
             ts_target=ts_target, ts_input=ts_input, is_first=is_first, is_last=is_last
@@ -89,7 +91,7 @@ class RRTrainedLayer(Layer, ABC):
                 ("regularize", "fisher_relabelling", "standardize", "train_biases"),
             ):
                 old_val = getattr(self.trainer, name)
-                if old_val != new_val:
+                if not np.array_equal(old_val, new_val):
                     warn(
                         self.start_print
                         + f"Parameter `{name}` ({new_val}) differs from first "
@@ -121,6 +123,82 @@ class RRTrainedLayer(Layer, ABC):
         if return_trained_output or return_training_progress:
             return tr_data
 
+    def train_rr_parallel(
+        self,
+        shards: Iterable[Tuple[TSContinuous, Optional[TimeSeries]]],
+        regularize: Union[float, List[float], np.ndarray] = 0,
+        n_workers: Optional[int] = None,
+        train_biases: bool = True,
+        fisher_relabelling: bool = False,
+    ) -> Dict:
+        """
+        Train this layer with ridge regression on independent data shards, in parallel worker processes
+
+        The layer is serialised once with :py:meth:`.to_dict` and rebuilt in each worker process. The shards are split into one group per worker. Each worker prepares the training data for its shards, e.g. by filtering input spike trains, and accumulates the training statistics of its group. The statistics of all workers are then merged with Kahan compensation, and the weights are computed once from the merged statistics. The result is the same as training sequentially over all shards with :py:meth:`.train_rr`, except that layer states are not carried over from one shard to the next.
+
+        To distribute training over several machines, accumulate statistics with a :py:class:`.RidgeRegrTrainer` on each machine and combine them with :py:meth:`.RidgeRegrTrainer.get_statistics` and :py:meth:`.RidgeRegrTrainer.merge_statistics`.
+
+        :param Iterable[Tuple[TSContinuous, Optional[TimeSeries]]] shards:  (ts_target, ts_input) tuple for each data shard
+        :param Union[float, ArrayLike] regularize:  Regularization parameter for ridge regression. See :py:meth:`.train_rr`. Default: ``0``, no regularization
+        :param Optional[int] n_workers:             Number of worker processes. If ``1``, shards are processed sequentially in this process. Default: ``None``, use one worker per CPU core
+        :param bool train_biases:                   If ``True``, train biases as if they were weights. Default: ``True``, train biases as well as weights
+        :param bool fisher_relabelling:             If ``True``, relabel target data such that the training algorithm is equivalent to Fisher discriminant analysis. Default: ``False``, use standard ridge / linear regression
+
+        :return dict:   Dict with training variables of the merged statistics (xtx, xty, kahan_comp_xtx, kahan_comp_xty, num_samples), the trained weights and biases and, if several regularization parameters are provided, ``regularize_best`` and ``regularization_path``.
+        """
+        trainer_args = dict(
+            num_features=self.size_in,
+            num_outputs=self.size_out,
+            regularize=regularize,
+            fisher_relabelling=fisher_relabelling,
+            standardize=False,
+            train_biases=train_biases,
+        )
+        self.trainer = RidgeRegrTrainer(**trainer_args)
+
+        shards = list(shards)
+        if n_workers == 1:
+            # - Process all shards with this layer
+            self.trainer.merge_statistics(
+                _shard_statistics(self, shards, trainer_args)
+            )
+
+        else:
+            n_workers = cpu_count() if n_workers is None else n_workers
+            groups = [shards[i::n_workers] for i in range(n_workers)]
+            groups = [g for g in groups if g]
+            with Pool(
+                len(groups),
+                initializer=_init_rr_worker,
+                initargs=(type(self), self.to_dict(), trainer_args),
+            ) as pool:
+                for statistics in pool.imap_unordered(_train_rr_shards, groups):
+                    self.trainer.merge_statistics(statistics)
+
+        # - Compute weights from merged statistics
+        self.trainer.update_model()
+        self.weights = self.trainer.weights
+        if train_biases:
+            self.bias = self.trainer.bias
+
+        training_progress = dict(
+            xtx=self.trainer.xtx,
+            xty=self.trainer.xty,
+            kahan_comp_xtx=self.trainer.kahan_comp_xtx,
+            kahan_comp_xty=self.trainer.kahan_comp_xty,
+            num_samples=self.trainer.num_samples,
+            weights=self.trainer.weights,
+        )
+        if train_biases:
+            training_progress["biases"] = self.trainer.bias
+        if hasattr(self.trainer, "regularization_path"):
+            training_progress.update(
+                regularize_best=self.trainer.regularize_best,
+                regularization_path=self.trainer.regularization_path,
+            )
+
+        return dict(training_progress=training_progress)
+
     def _batch_update(
         self,
         inp: np.ndarray,
@@ -170,6 +248,11 @@ class RRTrainedLayer(Layer, ABC):
                 training_data["training_progress"]["weights"] = self.trainer.weights
                 if train_biases:
                     training_data["training_progress"]["biases"] = self.trainer.bias
+                if hasattr(self.trainer, "regularization_path"):
+                    training_data["training_progress"].update(
+                        regularize_best=self.trainer.regularize_best,
+                        regularization_path=self.trainer.regularization_path,
+                    )
 
         if reset:
             self.trainer.reset()
@@ -257,3 +340,60 @@ class RRTrainedLayer(Layer, ABC):
             )
 
         return None, target, time_base
+
+
+### --- Helper functions for parallel training
+
+# - Layer instance and trainer settings of a worker process in `RRTrainedLayer.train_rr_parallel`
+_worker_layer = None
+_worker_trainer_args = None
+
+
+def _init_rr_worker(cls_layer: type, config: dict, trainer_args: dict):
+    """
+    Rebuild a layer in a worker process of `RRTrainedLayer.train_rr_parallel`
+
+    :param type cls_layer:      Class of the layer
+    :param dict config:         Layer parameters, as returned by `Layer.to_dict`
+    :param dict trainer_args:   Arguments for the `RidgeRegrTrainer` of the worker
+    """
+    global _worker_layer, _worker_trainer_args
+
+    # - Make sure that workers do not share the random state of the parent process
+    np.random.seed()
+
+    _worker_layer = cls_layer.load_from_dict(config)
+    _worker_trainer_args = trainer_args
+
+
+def _train_rr_shards(shards: List[Tuple]) -> Dict:
+    """
+    Accumulate training statistics of the worker layer over a group of shards
+
+    :param List[Tuple] shards:  (ts_target, ts_input) tuple for each shard
+
+    :return dict:               Statistics, as returned by `RidgeRegrTrainer.get_statistics`
+    """
+    return _shard_statistics(_worker_layer, shards, _worker_trainer_args)
+
+
+def _shard_statistics(
+    layer: RRTrainedLayer, shards: List[Tuple], trainer_args: dict
+) -> Dict:
+    """
+    Accumulate training statistics of a layer over independent data shards
+
+    :param RRTrainedLayer layer:    Layer that prepares the training data
+    :param List[Tuple] shards:      (ts_target, ts_input) tuple for each shard
+    :param dict trainer_args:       Arguments for the `RidgeRegrTrainer`
+
+    :return dict:                   Statistics, as returned by `RidgeRegrTrainer.get_statistics`
+    """
+    trainer = RidgeRegrTrainer(**trainer_args)
+    for ts_target, ts_input in shards:
+        # - Each shard is complete, so that no samples are discarded or carried over
+        inp, target, __ = layer._prepare_training_data(
+            ts_target=ts_target, ts_input=ts_input, is_first=True, is_last=True
+        )
+        trainer.train_batch(inp, target)
+    return trainer.get_statistics()
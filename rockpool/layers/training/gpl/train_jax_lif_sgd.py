@@ -3,15 +3,17 @@
 ##
 
 import itertools
-from typing import Callable, Tuple, Union, Optional, Dict
+from typing import Callable, Tuple, Union, Optional, Dict, List
 import types
 
 import jax.numpy as jnp
 import numpy as np
 from jax.experimental.optimizers import adam
-from jax import grad, jit
+from jax import grad, jit, vmap
+from jax.lax import fori_loop
 
 from rockpool.timeseries import TimeSeries, TSContinuous, TSEvent
+from rockpool.utilities import pad_to_bucket, masked_mean
 from ...gpl import lif_jax as lj
 
 
@@ -70,6 +72,98 @@ def apply_params(self, params: Dict) -> None:
     )
 
 
+def _get_loss_mse_reg(self: lj.RecLIFJax) -> Tuple[Callable, Dict]:
+    """
+    Build the default loss function for training the weighted output of a Jax LIF layer
+
+    :param RecLIFJax self:  Layer to train
+
+    :return (Callable, Dict): (loss_mse_reg, loss_params)
+        loss_mse_reg:   Regularised mean-squared-error loss ``loss_mse_reg(params, batch, state, **loss_params) -> (loss, (state, dLoss, output_ts))``
+        loss_params:    Default parameters for ``loss_mse_reg``
+    """
+    # - Define default loss function
+    def loss_mse_reg(
+        params: Dict,
+        batch: Tuple,
+        state: Dict,
+        lambda_mse: float = 2.0,
+        reg_tau: float = 100.0,
+        reg_l2_in: float = 0.0,
+        reg_l2_rec: float = 1.0,
+        reg_l2_out: float = 0.0,
+        reg_act1: float = 1.0,
+        reg_act2: float = 1.0,
+        min_tau: float = 10.0 * self.dt,
+    ):
+        # - Access trial inputs, targets and valid time steps
+        sp_in_trial_ts, target_trial_ts = batch[:2]
+        valid_ts = batch[2] if len(batch) > 2 else None
+
+        # - Clip taus
+        params["tau_mem"] = jnp.clip(params["tau_mem"], min_tau)
+        params["tau_syn"] = jnp.clip(params["tau_syn"], min_tau)
+
+        # - Evolve network
+        state, _, output_ts, surrograte_ts, _, Vmem_ts, _ = self._evolve_jit(
+            state,
+            params["w_in"],
+            params["w_rec"],
+            params["w_out"],
+            params["tau_mem"],
+            params["tau_syn"],
+            params["bias"],
+            self._noise_std,
+            sp_in_trial_ts,
+            sp_in_trial_ts * 0.0,
+            self._rng_key,
+            self._dt,
+            valid_ts,
+        )
+
+        # - MSE between output and target
+        dLoss = dict()
+        dLoss["loss_mse"] = lambda_mse * masked_mean(
+            (output_ts - target_trial_ts) ** 2, valid_ts
+        )
+
+        # Regularisation for taus
+        dLoss["loss_tau_mem"] = reg_tau * jnp.mean(
+            jnp.clip(-(params["tau_mem"] - min_tau - 1e-3), 0.0) ** 2
+        )
+        dLoss["loss_tau_syn"] = reg_tau * jnp.mean(
+            jnp.clip(-(params["tau_syn"] - min_tau - 1e-3), 0.0) ** 2
+        )
+
+        # - Regularisation for weights
+        dLoss["loss_weights_l2"] = (
+            reg_l2_in * jnp.mean(params["w_in"] ** 2)
+            + reg_l2_rec * jnp.mean(params["w_rec"] ** 2)
+            + reg_l2_out * jnp.mean(params["w_out"] ** 2)
+        )
+
+        # - Regularisation for activity
+        dLoss["loss_activity1"] = reg_act1 * masked_mean(surrograte_ts, valid_ts)
+        dLoss["loss_activity2"] = reg_act2 * masked_mean(Vmem_ts ** 2, valid_ts)
+
+        # - Return loss, as well as components
+        return sum(dLoss.values()), (state, dLoss, output_ts)
+
+    # - Default loss parameters
+    default_loss_params = {
+        "lambda_mse": 2.0,
+        "reg_tau": 100.0,
+        "reg_l2_in": 0.0,
+        "reg_l2_rec": 1.0,
+        "reg_l2_out": 0.0,
+        "reg_act1": 1.0,
+        "reg_act2": 1.0,
+        "min_tau": self._dt * 10.0,
+    }
+
+    return loss_mse_reg, default_loss_params
+
+
 # - Training function
 def train_output_target(
     self: lj.RecLIFJax,
@@ -81,6 +175,7 @@ def train_output_target(
     loss_params: Dict = {},
     optimizer: Callable = adam,
     opt_params: Dict = {"step_size": 1e-4},
+    checkpoint_segment: Optional[int] = None,
 ):
     """
     Train the weighted output of a Jax LIF layer to match a target signal
@@ -112,7 +207,7 @@ def train_output_target(
 
     .. Providing your own `loss_fcn` function
 
-    Your `loss_fcn` function must accept arguments `params`, `batch` and `state`. `batch` is a Tuple (`ts_input`, `ts_target`) for the current trial. `params` is a dictionary containing the layer parameters to be evaluated on this trial.
+    Your `loss_fcn` function must accept arguments `params`, `batch` and `state`. `batch` is a Tuple (`ts_input`, `ts_target`) for the current trial. If the layer has `.time_buckets` set, inputs and targets are padded to the bucket length, so that compiled training functions are reused for trials of different durations. `batch` is then a Tuple (`ts_input`, `ts_target`, `valid_ts`), where `valid_ts` is a boolean mask of the valid time steps, which should be passed on to :py:meth:`~._evolve_jit`. `params` is a dictionary containing the layer parameters to be evaluated on this trial.
 
     The return signature for `loss_fcn` must be `return loss, (state, ...)`. You may return any extra variables you like in the second tuple, but this must be a tuple, and must contain the updated layer state as the first element of the tuple.
 
@@ -129,101 +224,30 @@ def train_output_target(
     :param bool loss_has_aux:       boolean flag, `True` if `loss` returns several
     :param Callable optimizer:      A JAX-style optimizer function. See the JAX docs for details. Default: `jax.experimental.optimizers.adam`
     :param Dict opt_params:         A dictionary of parameters passed to `optimizer`. Default: {"step_size": 1e-4}
+    :param Optional[int] checkpoint_segment:    If provided, set `.checkpoint_segment` of the layer on the first trial, so that the evolution is rematerialised in segments of this many time steps when computing gradients. This reduces memory use on long trials at the cost of recomputation. Default: ``None``, keep the current setting of the layer
 
     :return (Callable, Callable): (loss_fcn, grad_fcn)
         loss_fcn:   Returns the output of the loss function for the current trial
         grad_fcn:   Returns the gradient of the loss function for the current trial
     """
-    # - Define default loss function
-    def loss_mse_reg(
-        params: Dict,
-        batch: Tuple,
-        state: Dict,
-        lambda_mse: float = 2.0,
-        reg_tau: float = 100.0,
-        reg_l2_in: float = 0.0,
-        reg_l2_rec: float = 1.0,
-        reg_l2_out: float = 0.0,
-        reg_act1: float = 1.0,
-        reg_act2: float = 1.0,
-        min_tau: float = 10.0 * self.dt,
-    ):
-        # - Access trial inputs and targets
-        sp_in_trial_ts, target_trial_ts = batch
-
-        # - Clip taus
-        params["tau_mem"] = jnp.clip(params["tau_mem"], min_tau)
-        params["tau_syn"] = jnp.clip(params["tau_syn"], min_tau)
-
-        # - Evolve network
-        state, _, output_ts, surrograte_ts, _, Vmem_ts, _ = self._evolve_jit(
-            state,
-            params["w_in"],
-            params["w_rec"],
-            params["w_out"],
-            params["tau_mem"],
-            params["tau_syn"],
-            params["bias"],
-            self._noise_std,
-            sp_in_trial_ts,
-            sp_in_trial_ts * 0.0,
-            self._rng_key,
-            self._dt,
-        )
-
-        # - MSE between output and target
-        dLoss = dict()
-        dLoss["loss_mse"] = lambda_mse * jnp.mean((output_ts - target_trial_ts) ** 2)
-
-        # Regularisation for taus
-        dLoss["loss_tau_mem"] = reg_tau * jnp.mean(
-            jnp.clip(-(params["tau_mem"] - min_tau - 1e-3), 0.0) ** 2
-        )
-        dLoss["loss_tau_syn"] = reg_tau * jnp.mean(
-            jnp.clip(-(params["tau_syn"] - min_tau - 1e-3), 0.0) ** 2
-        )
-
-        # - Regularisation for weights
-        dLoss["loss_weights_l2"] = (
-            reg_l2_in * jnp.mean(params["w_in"] ** 2)
-            + reg_l2_rec * jnp.mean(params["w_rec"] ** 2)
-            + reg_l2_out * jnp.mean(params["w_out"] ** 2)
-        )
-
-        # - Regularisation for activity
-        dLoss["loss_activity1"] = reg_act1 * jnp.mean(surrograte_ts)
-        dLoss["loss_activity2"] = reg_act2 * jnp.mean(Vmem_ts ** 2)
-
-        # - Return loss, as well as components
-        return sum(dLoss.values()), (state, dLoss, output_ts)
-
     # - Initialise training
     initialise = is_first or not hasattr(self, "__in_training_sgd_adam")
 
     if initialise:
+        # - Rematerialise evolution in segments when differentiating
+        if checkpoint_segment is not None:
+            self.checkpoint_segment = checkpoint_segment
+
         # - Get optimiser
         (opt_init, self.__opt_update, self.__get_params) = optimizer(**opt_params)
 
         # - If using default loss, set up parameters
         if loss_fcn is None:
-            loss_fcn = loss_mse_reg
-            default_loss_params = {
-                "lambda_mse": 2.0,
-                "reg_tau": 100.0,
-                "reg_l2_in": 0.0,
-                "reg_l2_rec": 1.0,
-                "reg_l2_out": 0.0,
-                "reg_act1": 1.0,
-                "reg_act2": 1.0,
-                "min_tau": self._dt * 10.0,
-            }
+            loss_fcn, default_loss_params = _get_loss_mse_reg(self)
             default_loss_params.update(loss_params)
             loss_params = default_loss_params
 
         # - Record loss and gradient functions
-        if loss_fcn is None:
-            loss_fcn = loss_mse_reg
-
         def loss_curried(opt_params: Dict, batch: Tuple, state: Dict):
             return loss_fcn(opt_params, batch, state, **loss_params)
 
@@ -267,9 +291,19 @@ def train_output_target(
         inps_sp = ts_input
         target = ts_target
 
+    if self.time_buckets is None:
+        batch = (inps_sp, target)
+    else:
+        # - Pad inputs and targets to bucket length, to reuse compiled training functions
+        inps_sp, valid_ts, self.bucket_last_evolution = pad_to_bucket(
+            inps_sp, self.time_buckets
+        )
+        target, _, _ = pad_to_bucket(target, self.time_buckets)
+        batch = (inps_sp, target, valid_ts)
+
     # - Perform one step of optimisation
     self.__opt_state, self._state = self.__update_fcn(
-        next(self.__itercount), self.__opt_state, (inps_sp, target)
+        next(self.__itercount), self.__opt_state, batch
     )
 
     # - Apply the parameter updates
@@ -281,31 +315,142 @@ def train_output_target(
 
     # - Execute loss and grad functions to ensure compilation
     if initialise:
-        self.__grad_fcn(
-            self.__get_params(self.__opt_state), (inps_sp, target), self._state
-        )
-        self.__loss_fcn(
-            self.__get_params(self.__opt_state), (inps_sp, target), self._state
-        )
+        self.__grad_fcn(self.__get_params(self.__opt_state), batch, self._state)
+        self.__loss_fcn(self.__get_params(self.__opt_state), batch, self._state)
 
     # - Return current loss, and lambdas that evaluate the loss and the gradient
     return (
         lambda: self.__loss_fcn(
-            self.__get_params(self.__opt_state), (inps_sp, target), self._state
+            self.__get_params(self.__opt_state), batch, self._state
         ),
         lambda: self.__grad_fcn(
-            self.__get_params(self.__opt_state), (inps_sp, target), self._state
+            self.__get_params(self.__opt_state), batch, self._state
         ),
     )
 
 
+def train_output_target_batch(
+    self: lj.RecLIFJax,
+    inputs: Union[np.ndarray, List[TimeSeries]],
+    targets: Union[np.ndarray, List[TSContinuous]],
+    num_steps: int = 1,
+    is_first: bool = True,
+    is_last: bool = False,
+    loss_fcn: Callable[[Dict, Tuple], float] = None,
+    loss_params: Dict = {},
+    optimizer: Callable = adam,
+    opt_params: Dict = {"step_size": 1e-4},
+    checkpoint_segment: Optional[int] = None,
+) -> float:
+    """
+    Train the weighted output of a Jax LIF layer on a batch of trials, with several optimiser steps on the device
+
+    The loss of each step is the mean of `loss_fcn` over all trials of the batch, which is computed in a single call that is vectorised over trials. All `num_steps` optimiser steps run inside one compiled loop, and the parameters of the layer are only updated once all steps are finished. This avoids transfers between host and device, and calls from python, for each step.
+
+    Loss functions and their parameters are as described for :py:meth:`.train_output_target`. Each trial starts from the layer state when training was initialised; the layer state and time are not updated. The auxiliary outputs of the loss function are discarded.
+
+    :param Union[np.ndarray, List[TimeSeries]] inputs:      Either a ``[B, T, I]`` array of input rasters, or a list of ``B`` input time series
+    :param Union[np.ndarray, List[TSContinuous]] targets:   Either a ``[B, T, O]`` array of targets on the same time base, or a list of ``B`` target time series
+    :param int num_steps:           Number of optimiser steps to perform on this batch. Default: ``1``
+    :param bool is_first:           Flag, `True` if this is the first training batch. If `True`, causes initialisation of the training algorithm. Default: `True`, this is the first batch
+    :param bool is_last:            Flag, `True` if this is the final training batch. If `True`, cleans up after training. Default: `False`, this is not the final batch
+    :param Callable loss_fcn:       Function that computes the loss for a single trial. Default: :py:func:`loss_mse_reg`
+    :param Dict loss_params:        A dictionary of loss function parameters to pass to the loss function. Must be configured on the first call. Default: Appropriate parameters for :py:func:`loss_mse_reg`.
+    :param Callable optimizer:      A JAX-style optimizer function. See the JAX docs for details. Default: `jax.experimental.optimizers.adam`
+    :param Dict opt_params:         A dictionary of parameters passed to `optimizer`. Default: {"step_size": 1e-4}
+    :param Optional[int] checkpoint_segment:    If provided, set `.checkpoint_segment` of the layer on the first batch. See :py:meth:`.train_output_target`. Default: ``None``, keep the current setting of the layer
+
+    :return float:                  Mean loss over the batch, after the final step
+    """
+    # - Initialise training
+    initialise = is_first or not hasattr(self, "__in_training_sgd_adam_batch")
+
+    if initialise:
+        # - Rematerialise evolution in segments when differentiating
+        if checkpoint_segment is not None:
+            self.checkpoint_segment = checkpoint_segment
+
+        # - Get optimiser
+        opt_init, opt_update, get_params = optimizer(**opt_params)
+        self.__get_params_batch = get_params
+
+        # - If using default loss, set up parameters
+        if loss_fcn is None:
+            loss_fcn, default_loss_params = _get_loss_mse_reg(self)
+            default_loss_params.update(loss_params)
+            loss_params = default_loss_params
+
+        # - Initial state for all trials
+        state0 = self._state
+
+        def loss_batch(params: Dict, batch: Tuple) -> float:
+            # - Map loss over trials; valid time steps are shared by all trials
+            trial_axes = (0, 0) if len(batch) == 2 else (0, 0, None)
+            losses, _ = vmap(
+                lambda trial: loss_fcn(params, trial, state0, **loss_params),
+                in_axes=(trial_axes,),
+            )(batch)
+            return jnp.mean(losses)
+
+        @jit
+        def train_steps(opt_state, step_start, num_steps, batch):
+            # - Perform optimiser steps in a compiled loop
+            def update(i, opt_state):
+                g = grad(loss_batch)(get_params(opt_state), batch)
+                return opt_update(step_start + i, g, opt_state)
+
+            opt_state = fori_loop(0, num_steps, update, opt_state)
+            return opt_state, loss_batch(get_params(opt_state), batch)
+
+        self.__train_steps = train_steps
+
+        # - Initialise optimimser
+        self.__opt_state_batch = opt_init(self.__pack_params())
+        self.__step_count_batch = 0
+
+        # - Assign "in training" flag
+        self.__in_training_sgd_adam_batch = True
+
+    # - Prepare time base, inputs and targets of all trials
+    time_base, inps_sp, num_timesteps = self._prepare_input_batch(inputs)
+    if isinstance(targets[0], TimeSeries):
+        target = np.stack([ts(time_base) for ts in targets])
+    else:
+        target = np.asarray(targets)[:, : inps_sp.shape[1]]
+
+    if self.time_buckets is None:
+        batch = (jnp.array(inps_sp), jnp.array(target))
+    else:
+        # - Pad inputs and targets to bucket length, to reuse compiled training functions
+        inps_sp, valid_ts, self.bucket_last_evolution = pad_to_bucket(
+            inps_sp, self.time_buckets, axis=1
+        )
+        target, _, _ = pad_to_bucket(target, self.time_buckets, axis=1)
+        batch = (jnp.array(inps_sp), jnp.array(target), valid_ts)
+
+    # - Perform optimisation steps on the device
+    self.__opt_state_batch, loss = self.__train_steps(
+        self.__opt_state_batch, self.__step_count_batch, num_steps, batch
+    )
+    self.__step_count_batch += num_steps
+
+    # - Apply the parameter updates
+    self.__apply_params(self.__get_params_batch(self.__opt_state_batch))
+
+    # - Reset status, on "is_last" flag
+    if is_last:
+        del self.__in_training_sgd_adam_batch
+
+    return float(loss)
+
+
 def add_shim_lif_jax_sgd(lyr) -> lj.RecLIFJax:
     """
     add_shim_lif_jax_sgd() - Insert methods that support gradient-based training of the reservoir
 
     :param lyr:     RecLIFJax subclass Pre-configured layer to train
 
-    This function adds the method `.train_output_target()` to the provided layer. Use this to perform training to match the reservoir output to a given target. See documentation for `.train_output_target()` for details.
+    This function adds the methods `.train_output_target()` and `.train_output_target_batch()` to the provided layer. Use these to perform training to match the reservoir output to a given target. See documentation for `.train_output_target()` and `.train_output_target_batch()` for details.
 
     :return: lyr:   RecLIFJax subclass Layer with added functions
     """
@@ -316,6 +461,7 @@ def add_shim_lif_jax_sgd(lyr) -> lj.RecLIFJax:
 
     # - Insert methods required for training
     lyr.train_output_target = types.MethodType(train_output_target, lyr)
+    lyr.train_output_target_batch = types.MethodType(train_output_target_batch, lyr)
     lyr.__pack_params = types.MethodType(pack_params, lyr)
     lyr.__apply_params = types.MethodType(apply_params, lyr)
 
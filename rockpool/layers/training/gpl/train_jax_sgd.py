@@ -3,14 +3,17 @@
 ##
 
 import itertools
-from typing import Callable, Tuple, Union, Optional, Dict
+from typing import Callable, Tuple, Union, Optional, Dict, List
 import types
 
 import jax.numpy as np
+import jax.random as rand
 from jax.experimental.optimizers import adam
-from jax import grad, jit
+from jax import grad, jit, vmap
+from jax.lax import fori_loop
 
 from rockpool.timeseries import TimeSeries, TSContinuous
+from rockpool.utilities import pad_to_bucket, masked_mean
 from ...gpl import rate_jax as rj
 
 
@@ -58,56 +61,40 @@ def apply_params(self: rj.RecRateEulerJax, params: Dict) -> None:
     )
 
 
-def train_adam(
-    self,
-    ts_input: Union[TSContinuous, np.ndarray],
-    ts_target: Union[TSContinuous, np.ndarray],
-    min_tau: Optional[float] = None,
-    is_first: bool = False,
-    is_last: bool = False,
-) -> Tuple[Callable[[], float], Callable[[], float]]:
+def _get_loss_output_target(
+    evolve_func: Callable,
+    x0: np.ndarray,
+    noise_std: float,
+    rng_key,
+    dt: float,
+    min_tau: float,
+) -> Callable[[Dict, Tuple], float]:
     """
-    Perform one trial of Adam stochastic gradient descent to train the reservoir
+    _get_loss_output_target() - Build the loss function for target versus output of a single trial
 
-    :param TimeSeries ts_input:    TimeSeries (or raw sampled signal) to use as input for this trial [TxI]
-    :param TimeSeries ts_target:    TimeSeries (or raw sampled signal) to use as target for this trial [TxO]
-    :param Optional[float] min_tau:    Minimum time constant to permit
-    :param bool is_first:    Flag to indicate this is the first trial. Resets learning and causes initialisation.
-    :param bool is_last:     Flag to indicate this is the last trial. Performs clean-up (not essential)
+    :param evolve_func: Callable Compiled evolution function of the layer
+    :param x0:          np.ndarray Initial state of the reservoir [N]
+    :param noise_std:   float Standard deviation of noise injected into reservoir units
+    :param rng_key:     Jax RNG key to use in noise generation
+    :param dt:          float Time step for forward Euler solver
+    :param min_tau:     float Minimum time constant to permit
 
-    Use this function to train the output of the reservoir to match a target, given an input stimulus. This function can
-    be called in a loop, passing in randomly-chosen training examples on each call. Parameters of the layer are updated
-    on each call of `.train_adam`, but the layer time and state are *not* updated.
-
-    :return:            (loss_fcn, grad_fcn):
-                            loss_fcn:   Callable[[], float] Function that returns the current loss
-                            grad_fcn:   Callable[[], float] Function that returns the gradient for the current batch
+    :return: Callable loss_output_target(params, batch, key) -> float
     """
 
-    # - Set a minimum tau, if not provided
-    if min_tau is None:
-        min_tau = self._dt * 10.0
-
-    # - Get static arguments
-    x0 = self._state
-    dt = self._dt
-    noise_std = self._noise_std
-    rng_key = self._rng_key
-    evolve_func = self._evolve_jit
-
-    # - Define loss function
-    @jit
-    def loss_output_target(params: dict, batch: Tuple) -> float:
+    def loss_output_target(params: dict, batch: Tuple, key=rng_key) -> float:
         """
         loss_output_target() - Loss function for target versus output
 
         :param params:      dict Dictionary of packed parameters
+        :param batch:       Tuple (inputs, targets, valid_ts) of this trial
+        :param key:         Jax RNG key to use in noise generation. Default: ``rng_key``
 
         :return: float: Current loss value
         """
 
-        # - Get inputs and targets for this batch
-        input_batch_t, target_batch_t = batch
+        # - Get inputs, targets and valid time steps for this batch
+        input_batch_t, target_batch_t, valid_ts = batch
 
         # - Call compiled Euler solver to evolve reservoir
         _, _, _, _, outputs = evolve_func(
@@ -119,12 +106,13 @@ def train_adam(
             params["tau"],
             input_batch_t,
             noise_std,
-            rng_key,
+            key,
             dt,
+            valid_ts,
         )
 
-        # - Measure output-target loss
-        mse = np.mean((outputs - target_batch_t) ** 2)
+        # - Measure output-target loss over valid time steps
+        mse = masked_mean((outputs - target_batch_t) ** 2, valid_ts)
 
         # - Get loss for tau parameter constraints
         tau_loss = 10000 * np.mean(
@@ -140,6 +128,54 @@ def train_adam(
         # - Return loss
         return fLoss
 
+    return loss_output_target
+
+
+def train_adam(
+    self,
+    ts_input: Union[TSContinuous, np.ndarray],
+    ts_target: Union[TSContinuous, np.ndarray],
+    min_tau: Optional[float] = None,
+    is_first: bool = False,
+    is_last: bool = False,
+) -> Tuple[Callable[[], float], Callable[[], float]]:
+    """
+    Perform one trial of Adam stochastic gradient descent to train the reservoir
+
+    :param TimeSeries ts_input:    TimeSeries (or raw sampled signal) to use as input for this trial [TxI]
+    :param TimeSeries ts_target:    TimeSeries (or raw sampled signal) to use as target for this trial [TxO]
+    :param Optional[float] min_tau:    Minimum time constant to permit
+    :param bool is_first:    Flag to indicate this is the first trial. Resets learning and causes initialisation.
+    :param bool is_last:     Flag to indicate this is the last trial. Performs clean-up (not essential)
+
+    Use this function to train the output of the reservoir to match a target, given an input stimulus. This function can
+    be called in a loop, passing in randomly-chosen training examples on each call. Parameters of the layer are updated
+    on each call of `.train_adam`, but the layer time and state are *not* updated.
+
+    If the layer has `.time_buckets` set, inputs and targets are padded to the bucket length, so that the compiled
+    training functions are reused for trials of different durations. Padded time steps do not contribute to the loss.
+
+    :return:            (loss_fcn, grad_fcn):
+                            loss_fcn:   Callable[[], float] Function that returns the current loss
+                            grad_fcn:   Callable[[], float] Function that returns the gradient for the current batch
+    """
+
+    # - Set a minimum tau, if not provided
+    if min_tau is None:
+        min_tau = self._dt * 10.0
+
+    # - Get static arguments
+    x0 = self._state
+    dt = self._dt
+    noise_std = self._noise_std
+    rng_key = self._rng_key
+    evolve_func = self._evolve_jit
+
+    # - Define loss function
+    loss_output_target = jit(
+        _get_loss_output_target(evolve_func, x0, noise_std, rng_key, dt, min_tau)
+    )
+
     # - Initialise training
     initialise = is_first or not hasattr(self, "__in_training_sgd_adam")
 
@@ -184,9 +220,14 @@ def train_adam(
         inps = ts_input
         target = ts_target
 
+    # - Pad inputs and targets to bucket length, to reuse compiled training functions
+    inps, valid_ts, self.bucket_last_evolution = pad_to_bucket(inps, self.time_buckets)
+    target, _, _ = pad_to_bucket(target, self.time_buckets)
+    batch = (inps, target, valid_ts)
+
     # - Perform one step of optimisation
     self.__opt_state = self.__update_fcn(
-        next(self.__itercount), self.__opt_state, (inps, target)
+        next(self.__itercount), self.__opt_state, batch
     )
 
     # - Apply the parameter updates
@@ -198,9 +239,130 @@ def train_adam(
 
     # - Return lambdas that evaluate the loss and the gradient
     return (
-        lambda: self.__loss_fcn(self.__get_params(self.__opt_state), (inps, target)),
-        lambda: self.__grad_fcn(self.__get_params(self.__opt_state), (inps, target)),
+        lambda: self.__loss_fcn(self.__get_params(self.__opt_state), batch),
+        lambda: self.__grad_fcn(self.__get_params(self.__opt_state), batch),
+    )
+
+
+def train_adam_batch(
+    self,
+    inputs: Union[np.ndarray, List[TSContinuous]],
+    targets: Union[np.ndarray, List[TSContinuous]],
+    num_steps: int = 1,
+    min_tau: Optional[float] = None,
+    is_first: bool = False,
+    is_last: bool = False,
+) -> float:
+    """
+    Perform several steps of Adam gradient descent on a batch of trials, on the device
+
+    :param inputs:      Union[np.ndarray, List[TSContinuous]] Either a [B, T, I] array of input samples, or a list of B input time series
+    :param targets:     Union[np.ndarray, List[TSContinuous]] Either a [B, T, O] array of target samples on the same time base, or a list of B target time series
+    :param num_steps:   int Number of optimiser steps to perform on this batch. Default: 1
+    :param Optional[float] min_tau:    Minimum time constant to permit
+    :param bool is_first:    Flag to indicate this is the first batch. Resets learning and causes initialisation.
+    :param bool is_last:     Flag to indicate this is the last batch. Performs clean-up (not essential)
+
+    The loss of each step is the mean of the loss of `.train_adam` over all trials of the batch, computed in a single
+    vectorised call. All `num_steps` optimiser steps run inside one compiled loop, and the parameters of the layer are
+    only updated once all steps are finished. Each trial starts from the layer state when training was initialised, and
+    uses its own noise. The layer time and state are *not* updated.
+
+    If the layer has `.time_buckets` set, inputs and targets are padded to the bucket length, so that the compiled
+    training function is reused for trials of different durations.
+
+    :return: float: Mean loss over the batch, after the final step
+    """
+
+    # - Initialise training
+    initialise = is_first or not hasattr(self, "__in_training_sgd_adam_batch")
+
+    if initialise:
+        # - Set a minimum tau, if not provided
+        if min_tau is None:
+            min_tau = self._dt * 10.0
+
+        # - Get loss function for a single trial
+        loss_trial = _get_loss_output_target(
+            self._evolve_jit,
+            self._state,
+            self._noise_std,
+            self._rng_key,
+            self._dt,
+            min_tau,
+        )
+
+        def loss_batch(params: Dict, batch: Tuple) -> float:
+            # - Map trial loss over inputs, targets and RNG keys; valid time steps are shared
+            inps, target, valid_ts, keys = batch
+            losses = vmap(loss_trial, in_axes=(None, (0, 0, None), 0))(
+                params, (inps, target, valid_ts), keys
+            )
+            return np.mean(losses)
+
+        # - Get optimiser
+        opt_init, opt_update, get_params = adam(1e-4)
+        self.__get_params_batch = get_params
+
+        @jit
+        def train_steps(opt_state, step_start, num_steps, batch):
+            """
+            train_steps() - Perform several rounds of optimizer update in a compiled loop
+
+            :return: (opt_state, loss)
+            """
+
+            def update(i, opt_state):
+                params = get_params(opt_state)
+                g = grad(loss_batch)(params, batch)
+                return opt_update(step_start + i, g, opt_state)
+
+            opt_state = fori_loop(0, num_steps, update, opt_state)
+            return opt_state, loss_batch(get_params(opt_state), batch)
+
+        self.__train_steps = train_steps
+
+        # - Initialise optimimser
+        self.__opt_state_batch = opt_init(self.__pack_params())
+        self.__step_count_batch = 0
+
+        # - Assign "in training" flag
+        self.__in_training_sgd_adam_batch = True
+
+    # - Prepare time base, inputs and targets of all trials
+    time_base, inps, num_timesteps = self._prepare_input_batch(inputs)
+    if isinstance(targets[0], TimeSeries):
+        target = np.stack([ts(time_base) for ts in targets])
+    else:
+        target = np.asarray(targets)[:, : num_timesteps + 1]
+
+    # - Pad inputs and targets to bucket length, to reuse compiled training functions
+    inps, valid_ts, self.bucket_last_evolution = pad_to_bucket(
+        inps, self.time_buckets, axis=1
     )
+    target, _, _ = pad_to_bucket(target, self.time_buckets, axis=1)
+    self._rng_key, subkey = rand.split(self._rng_key)
+    batch = (
+        np.array(inps),
+        np.array(target),
+        valid_ts,
+        rand.split(subkey, inps.shape[0]),
+    )
+
+    # - Perform optimisation steps on the device
+    self.__opt_state_batch, loss = self.__train_steps(
+        self.__opt_state_batch, self.__step_count_batch, num_steps, batch
+    )
+    self.__step_count_batch += num_steps
+
+    # - Apply the parameter updates
+    self.__apply_params(self.__get_params_batch(self.__opt_state_batch))
+
+    # - Reset status, on "is_last" flag
+    if is_last:
+        del self.__in_training_sgd_adam_batch
+
+    return float(loss)
 
 
 def add_train_output(lyr: rj.RecRateEulerJax) -> rj.RecRateEulerJax:
@@ -209,8 +371,9 @@ def add_train_output(lyr: rj.RecRateEulerJax) -> rj.RecRateEulerJax:
 
     :param lyr:     RecRateEulerJax Pre-configured layer to train
 
-    This function adds the method `.train_adam()` to the provided layer. Use this to perform training to match the
-    reservoir output to a given target. See documentation for `.train_adam()` for details.
+    This function adds the methods `.train_adam()` and `.train_adam_batch()` to the provided layer. Use these to perform
+    training to match the reservoir output to a given target. See documentation for `.train_adam()` and
+    `.train_adam_batch()` for details.
 
     :return: lyr:   RecRateEulerJax Layer with added functions
     """
@@ -221,6 +384,7 @@ def add_train_output(lyr: rj.RecRateEulerJax) -> rj.RecRateEulerJax:
 
     # - Insert methods required for training
     lyr.train_adam = types.MethodType(train_adam, lyr)
+    lyr.train_adam_batch = types.MethodType(train_adam_batch, lyr)
     lyr.__pack_params = types.MethodType(pack_params, lyr)
     lyr.__apply_params = types.MethodType(apply_params, lyr)
 
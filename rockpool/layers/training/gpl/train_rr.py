@@ -2,7 +2,40 @@
 train_rr.py - Define class for training ridge regression. Can be used by various layers.
 """
 
+from typing import Union, Tuple, Optional, Dict, Any
+
 import numpy as np
+from scipy.linalg import get_blas_funcs, cho_factor, cho_solve, LinAlgError
+
+from ....utilities import ArrayLike
+
+
+def gram_matrix(inp: np.ndarray) -> np.ndarray:
+    """
+    gram_matrix - Compute `inp.T @ inp` with a symmetric rank-k update (BLAS `syrk`), which only computes one triangle of the symmetric result.
+    :param np.ndarray inp:  2D-array (num_samples x num_features)
+    :return np.ndarray:     2D-array (num_features x num_features)
+    """
+    syrk = get_blas_funcs("syrk", (inp,))
+    # - `inp.T` is Fortran-ordered for C-ordered `inp`, so that it is passed to BLAS without copying
+    upper = np.triu(syrk(1.0, inp.T))
+    return upper + np.triu(upper, 1).T
+
+
+def compensated_add(
+    total: np.ndarray, compensation: np.ndarray, value: np.ndarray
+) -> (np.ndarray, np.ndarray):
+    """
+    compensated_add - Add a value to a sum with Kahan compensation.
+    :param np.ndarray total:        Current sum.
+    :param np.ndarray compensation: Current compensation term. The exact sum is approximately `total - compensation`.
+    :param np.ndarray value:        Value to be added.
+    :return np.ndarray:             New sum.
+    :return np.ndarray:             New compensation term.
+    """
+    update = value - compensation
+    new_total = total + update
+    return new_total, (new_total - total) - update
 
 
 class RidgeRegrTrainer:
@@ -14,7 +47,7 @@ class RidgeRegrTrainer:
         self,
         num_features: int,
         num_outputs: int,
-        regularize: float,
+        regularize: Union[float, ArrayLike],
         fisher_relabelling: bool,
         standardize: bool,
         train_biases: bool,
@@ -23,7 +56,7 @@ class RidgeRegrTrainer:
         RidgeRegrTrainer - Class to perform ridge regression.
         :param int num_features:        Number of input features.
         :param int num_outputs:         Number of output units to be trained.
-        :param float regularize:        Regularization parameter.
+        :param Union[float, ArrayLike] regularize:  Regularization parameter. If several values are provided, `update_model` solves for all of them and selects the one with the lowest generalized cross-validation score.
         :param bool fisher_relabelling: Relabel target data such that algorithm is equivalent to Fisher discriminant analysis.
         :param bool standardize:        Perform z-score standardization based on mean and variance of first input batch.
         :param bool train_biases:       Train constant biases along with weights.
@@ -51,6 +84,8 @@ class RidgeRegrTrainer:
         )
         self.kahan_comp_xty = np.zeros_like(self.xty)
         self.kahan_comp_xtx = np.zeros_like(self.xtx)
+        self.yty = np.zeros(self.num_outputs)
+        self.num_samples = 0
 
     def determine_z_score_params(self, inp: np.ndarray):
         """
@@ -140,19 +175,86 @@ class RidgeRegrTrainer:
         :param np.ndarray target:  2D-array (num_samples x num_outputs) of prepared target data
         """
         inp, target = self._prepare_data(inp, target)
-        upd_xty = inp.T @ target - self.kahan_comp_xty
-        upd_xtx = inp.T @ inp - self.kahan_comp_xtx
-        xty_new = self.xty + upd_xty
-        xtx_new = self.xtx + upd_xtx
+        self.xty, self.kahan_comp_xty = compensated_add(
+            self.xty, self.kahan_comp_xty, inp.T @ target
+        )
+        self.xtx, self.kahan_comp_xtx = compensated_add(
+            self.xtx, self.kahan_comp_xtx, gram_matrix(inp)
+        )
 
-        self.kahan_comp_xty = (xty_new - self.xty) - upd_xty
-        self.kahan_comp_xtx = (xtx_new - self.xtx) - upd_xtx
-        self.xty += upd_xty
-        self.xtx += upd_xtx
+        # - Target statistics for generalized cross-validation
+        self.yty += np.sum(target ** 2, axis=0)
+        self.num_samples += len(target)
 
         if update_model:
             self.update_model()
 
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        get_statistics - Return the training data collected so far, so that it can be stored, sent to other
+                         processes or machines, and merged with data collected elsewhere with `merge_statistics`.
+        :return dict:   Accumulated statistics, together with the trainer settings they depend on.
+        """
+        statistics = dict(
+            num_features=self.num_features,
+            num_outputs=self.num_outputs,
+            fisher_relabelling=self.fisher_relabelling,
+            standardize=self.standardize,
+            train_biases=self.train_biases,
+            xtx=self.xtx.copy(),
+            xty=self.xty.copy(),
+            kahan_comp_xtx=self.kahan_comp_xtx.copy(),
+            kahan_comp_xty=self.kahan_comp_xty.copy(),
+            yty=self.yty.copy(),
+            num_samples=self.num_samples,
+        )
+        if self.standardize:
+            statistics["inp_mean"] = self.inp_mean
+            statistics["inp_std"] = self.inp_std
+
+        return statistics
+
+    def merge_statistics(self, statistics: Dict[str, Any]):
+        """
+        merge_statistics - Add training data that has been collected by another trainer on disjoint data.
+                           Sums are merged with Kahan compensation. The result is the same as if all data had
+                           been presented to this trainer.
+        :param dict statistics: Statistics as returned by `get_statistics` of another trainer.
+        """
+        for name in (
+            "num_features",
+            "num_outputs",
+            "fisher_relabelling",
+            "standardize",
+            "train_biases",
+        ):
+            if statistics[name] != getattr(self, name):
+                raise ValueError(
+                    f"RidgeRegrTrainer: Cannot merge statistics with different `{name}` "
+                    + f"({statistics[name]}, expected {getattr(self, name)})."
+                )
+        if self.standardize and not (
+            np.array_equal(statistics["inp_mean"], self.inp_mean)
+            and np.array_equal(statistics["inp_std"], self.inp_std)
+        ):
+            raise ValueError(
+                "RidgeRegrTrainer: Cannot merge statistics of data that has been standardized differently."
+            )
+
+        # - Exact partial sums are `sum - compensation`; merge both compensation terms
+        self.xty, self.kahan_comp_xty = compensated_add(
+            self.xty,
+            self.kahan_comp_xty + statistics["kahan_comp_xty"],
+            statistics["xty"],
+        )
+        self.xtx, self.kahan_comp_xtx = compensated_add(
+            self.xtx,
+            self.kahan_comp_xtx + statistics["kahan_comp_xtx"],
+            statistics["xtx"],
+        )
+        self.yty += statistics["yty"]
+        self.num_samples += statistics["num_samples"]
+
     def fit(self, inp: np.ndarray, target: np.ndarray):
         """
         fit - Train with one single batch
@@ -166,22 +268,97 @@ class RidgeRegrTrainer:
     def update_model(self):
         """
         update_model - Update model weights and biases based on current collected training data.
+                       If `self.regularize` holds several values, use the one with the lowest
+                       generalized cross-validation score, which is stored in `self.regularize_best`.
+                       Weights, biases and scores for all values are stored in `self.regularization_path`.
         """
-        solution = np.linalg.solve(
-            self.xtx
-            + self.regularize * np.eye(self.num_features + int(self.train_biases)),
-            self.xty,
+        if np.size(self.regularize) > 1:
+            regularize = np.asarray(self.regularize, float).ravel()
+            weights, biases, scores = self.solve_regularizations(regularize, gcv=True)
+            idx_best = np.argmin(np.mean(scores, axis=1))
+            self.regularization_path = dict(
+                regularize=regularize, weights=weights, biases=biases, gcv=scores
+            )
+            self.regularize_best = regularize[idx_best]
+            self.weights = weights[idx_best]
+            if self.train_biases:
+                self.bias = biases[idx_best]
+            return
+
+        a = self.xtx + self.regularize * np.eye(
+            self.num_features + int(self.train_biases)
+        )
+        try:
+            # - `a` is symmetric and, for positive regularization, positive definite
+            solution = cho_solve(cho_factor(a), self.xty)
+        except LinAlgError:
+            solution = np.linalg.solve(a, self.xty)
+
+        self.weights, bias = self._split_solution(solution)
+        if self.train_biases:
+            self.bias = bias
+
+    def solve_regularizations(
+        self, regularize: ArrayLike, gcv: bool = False
+    ) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        solve_regularizations - Solve for model weights and biases for several regularization parameters at once.
+                                `self.xtx` is eigendecomposed once, so that each additional regularization
+                                parameter only costs a matrix product.
+        :param ArrayLike regularize:    1D-array of L regularization parameters.
+        :param bool gcv:                If `True`, also compute generalized cross-validation scores.
+        :return np.ndarray:             3D-array (L x num_features x num_outputs) of weights for each regularization parameter.
+        :return Optional[np.ndarray]:   2D-array (L x num_outputs) of biases for each regularization parameter, or `None` if biases are not trained.
+        :return Optional[np.ndarray]:   2D-array (L x num_outputs) of generalized cross-validation scores, or `None` if `gcv` is `False`.
+        """
+        regularize = np.asarray(regularize, float).ravel()
+
+        # - Eigendecomposition of symmetric `xtx`; clip rounding errors
+        eigvals, eigvecs = np.linalg.eigh(self.xtx)
+        eigvals = np.clip(eigvals, 0, None)
+        proj_xty = eigvecs.T @ self.xty
+
+        # - Filter factors 1 / (s + lambda) for each regularization parameter (L x num_eig)
+        factors = 1.0 / (eigvals + regularize[:, np.newaxis])
+        solutions = (eigvecs * factors[:, np.newaxis, :]) @ proj_xty
+        weights, biases = self._split_solution(solutions)
+
+        if not gcv:
+            return weights, biases, None
+
+        # - Residual sum of squares and effective degrees of freedom for each parameter
+        proj_xty_sq = proj_xty ** 2
+        rss = (
+            self.yty - 2 * factors @ proj_xty_sq + (eigvals * factors ** 2) @ proj_xty_sq
         )
+        dof = factors @ eigvals
+        gcv_denominator = (1 - dof / self.num_samples) ** 2
+        scores = rss / self.num_samples / gcv_denominator[:, np.newaxis]
+
+        return weights, biases, scores
+
+    def _split_solution(
+        self, solution: np.ndarray
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        _split_solution - Split a solution of the normal equations into weights and biases and undo standardization.
+        :param np.ndarray solution:     Array (... x num_features (+1) x num_outputs) of solutions.
+        :return np.ndarray:             Weights (... x num_features x num_outputs)
+        :return Optional[np.ndarray]:   Biases (... x num_outputs), or `None` if biases are not trained.
+        """
         if self.train_biases:
-            self.weights = solution[:-1]
-            self.bias = solution[-1]
+            weights = solution[..., :-1, :]
+            bias = solution[..., -1, :]
         else:
-            self.weights = solution
+            weights = solution
+            bias = None
 
         if self.standardize:
-            self.weights /= self.inp_std
+            weights = weights / self.inp_std
             if self.train_biases:
-                self.bias -= self.inp_mean @ self.weights
+                bias = bias - self.inp_mean @ weights
+
+        return weights, bias
 
     def reset(self):
         """reset - Reset internal training data."""
@@ -13,12 +13,24 @@ This module encapsulates networks -- combinations of multiple `.Layer` objects,
 import json
 from decimal import Decimal
 from copy import deepcopy
-from typing import Callable, Union, Tuple, List, Dict, Type, Optional, Any
+from typing import (
+    Callable,
+    Union,
+    Tuple,
+    List,
+    Dict,
+    Type,
+    Optional,
+    Any,
+    Generator,
+    Iterable,
+)
 from warnings import warn
+from multiprocessing import Pool
 
 import numpy as np
 
-from ..timeseries import TimeSeries
+from ..timeseries import TimeSeries, TSContinuous
 from .. import layers
 
 # - Try to import tqdm
@@ -535,30 +547,23 @@ class Network:
         else:
             return t
 
-    def evolve(
+    def _determine_num_timesteps(
         self,
         ts_input: Optional[TimeSeries] = None,
         duration: Optional[float] = None,
         num_timesteps: Optional[int] = None,
-        verbose: bool = True,
-    ) -> dict:
+    ) -> int:
         """
-        Evolve the network by evolving each layer in turn
+        Determine the number of network time steps for an evolution
 
-        Evolve each layer in the network according to self.evol_order. For layers with external_input==True their input is ts_input. If not but an input layer is defined, it will be the output of that, otherwise None. Return a dict with each layer's output.
+        :param Optional[TimeSeries] ts_input:   External input to the network
+        :param Optional[float] duration:        Evolution duration
+        :param Optional[int] num_timesteps:     Number of evolution time steps. If provided, it is returned unchanged
 
-        .. seealso:: :ref:`/basics/getting_started.ipynb` and the tutorial :ref:`/tutorials/building_reservoir.ipynb` show examples of using the `.evolve` method.
-
-        :param Optional[TimeSeries] ts_input:   External input to the network. Default: `None`, no external input
-        :param Optional[float] duration:        Duration over which network should be evolved. If not provided, then `num_timesteps` or the duration of `ts_input` will determine the evolution duration
-        :param Optional[int] num_timesteps:     Number of evolution time steps, in units of `.dt`. If not provided, then `duration` of the duration of `ts_input` will determine evolution duration
-        :param bool verbose:         If `True`, display info about evolution state. Default: `True`, display feedback
-
-        :return dict:                           Dictionary containing the output time series of each layer. Entries in the dictionary will be have keys taken from the names of each layer
+        :return int:                            Number of evolution time steps, in units of `.dt`
 
         :raises AssertionError: If no duration can be determined
         """
-
         if num_timesteps is None:
             # - Determine num_timesteps
             if duration is None:
@@ -580,6 +585,34 @@ class Network:
                     )
             num_timesteps = int(np.floor(duration / self.dt))
 
+        return num_timesteps
+
+    def evolve(
+        self,
+        ts_input: Optional[TimeSeries] = None,
+        duration: Optional[float] = None,
+        num_timesteps: Optional[int] = None,
+        verbose: bool = True,
+    ) -> dict:
+        """
+        Evolve the network by evolving each layer in turn
+
+        Evolve each layer in the network according to self.evol_order. For layers with external_input==True their input is ts_input. If not but an input layer is defined, it will be the output of that, otherwise None. Return a dict with each layer's output.
+
+        .. seealso:: :ref:`/basics/getting_started.ipynb` and the tutorial :ref:`/tutorials/building_reservoir.ipynb` show examples of using the `.evolve` method.
+
+        :param Optional[TimeSeries] ts_input:   External input to the network. Default: `None`, no external input
+        :param Optional[float] duration:        Duration over which network should be evolved. If not provided, then `num_timesteps` or the duration of `ts_input` will determine the evolution duration
+        :param Optional[int] num_timesteps:     Number of evolution time steps, in units of `.dt`. If not provided, then `duration` of the duration of `ts_input` will determine evolution duration
+        :param bool verbose:         If `True`, display info about evolution state. Default: `True`, display feedback
+
+        :return dict:                           Dictionary containing the output time series of each layer. Entries in the dictionary will be have keys taken from the names of each layer
+
+        :raises AssertionError: If no duration can be determined
+        """
+
+        num_timesteps = self._determine_num_timesteps(ts_input, duration, num_timesteps)
+
         if ts_input is not None:
             # - Set external input name if not set already
             if ts_input.name is None:
@@ -652,6 +685,107 @@ class Network:
         # - Return dict with layer outputs
         return signal_dict
 
+    def evolve_chunked(
+        self,
+        ts_input: Optional[TimeSeries] = None,
+        chunk_duration: Optional[float] = None,
+        duration: Optional[float] = None,
+        num_timesteps: Optional[int] = None,
+        num_timesteps_chunk: Optional[int] = None,
+        verbose: bool = False,
+    ) -> Generator[dict, None, None]:
+        """
+        Evolve the network chunk by chunk, yielding the layer outputs for each chunk
+
+        The evolution is split into chunks of `chunk_duration`. Each chunk is pushed through all layers, as in :py:meth:`.evolve`, before the next chunk is evolved. Layer states are carried across chunks, so that the concatenated outputs correspond to a single call to :py:meth:`.evolve`. Only the input and outputs of the current chunk are kept in memory, and results can be consumed before the evolution has finished.
+
+        :param Optional[TimeSeries] ts_input:   External input to the network. Default: `None`, no external input
+        :param Optional[float] chunk_duration:  Duration of each chunk. Will be rounded down to a multiple of `.dt`
+        :param Optional[float] duration:        Total evolution duration. If not provided, then `num_timesteps` or the duration of `ts_input` will determine the evolution duration
+        :param Optional[int] num_timesteps:     Total number of evolution time steps, in units of `.dt`
+        :param Optional[int] num_timesteps_chunk:   Number of time steps per chunk, in units of `.dt`. Overrides `chunk_duration`. If neither is provided, the network is evolved in a single chunk
+        :param bool verbose:                    If `True`, display info about evolution state. Default: `False`, display no feedback
+
+        :yield dict:                            Dictionary containing the external input and the output time series of each layer for the current chunk, as returned by :py:meth:`.evolve`
+
+        :raises AssertionError: If no duration can be determined
+        :raises ValueError:     If the chunk duration is shorter than `.dt`
+        """
+        num_timesteps = self._determine_num_timesteps(ts_input, duration, num_timesteps)
+
+        # - Number of time steps per chunk
+        if num_timesteps_chunk is None:
+            if chunk_duration is None:
+                num_timesteps_chunk = num_timesteps
+            else:
+                num_timesteps_chunk = int(
+                    np.floor(self._fix_duration(chunk_duration) / self.dt)
+                )
+        if num_timesteps_chunk < 1:
+            raise ValueError(
+                "Network: Chunks must contain at least one time step of duration `dt`."
+            )
+
+        # - Evolve chunk by chunk
+        timestep_stop = self._timestep + num_timesteps
+        while self._timestep < timestep_stop:
+            num_ts_current = min(num_timesteps_chunk, timestep_stop - self._timestep)
+
+            # - Input for the current chunk
+            if ts_input is None:
+                ts_current_input = None
+            else:
+                ts_current_input = ts_input.clip(
+                    self.t, self.t + num_ts_current * self.dt, include_stop=True
+                )
+
+            yield self.evolve(
+                ts_input=ts_current_input,
+                num_timesteps=num_ts_current,
+                verbose=verbose,
+            )
+
+    def evolve_many(
+        self,
+        inputs: Iterable[Optional[TimeSeries]],
+        n_workers: Optional[int] = None,
+        duration: Optional[float] = None,
+        num_timesteps: Optional[int] = None,
+        chunksize: int = 1,
+    ) -> Generator[dict, None, None]:
+        """
+        Evolve copies of the network over many independent trials in parallel
+
+        The network is serialised once with :py:meth:`.to_dict` and rebuilt in each of `n_workers` worker processes. Each trial is evolved from a reset state and time, as after :py:meth:`.reset_all`. State and time of this network are not modified. Results are yielded in the order of `inputs`, as soon as they are available.
+
+        Note that only parameters stored by :py:meth:`.to_dict` are transferred to the workers. Custom activation functions, for example, are replaced by their defaults.
+
+        :param Iterable[Optional[TimeSeries]] inputs:   External input for each trial
+        :param Optional[int] n_workers:         Number of worker processes. If `1`, trials are evolved sequentially in this process. Default: `None`, use one worker per CPU core
+        :param Optional[float] duration:        Duration of each trial. If not provided, then `num_timesteps` or the duration of each input will determine the evolution duration
+        :param Optional[int] num_timesteps:     Number of evolution time steps of each trial, in units of `.dt`
+        :param int chunksize:                   Number of trials sent to a worker at once. Default: `1`
+
+        :yield dict:                            Dictionary containing the external input and the output time series of each layer for one trial, as returned by :py:meth:`.evolve`
+        """
+        config = self.to_dict()
+
+        if n_workers == 1:
+            # - Evolve a copy of the network in this process
+            net = Network.load_from_dict(config)
+            for ts_input in inputs:
+                net.reset_all()
+                yield net.evolve(
+                    ts_input, duration=duration, num_timesteps=num_timesteps, verbose=False
+                )
+
+        else:
+            trial_args = ((ts_input, duration, num_timesteps) for ts_input in inputs)
+            with Pool(
+                n_workers, initializer=_init_evolve_worker, initargs=(config,)
+            ) as pool:
+                yield from pool.imap(_evolve_trial, trial_args, chunksize=chunksize)
+
     def train(
         self,
         training_fct: Callable[["Network", Dict[str, TimeSeries], bool, bool], Any],
@@ -683,26 +817,7 @@ class Network:
         :param Optional[bool] high_verbosity:           If `True`, print info about layer evolution (only has effect if `verbose` is `True`) Default: `False`, dont' display extra feedback
         """
 
-        if num_timesteps is None:
-            # - Try to determine num_timesteps from duration
-            if duration is None:
-                # - Determine duration
-                assert (
-                    ts_input is not None
-                ), "Network: One of `num_timesteps`, `ts_input` or `duration` must be supplied"
-
-                if ts_input.periodic:
-                    # - Use duration of periodic TimeSeries, if possible
-                    duration = ts_input.duration
-
-                else:
-                    # - Evolve until the end of the input TimeSeries
-                    duration = ts_input.t_stop - self.t
-                    assert duration > 0, (
-                        "Network: Cannot determine an appropriate evolution duration. "
-                        + "`ts_input` finishes before the current evolution time."
-                    )
-            num_timesteps = int(np.floor(duration / self.dt))
+        num_timesteps = self._determine_num_timesteps(ts_input, duration, num_timesteps)
 
         # - Number of time steps per batch
         if nums_ts_batch is None:
@@ -846,40 +961,61 @@ class Network:
         ]
         num_layers = np.size(self.evol_order)
 
-        # - Prepare external input
-        if ts_input is not None:
-            l_input = [ts_input(t, t + self.dt) for t in timebase]
-        else:
-            l_input = [None] * num_timesteps
+        # - Function to slice external input lazily for each step
+        def get_input(step: int) -> Optional[Tuple]:
+            if ts_input is None:
+                return None
+            elif isinstance(ts_input, TSContinuous):
+                # - Sample continuous input at the start of the step
+                return timebase[step], np.reshape(ts_input(timebase[step]), (1, -1))
+            else:
+                return ts_input(timebase[step], timebase[step] + self.dt)
 
         # - Get initial state of all layers
         if verbose:
             print("Network: getting initial state")
 
-        # - Determine input state size, obtain initial layer state
-        input_state: Tuple = l_input[0]
-        l_laststate = [input_state] + [
-            deepcopy(lyr.send(None)) for lyr in self.l_streamers
-        ]
+        initial_states = [lyr.send(None) for lyr in self.l_streamers]
 
-        # - Initialise layer output variables with initial state, convert to lists
+        # - Preallocate output buffers for each layer, with the initial state in the first row
         l_layer_outputs = [
-            tuple([np.reshape(x, (1, -1))] for x in state) for state in l_laststate[1:]
+            tuple(
+                np.full((num_timesteps + 1, np.size(x)), np.nan) for x in state
+            )
+            for state in initial_states
         ]
+        state_shapes = [tuple(np.shape(x) for x in state) for state in initial_states]
+
+        def store_state(layer_idx: int, row: int, state: Tuple) -> Tuple:
+            # - Copy a layer state into its output buffer, return a view as new state
+            stored = []
+            for buffer, shape, x in zip(
+                l_layer_outputs[layer_idx], state_shapes[layer_idx], state
+            ):
+                buffer[row] = np.ravel(x)
+                stored.append(buffer[row].reshape(shape))
+            return tuple(stored)
+
+        # - Double-buffered states: `l_laststate` is read, `l_state` is written in each step
+        #   States are views into the output buffers, which are not modified afterwards
+        l_laststate = [get_input(0)] + [
+            store_state(layer_idx, 0, state)
+            for layer_idx, state in enumerate(initial_states)
+        ]
+        l_state = list(l_laststate)
 
         # - Display some feedback
         if verbose:
             print("Network: got initial state:")
-            print(l_layer_outputs)
+            print(l_laststate[1:])
 
         # - Streaming loop
-        l_state = deepcopy(l_laststate)
         for step in range(num_timesteps):
             if verbose:
                 print("Network: Start of step", step)
 
             # - Set up external input
-            l_laststate[0] = l_input[step]
+            l_laststate[0] = get_input(step)
 
             # - Loop over layers, stream data in and out
             for layer_idx in range(num_layers):
@@ -891,23 +1027,17 @@ class Network:
                 try:
                     # - `send` input data for current layer
                     # - wait for the output state for the current layer
-                    l_state[layer_idx + 1] = deepcopy(
-                        self.l_streamers[layer_idx].send(l_laststate[layer_idx])
-                    )
+                    state = self.l_streamers[layer_idx].send(l_laststate[layer_idx])
 
                 except StopIteration as e:
                     # - StopIteration returns the final state
-                    l_state[layer_idx + 1] = e.args[0]
+                    state = e.args[0]
 
-            # - Collate layer outputs
-            for layer_idx in range(num_layers):
-                for tuple_idx in range(len(l_layer_outputs[layer_idx])):
-                    l_layer_outputs[layer_idx][tuple_idx].append(
-                        np.reshape(l_state[layer_idx + 1][tuple_idx], (1, -1))
-                    )
+                # - Collate layer output
+                l_state[layer_idx + 1] = store_state(layer_idx, step + 1, state)
 
-            # - Save last state to use as input for next step
-            l_laststate = deepcopy(l_state)
+            # - Swap state buffers, current state is input for next step
+            l_laststate, l_state = l_state, l_laststate
 
             # - Call callback function
             if step_callback is not None:
@@ -916,10 +1046,8 @@ class Network:
         # - Build return dictionary
         signal_dict = {"external": ts_input.copy()}
         for layer_idx in range(num_layers):
-            # - Concatenate time series
-            lv_data = [
-                np.stack(np.array(data, "float")) for data in l_layer_outputs[layer_idx]
-            ]
+            # - Collected output samples
+            lv_data = l_layer_outputs[layer_idx]
 
             # - Filter out nans in time trace (always first data element)
             vb_use_samples: np.ndarray = ~np.isnan(lv_data[0]).flatten()
@@ -976,6 +1104,17 @@ class Network:
             raise NetworkError("Network: Not all layers are in sync with the network.")
         return in_sync
 
+    def warmup(self, num_timesteps: int = 1):
+        """
+        Compile the evolution functions of all layers ahead of time
+
+        Calls :py:meth:`.Layer.warmup` for each layer, so that compiled kernels are built before the network receives any input. Time and state of the network and its layers are not affected.
+
+        :param int num_timesteps:   Number of network time steps to warm up each layer for. Default: ``1``
+        """
+        for lyr in self.evol_order:
+            lyr.warmup(num_timesteps * lyr._timesteps_per_network_dt)
+
     def reset_time(self):
         """
         Reset the time of the network to zero by resetting each layer and the global network timestamp. Does not reset state.
@@ -1157,6 +1296,41 @@ class Network:
         setattr(layers, name, cls_lyr)
 
 
+### --- Helper functions for parallel evolution
+
+# - Network instance of a worker process in `Network.evolve_many`
+_worker_network = None
+
+
+def _init_evolve_worker(config: dict):
+    """
+    Rebuild a network in a worker process of `Network.evolve_many`
+
+    :param dict config: Network parameters, as returned by `Network.to_dict`
+    """
+    global _worker_network
+
+    # - Make sure that workers do not share the random state of the parent process
+    np.random.seed()
+
+    _worker_network = Network.load_from_dict(config)
+
+
+def _evolve_trial(args: Tuple) -> dict:
+    """
+    Evolve the network of a worker process over a single trial, starting from a reset state
+
+    :param Tuple args:  (ts_input, duration, num_timesteps) arguments to `Network.evolve`
+
+    :return dict:       Output time series of each layer, as returned by `Network.evolve`
+    """
+    ts_input, duration, num_timesteps = args
+    _worker_network.reset_all()
+    return _worker_network.evolve(
+        ts_input, duration=duration, num_timesteps=num_timesteps, verbose=False
+    )
+
+
 ### --- NetworkError exception class
 class NetworkError(Exception):
     """
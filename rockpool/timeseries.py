@@ -2,8 +2,11 @@
 timeseries.py - Classes to manage time series
 """
 
+import os
+import json
 import numpy as np
 import scipy.interpolate as spint
+from scipy.sparse import csr_matrix
 from warnings import warn
 import copy
 from typing import Union, List, Tuple, Optional, Iterable, TypeVar, Type
@@ -49,6 +52,24 @@ ArrayLike = Union[np.ndarray, List, Tuple]
 # - Absolute tolerance, e.g. for comparing float values
 _TOLERANCE_ABSOLUTE = 1e-9
 
+# - Tolerance relative to the sampling interval, for detecting evenly spaced time points
+_TOLERANCE_UNIFORM = 1e-6
+
+# - Index of chunks in time series data stored on disk
+#   `times`: time trace that is indexed; `chunk_times`: start time of each chunk;
+#   `chunk_offsets`: index of first sample in each chunk; `uniform`: samples are evenly spaced
+_ChunkIndex = collections.namedtuple(
+    "_ChunkIndex", ["times", "chunk_times", "chunk_offsets", "uniform"]
+)
+
+# - Per-channel index of events in a `TSEvent`
+#   `times`, `channels`: indexed event data; `order`: event indices, sorted by channel and time;
+#   `channel_offsets`: position in `order` where each channel starts; `times_by_channel`: `times[order]`
+_ChannelIndex = collections.namedtuple(
+    "_ChannelIndex",
+    ["times", "channels", "order", "channel_offsets", "times_by_channel"],
+)
+
 # - Global plotting backend
 def set_global_ts_plotting_backend(backend: Union[str, None], verbose=True):
     """
@@ -141,6 +162,85 @@ def full_nan(shape: Union[tuple, int]) -> np.array:
     return a
 
 
+def _is_uniform(times: np.ndarray) -> bool:
+    """
+    Check whether time points are evenly spaced
+
+    :param np.ndarray times:    Sorted array of at least two time points
+
+    :return bool:               ``True`` iff all time points lie on a regular grid, up to a small fraction of the grid spacing
+    """
+    dt = (times[-1] - times[0]) / (times.size - 1)
+    if dt <= 0:
+        return False
+    grid = times[0] + np.arange(times.size) * dt
+    return np.amax(np.abs(times - grid)) <= _TOLERANCE_UNIFORM * dt
+
+
+def _uniform_interpolator(times: np.ndarray, samples: np.ndarray, kind: str):
+    """
+    Build an interpolator for samples on evenly spaced time points
+
+    Sample indices are found by index arithmetic instead of a binary search, and are then corrected against the actual time points. Results are therefore correct even if ``times`` deviate from the grid, only slower. Results match those of :py:func:`scipy.interpolate.interp1d` with ``bounds_error=False`` up to rounding, i.e. ``NaN`` is returned outside of the sampled range.
+
+    :param np.ndarray times:    Evenly spaced ``T`` time points (see :py:func:`_is_uniform`)
+    :param np.ndarray samples:  ``TxN`` samples corresponding to ``times``
+    :param str kind:            One of ``"linear"``, ``"previous"``, ``"nearest"``
+
+    :return Callable:           Interpolation function
+    """
+    t_start = times[0]
+    t_stop = times[-1]
+    dt = (t_stop - t_start) / (times.size - 1)
+    idx_last = times.size - 1
+
+    def interpolate(t):
+        t = np.atleast_1d(np.asarray(t, float)).flatten()
+
+        # - Only interpolate within the sampled range
+        is_valid = (t >= t_start) & (t <= t_stop)
+        all_valid = is_valid.all()
+        if not all_valid:
+            t = t[is_valid]
+
+        # - Index of the last time point not later than `t`, corrected for deviations from the grid
+        idcs = np.clip(((t - t_start) / dt).astype(np.intp), 0, idx_last)
+        while True:
+            is_early = (idcs < idx_last) & (times[np.minimum(idcs + 1, idx_last)] <= t)
+            if not is_early.any():
+                break
+            idcs += is_early
+        while True:
+            is_late = (idcs > 0) & (times[idcs] > t)
+            if not is_late.any():
+                break
+            idcs -= is_late
+
+        if kind == "linear":
+            idcs = np.minimum(idcs, idx_last - 1)
+            times_lo = times[idcs]
+            weights = ((t - times_lo) / (times[idcs + 1] - times_lo)).reshape(-1, 1)
+            # - Form ensures that values at the time points are returned exactly
+            values = (1 - weights) * samples[idcs] + weights * samples[idcs + 1]
+
+        else:
+            if kind == "nearest":
+                # - Points exactly in between two samples are mapped to the earlier one
+                idcs_next = np.minimum(idcs + 1, idx_last)
+                idcs += t > (times[idcs] + times[idcs_next]) / 2
+
+            values = samples[idcs]
+
+        if all_valid:
+            return values
+        else:
+            result = full_nan((is_valid.size, samples.shape[1]))
+            result[is_valid] = values
+            return result
+
+    return interpolate
+
+
 ### --- TimeSeries base class
 
 
@@ -179,6 +279,7 @@ class TimeSeries:
 
         # - Assign attributes
         self._times = times
+        self._chunk_index = None
         self.periodic = periodic
         self.name = name
         self._t_start = (
@@ -295,6 +396,63 @@ class TimeSeries:
         """
         return copy.deepcopy(self)
 
+    def _data_arrays(self) -> Tuple[np.ndarray, ...]:
+        """
+        Return the arrays holding the data of this time series
+
+        :return Tuple[np.ndarray, ...]: Data arrays
+        """
+        return (self._times,)
+
+    def _copy_sharing_data(self) -> "TimeSeries":
+        """
+        Return a copy of this time series that shares the data arrays with ``self``
+
+        Use this instead of :py:meth:`.copy` if the data arrays of the copy will be replaced anyway, to avoid copying (or, for memory-mapped series, reading) the data.
+
+        :return TimeSeries: copy of ``self``
+        """
+        memo = {id(array): array for array in self._data_arrays()}
+        return copy.deepcopy(self, memo)
+
+    def _index_range(
+        self, t_start: float, t_stop: float, include_stop: bool = False
+    ) -> Tuple[int, int]:
+        """
+        Find the range of samples within a time interval, by bisection
+
+        Only considers the stored samples, i.e. periodicity is ignored. If the series is backed by a chunked file (see :py:func:`load_ts_from_file`), only the chunks containing ``t_start`` and ``t_stop`` are searched.
+
+        :param float t_start:       Start of the interval
+        :param float t_stop:        End of the interval
+        :param bool include_stop:   If ``True``, include samples at ``t_stop``. Default: ``False``
+
+        :return Tuple[int, int]:    Index of first sample at or after ``t_start`` and index after the last sample before (or at) ``t_stop``
+        """
+        times = self._times
+        chunk_index = getattr(self, "_chunk_index", None)
+        if chunk_index is not None and chunk_index.times is not times:
+            # - Chunk index refers to a previous time trace
+            chunk_index = None
+
+        def bisect(t: float, side: str) -> int:
+            if chunk_index is None:
+                return int(np.searchsorted(times, t, side=side))
+
+            # - Restrict search to the chunk that contains `t`
+            idx_chunk = np.searchsorted(chunk_index.chunk_times, t, side="right") - 1
+            if idx_chunk < 0:
+                return 0
+            idx_lo = chunk_index.chunk_offsets[idx_chunk]
+            idx_hi = (
+                chunk_index.chunk_offsets[idx_chunk + 1]
+                if idx_chunk + 1 < chunk_index.chunk_offsets.size
+                else times.size
+            )
+            return int(idx_lo + np.searchsorted(times[idx_lo:idx_hi], t, side=side))
+
+        return bisect(t_start, "left"), bisect(t_stop, "right" if include_stop else "left")
+
     def contains(self, times: Union[int, float, ArrayLike]) -> bool:
         """
         Does the time series contain the time range specified in the given time trace?
@@ -759,6 +917,41 @@ class TSContinuous(TimeSeries):
                 )
             )
 
+    def save_chunked(
+        self,
+        path: str,
+        chunk_duration: Optional[float] = None,
+        append: bool = False,
+        verbose: bool = False,
+    ):
+        """
+        Save this time series in a chunked format that can be memory-mapped
+
+        Creates a directory ``path`` that contains raw binary files for ``times`` and ``samples``, which :py:class:`numpy.memmap` can open directly, and a file ``meta.json`` with the remaining attributes and an index of chunk start times. Load the series with :py:func:`load_ts_from_file`. The loaded series is backed by the files and only reads the chunks that it needs.
+
+        With ``append = True``, samples are added to an existing directory, such that recordings larger than memory can be stored piece by piece.
+
+        :param str path:                        Path of the directory to save data into
+        :param Optional[float] chunk_duration:  Duration of a single chunk. Default: ``None``, a tenth of the duration of ``self``, or taken from existing files if ``append`` is ``True``
+        :param bool append:                     If ``True``, append to existing files in ``path`` (if any). Samples must not start before the stored samples end. Default: ``False``, replace existing files
+        :param bool verbose:                    If ``True``, print a confirmation. Default: ``False``
+        """
+        _save_chunked(
+            path=path,
+            series=self,
+            str_type="TSContinuous",
+            data={"samples": self.samples},
+            attributes={
+                "interp_kind": self.interp_kind,
+                "units": self.units,
+                "num_channels": self.num_channels,
+            },
+            chunk_duration=chunk_duration,
+            append=append,
+        )
+        if verbose:
+            print(f"TSContinuous `{self.name}` has been stored in `{path}`.")
+
     ## -- Methods for manipulating timeseries
 
     def clip(
@@ -784,7 +977,7 @@ class TSContinuous(TimeSeries):
         """
         # - Create a new time series, or modify this time series
         if not inplace:
-            clipped_series = self.copy()
+            clipped_series = self._copy_sharing_data()
         else:
             clipped_series = self
 
@@ -796,22 +989,27 @@ class TSContinuous(TimeSeries):
         # - Ensure time bounds are sorted
         t_start, t_stop = sorted((t_start, t_stop))
 
-        # - Handle periodic time series
-        times_to_choose: np.ndarray = (
-            _extend_periodic_times(t_start, t_stop, clipped_series)
-            if clipped_series.periodic
-            else clipped_series.times
-        )
+        if clipped_series.periodic:
+            # - Handle periodic time series
+            times_to_choose: np.ndarray = _extend_periodic_times(
+                t_start, t_stop, clipped_series
+            )
 
-        # - Mark which times lie within bounds
-        times_in_limits: np.ndarray = np.logical_and(
-            times_to_choose >= t_start, times_to_choose < t_stop
-        )
-        if include_stop:
-            # - Include samples at time `t_stop`
-            times_in_limits[times_to_choose == t_stop] = True
-        # - Pick matching times
-        times: np.ndarray = times_to_choose[times_in_limits]
+            # - Mark which times lie within bounds
+            times_in_limits: np.ndarray = np.logical_and(
+                times_to_choose >= t_start, times_to_choose < t_stop
+            )
+            if include_stop:
+                # - Include samples at time `t_stop`
+                times_in_limits[times_to_choose == t_stop] = True
+            # - Pick matching times
+            times: np.ndarray = times_to_choose[times_in_limits]
+        else:
+            # - Pick times within bounds
+            idx_start, idx_stop = clipped_series._index_range(
+                t_start, t_stop, include_stop
+            )
+            times: np.ndarray = np.array(clipped_series.times[idx_start:idx_stop])
         if sample_limits:
             add_start: bool = times.size == 0 or times[0] > t_start
             if not clipped_series.contains(t_start):
@@ -854,7 +1052,7 @@ class TSContinuous(TimeSeries):
         :return TSContinuous:                   Time series resampled to new time base and with desired channels.
         """
         if not inplace:
-            resampled_series = self.copy()
+            resampled_series = self._copy_sharing_data()
         else:
             resampled_series = self
 
@@ -1120,14 +1318,32 @@ class TSContinuous(TimeSeries):
 
     ## -- Internal methods
 
+    def _data_arrays(self) -> Tuple[np.ndarray, ...]:
+        """
+        Return the arrays holding the data of this time series
+
+        :return Tuple[np.ndarray, ...]: Data arrays
+        """
+        return self._times, self._samples
+
     def _create_interpolator(self):
+        """
+        Discard the current interpolator for the samples in this TimeSeries.
+
+        A new interpolator is built lazily, the next time the series is sampled.
+        """
+        self._interp = None
+
+    def _build_interpolator(self):
         """
         Build an interpolator for the samples in this TimeSeries.
 
-        Replaces the current interpolator.
+        For linear, previous-sample and nearest-sample interpolation on evenly spaced time points, the interpolator finds the sample indices by index arithmetic rather than by searching. Otherwise a :py:func:`scipy.interpolate.interp1d` object is used.
+
+        :return Callable: Function mapping an array of ``T`` time points to the interpolated samples
         """
         if np.size(self.times) == 0:
-            self.interp = lambda t: None
+            return lambda t: None
 
         elif np.size(self.times) == 1:
             # - Handle sample for single time step (`interp1d` would cause error)
@@ -1138,11 +1354,19 @@ class TSContinuous(TimeSeries):
                 samples[times == self.times[0]] = self.samples[0]
                 return samples
 
-            self.interp = single_sample
+            return single_sample
+
+        elif self.interp_kind in ("linear", "previous", "nearest") and (
+            self._chunk_index.uniform
+            if getattr(self, "_chunk_index", None) is not None
+            and self._chunk_index.times is self._times
+            else _is_uniform(self._times)
+        ):
+            return _uniform_interpolator(self._times, self._samples, self.interp_kind)
 
         else:
             # - Construct interpolator
-            self.interp = spint.interp1d(
+            return spint.interp1d(
                 self._times,
                 self._samples,
                 kind=self.interp_kind,
@@ -1170,7 +1394,7 @@ class TSContinuous(TimeSeries):
         if samples is None:
             return np.zeros((np.size(times), 0))
         else:
-            return np.reshape(self.interp(times), (-1, self.num_channels))
+            return np.reshape(samples, (-1, self.num_channels))
 
     def _compatible_shape(self, other_samples) -> np.ndarray:
         """
@@ -1191,6 +1415,12 @@ class TSContinuous(TimeSeries):
 
     ## -- Magic methods
 
+    def __getstate__(self):
+        # - Interpolators are rebuilt on demand, they are not copied or pickled
+        state = self.__dict__.copy()
+        state["_interp"] = None
+        return state
+
     def __call__(self, times: Union[int, float, ArrayLike]):
         """
         ts(tTime1, tTime2, ...) - Interpolate the time series to the provided time points
@@ -1573,6 +1803,25 @@ class TSContinuous(TimeSeries):
         # - Create a new interpolator
         self._create_interpolator()
 
+    @property
+    def interp(self):
+        """(Callable) Interpolator for the samples of this series. Built on first use after ``times`` or ``samples`` have been changed"""
+        if self._interp is None:
+            self._interp = self._build_interpolator()
+        return self._interp
+
+    @property
+    def interp_kind(self):
+        """(str) Interpolation type, as accepted by :py:func:`scipy.interpolate.interp1d`"""
+        return self._interp_kind
+
+    @interp_kind.setter
+    def interp_kind(self, new_kind: str):
+        self._interp_kind = new_kind
+
+        # - Discard the current interpolator
+        self._create_interpolator()
+
     @property
     def num_traces(self):
         """(int) Synonymous to ``num_channels``"""
@@ -1621,6 +1870,7 @@ class TSEvent(TimeSeries):
         t_stop: Optional[float] = None,
         name: Optional[str] = None,
         num_channels: Optional[int] = None,
+        use_channel_index: bool = False,
     ):
         """
         Represent discrete events in time
@@ -1636,6 +1886,7 @@ class TSEvent(TimeSeries):
         :param Optional[str] name:                    Name of the time series (Default: None)
 
         :param Optional[int] num_channels:            Total number of channels in the data source. If ``None``, max(channels) is taken to be the total channel number
+        :param bool use_channel_index:      If ``True``, selecting events of given channels (e.g. with :py:meth:`.clip`) uses an index of the events in each channel. The index is built on first use and whenever ``times`` or ``channels`` have been assigned. Default: ``False``, select channels by comparing all events in the time window
         """
 
         # - Default time trace: empty
@@ -1681,6 +1932,7 @@ class TSEvent(TimeSeries):
         self._num_channels = int(num_channels)
 
         # - Store channels
+        self.use_channel_index = use_channel_index
         self.channels = np.array(channels, "int").flatten()
 
     def print(
@@ -1847,7 +2099,7 @@ class TSEvent(TimeSeries):
         """
 
         if not inplace:
-            new_series = self.copy()
+            new_series = self._copy_sharing_data()
         else:
             new_series = self
 
@@ -1909,6 +2161,14 @@ class TSEvent(TimeSeries):
 
     ## -- Methods for finding and extracting data
 
+    def _data_arrays(self) -> Tuple[np.ndarray, ...]:
+        """
+        Return the arrays holding the data of this time series
+
+        :return Tuple[np.ndarray, ...]: Data arrays
+        """
+        return self._times, self._channels
+
     def raster(
         self,
         dt: float,
@@ -1918,6 +2178,7 @@ class TSEvent(TimeSeries):
         channels: np.ndarray = None,
         add_events: bool = False,
         include_t_stop: bool = False,
+        out: Optional[np.ndarray] = None,
     ) -> np.ndarray:
         """
         Return a rasterized version of the time series data, where each data point represents a time step
@@ -1947,11 +2208,84 @@ class TSEvent(TimeSeries):
         :param Optional[int] num_timesteps:         Specify number of time steps directly, instead of providing ``t_stop``. Default: ``None`` (use ``t_start``, ``t_stop`` and ``dt`` to determine raster size)
         :param Optional[ArrayLike[int]] channels:   Channels from which data is to be used. Default: ``None`` (use all channels)
         :param bool add_events:                     If ``True``, return an integer raster containing number of events for each time step and channel. Default: ``False``, merge simultaneous events in a single channel, and return a boolean raster
-        :param bool endpoint:                       If ``True``, an extra time bin is added to the raster after ``t_stop``, to ensure that any events occurring at ``t_stop`` are included in the raster. Default: ``False``, do not include events occurring at ``t_stop``.
+        :param bool include_t_stop:                 If ``True``, an extra time bin is added to the raster after ``t_stop``, to ensure that any events occurring at ``t_stop`` are included in the raster. Default: ``False``, do not include events occurring at ``t_stop``.
+        :param Optional[np.ndarray] out:            C-contiguous array of shape ``(num_timesteps, num_channels)`` into which the raster is written. Its previous content is overwritten. Default: ``None``, allocate a new raster
 
         :return ArrayLike:  event_raster            Boolean matrix with ``True`` indicating presence of events for each time step and channel. If ``add_events == True``, the raster consists of integers indicating the number of events per time step and channel. First axis corresponds to time, second axis to channel.
         """
 
+        # - Compute raster indices of the events of interest
+        raster_shape, time_indices, column_indices = self._raster_indices(
+            dt, t_start, t_stop, num_timesteps, channels, include_t_stop
+        )
+        num_timesteps, num_columns = raster_shape
+
+        # - Check the provided raster buffer
+        if out is not None:
+            if out.shape != raster_shape:
+                raise ValueError(
+                    f"TSEvent `{self.name}`: `out` must be of shape {raster_shape}, "
+                    + f"not {out.shape}."
+                )
+            if not out.flags.c_contiguous:
+                raise ValueError(f"TSEvent `{self.name}`: `out` must be C-contiguous.")
+            out.fill(0)
+
+        # - Handle empty rasters
+        if time_indices.size == 0:
+            return (
+                np.zeros(raster_shape, int if add_events else bool)
+                if out is None
+                else out
+            )
+
+        # - Linear indices into the flattened raster
+        linear_indices = time_indices * num_columns + column_indices
+
+        if add_events:
+            # - Accumulate events per time step and channel
+            if out is None:
+                event_raster = np.bincount(
+                    linear_indices, minlength=num_timesteps * num_columns
+                ).reshape(raster_shape)
+            else:
+                event_raster = out
+                np.add.at(event_raster.reshape(-1), linear_indices, 1)
+        else:
+            event_raster = np.zeros(raster_shape, bool) if out is None else out
+
+            # - Mark spiking indices with True
+            event_raster.reshape(-1)[linear_indices] = True
+
+            # - Print a warning if there are multiple spikes in one time step and channel
+            if np.count_nonzero(event_raster) < linear_indices.size:
+                print(
+                    f"TSEvent `{self.name}`: There are channels with multiple events"
+                    + " per time step. Consider using a smaller `dt` or setting `add_events = True`."
+                )
+
+        # - Return the raster
+        return event_raster
+
+    def _raster_indices(
+        self,
+        dt: float,
+        t_start: Optional[float],
+        t_stop: Optional[float],
+        num_timesteps: Optional[int],
+        channels: Optional[ArrayLike],
+        include_t_stop: bool,
+    ) -> (Tuple[int, int], np.ndarray, np.ndarray):
+        """
+        Compute raster shape and the raster indices of the events of interest
+
+        See :py:meth:`.raster` for a description of the arguments.
+
+        :return (Tuple[int, int], np.ndarray, np.ndarray):
+            raster_shape:   Shape ``(num_timesteps, num_channels)`` of the raster
+            time_indices:   Time bin of each selected event
+            column_indices: Raster column of each selected event
+        """
         # - Numerically stable modulo function
         def mod(num, div):
             return num - div * np.floor(num / div)
@@ -1960,8 +2294,10 @@ class TSEvent(TimeSeries):
         t_start = self.t_start if t_start is None else t_start
         if channels is None:
             channels = channels_clip = np.arange(self.num_channels)
+        else:
+            channels = np.atleast_1d(channels)
 
-        elif np.amax(channels) >= self.num_channels:
+        if channels.size > 0 and np.amax(channels) >= self.num_channels:
             # - Only use channels that are within range of channels of this timeseries
             channels_clip = np.intersect1d(channels, np.arange(self.num_channels))
 
@@ -2008,56 +2344,93 @@ class TSEvent(TimeSeries):
         if t_start + num_timesteps * dt > t_stop:
             include_t_stop = True
 
-        # - Clip the time series to include only the events of interest
-        series = self.clip(
-            t_start=t_start,
-            t_stop=t_stop,
-            channels=channels_clip,
-            remap_channels=False,
-            include_stop=include_t_stop,
+        # - Select the events of interest, without copying the series
+        if self.periodic:
+            event_times, event_channels = self(
+                t_start, t_stop, channels_clip, include_stop=include_t_stop
+            )
+        else:
+            # - Event times are sorted, so the time window can be found by bisection
+            idx_start, idx_stop = self._index_range(t_start, t_stop, include_t_stop)
+            event_times = self._times[idx_start:idx_stop]
+            event_channels = self._channels[idx_start:idx_stop]
+
+        # - Handle empty selection and rasters of zero length
+        raster_shape = (num_timesteps, channels.size)
+        if event_times.size == 0 or num_timesteps == 0:
+            return raster_shape, np.zeros(0, np.intp), np.zeros(0, np.intp)
+
+        # - Compute indices for event times
+        time_indices = np.floor((event_times - t_start) / dt).astype(np.intp)
+
+        # - Compute raster columns for event channels
+        if channels.size == self.num_channels and np.array_equal(
+            channels, np.arange(self.num_channels)
+        ):
+            # - Columns correspond to channel IDs
+            column_indices = event_channels
+            use_events = time_indices < num_timesteps
+        else:
+            # - Look up the raster column of each channel; -1 for unselected channels
+            column_lookup = np.full(self.num_channels, -1, np.intp)
+            is_defined = channels < self.num_channels
+            column_lookup[channels[is_defined]] = np.flatnonzero(is_defined)
+            column_indices = column_lookup[event_channels]
+            use_events = (time_indices < num_timesteps) & (column_indices >= 0)
+
+        # - Filter to valid time bins and selected channels
+        if not use_events.all():
+            time_indices = time_indices[use_events]
+            column_indices = column_indices[use_events]
+
+        return raster_shape, time_indices, column_indices
+
+    def raster_sparse(
+        self,
+        dt: float,
+        t_start: float = None,
+        t_stop: float = None,
+        num_timesteps: int = None,
+        channels: np.ndarray = None,
+        add_events: bool = False,
+        include_t_stop: bool = False,
+    ) -> csr_matrix:
+        """
+        Return a rasterized version of the time series data as a sparse matrix
+
+        Time bins and arguments are the same as for :py:meth:`.raster`, but the raster is returned as a :py:class:`scipy.sparse.csr_matrix`, with one row per time step. Memory usage scales with the number of events, not with the raster size. Non-zero entries of time step ``t`` are found in ``raster.indices[raster.indptr[t] : raster.indptr[t + 1]]``.
+
+        :param float dt:                            Duration of single time step in raster
+        :param Optional[float] t_start:             Time where to start raster. Default: None (use ``self.t_start``)
+        :param Optional[float] t_stop:              Time where to stop raster. This time point is not included in the raster. Default: ``None`` (use ``self.t_stop``. If ``num_timesteps`` is provided, ``t_stop`` is ignored.
+        :param Optional[int] num_timesteps:         Specify number of time steps directly, instead of providing ``t_stop``. Default: ``None`` (use ``t_start``, ``t_stop`` and ``dt`` to determine raster size)
+        :param Optional[ArrayLike[int]] channels:   Channels from which data is to be used. Default: ``None`` (use all channels)
+        :param bool add_events:                     If ``True``, return an integer raster containing number of events for each time step and channel. Default: ``False``, merge simultaneous events in a single channel, and return a boolean raster
+        :param bool include_t_stop:                 If ``True``, an extra time bin is added to the raster after ``t_stop``, to ensure that any events occurring at ``t_stop`` are included in the raster. Default: ``False``, do not include events occurring at ``t_stop``.
+
+        :return csr_matrix: event_raster            Sparse boolean matrix with ``True`` indicating presence of events for each time step and channel. If ``add_events == True``, the raster consists of integers indicating the number of events per time step and channel. First axis corresponds to time, second axis to channel.
+        """
+
+        # - Compute raster indices of the events of interest
+        raster_shape, time_indices, column_indices = self._raster_indices(
+            dt, t_start, t_stop, num_timesteps, channels, include_t_stop
         )
 
-        # - Create raster for storing event data
-        raster_type = int if add_events else bool
-        event_raster = np.zeros((num_timesteps, channels.size), raster_type)
-
-        # - Handle empty time series
-        if len(series) == 0:
-            return event_raster
-
-        # - Select data according to time base
-        event_times = series.times
-        event_channels = series.channels
-
-        ## -- Convert input events and samples to boolean or integer raster
-        # - Only consider rasters that have non-zero length
-        if num_timesteps > 0:
-            # - Compute indices for event times and filter to valid time bins
-            time_indices = np.floor((event_times - t_start) / dt).astype(int)
-            time_indices = time_indices[time_indices < num_timesteps]
-
-            if add_events:
-                # - Accumulate events per time step and channel
-                for idx_t, idx_ch in zip(time_indices, event_channels):
-                    event_raster[idx_t, idx_ch] += 1
-            else:
-                # - Print a warning if there are multiple spikes in one time step and channel
-                if (
-                    (
-                        np.diff(np.c_[time_indices, event_channels], axis=0)
-                        == np.zeros(2)
-                    )
-                    .all(axis=1)
-                    .any(axis=0)
-                ):
-                    print(
-                        f"TSEvent `{self.name}`: There are channels with multiple events"
-                        + " per time step. Consider using a smaller `dt` or setting `add_events = True`."
-                    )
-                # - Mark spiking indices with True
-                event_raster[time_indices, event_channels] = True
+        # - Build sparse raster. Conversion to CSR sums up simultaneous events
+        event_raster = csr_matrix(
+            (np.ones(time_indices.size, int), (time_indices, column_indices)),
+            shape=raster_shape,
+        )
+
+        if not add_events:
+            # - Print a warning if there are multiple spikes in one time step and channel
+            if event_raster.nnz < time_indices.size:
+                print(
+                    f"TSEvent `{self.name}`: There are channels with multiple events"
+                    + " per time step. Consider using a smaller `dt` or setting `add_events = True`."
+                )
+            event_raster = event_raster.astype(bool)
 
-        # - Return the raster
         return event_raster
 
     def xraster(
@@ -2130,6 +2503,37 @@ class TSEvent(TimeSeries):
                 )
             )
 
+    def save_chunked(
+        self,
+        path: str,
+        chunk_duration: Optional[float] = None,
+        append: bool = False,
+        verbose: bool = False,
+    ):
+        """
+        Save this time series in a chunked format that can be memory-mapped
+
+        Creates a directory ``path`` that contains raw binary files for ``times`` and ``channels``, which :py:class:`numpy.memmap` can open directly, and a file ``meta.json`` with the remaining attributes and an index of chunk start times. Load the series with :py:func:`load_ts_from_file`. The loaded series is backed by the files and only reads the chunks that it needs.
+
+        With ``append = True``, events are added to an existing directory, such that recordings larger than memory can be stored piece by piece.
+
+        :param str path:                        Path of the directory to save data into
+        :param Optional[float] chunk_duration:  Duration of a single chunk. Default: ``None``, a tenth of the duration of ``self``, or taken from existing files if ``append`` is ``True``
+        :param bool append:                     If ``True``, append to existing files in ``path`` (if any). Events must not occur before the stored events. Default: ``False``, replace existing files
+        :param bool verbose:                    If ``True``, print a confirmation. Default: ``False``
+        """
+        _save_chunked(
+            path=path,
+            series=self,
+            str_type="TSEvent",
+            data={"channels": self.channels},
+            attributes={"num_channels": self.num_channels},
+            chunk_duration=chunk_duration,
+            append=append,
+        )
+        if verbose:
+            print(f"TSEvent `{self.name}` has been stored in `{path}`.")
+
     ## -- Methods for combining time series
 
     def append_c(self, other_series: "TSEvent", inplace: bool = False) -> "TSEvent":
@@ -2352,6 +2756,76 @@ class TSEvent(TimeSeries):
 
     ## -- Internal methods
 
+    def _get_channel_index(self) -> _ChannelIndex:
+        """
+        Return the index of events per channel, building it if necessary
+
+        :return _ChannelIndex: Event indices sorted by channel and time, and the position where each channel starts
+        """
+        channel_index = getattr(self, "_channel_index", None)
+        if (
+            channel_index is None
+            or channel_index.times is not self._times
+            or channel_index.channels is not self._channels
+        ):
+            # - Stable sort keeps events of each channel in temporal order
+            order = np.argsort(self._channels, kind="stable")
+            channel_offsets = np.r_[
+                0, np.cumsum(np.bincount(self._channels, minlength=self.num_channels))
+            ]
+            channel_index = _ChannelIndex(
+                times=self._times,
+                channels=self._channels,
+                order=order,
+                channel_offsets=channel_offsets,
+                times_by_channel=self._times[order],
+            )
+            self._channel_index = channel_index
+
+        return channel_index
+
+    def _channel_event_indices(
+        self,
+        t_start: float,
+        t_stop: float,
+        channels: Union[int, ArrayLike],
+        include_stop: bool = False,
+    ) -> np.ndarray:
+        """
+        Find the events of given channels within a time interval, using the index of events per channel
+
+        :param float t_start:                   Start of the interval
+        :param float t_stop:                    End of the interval
+        :param Union[int, ArrayLike] channels:  Channels of which events are returned
+        :param bool include_stop:               If ``True``, include events at ``t_stop``. Default: ``False``
+
+        :return np.ndarray:                     Sorted indices of the matching events
+        """
+        channels = np.unique(channels)
+
+        # - Check `channels` for validity
+        if channels.size > 0 and not (
+            channels[0] >= 0 and channels[-1] < self.num_channels
+        ):
+            raise IndexError(
+                f"TSEvent `{self.name}`: `channels` must be between 0 and {self.num_channels}."
+            )
+
+        channel_index = self._get_channel_index()
+        event_indices = []
+        for ch in channels:
+            # - Events of this channel, sorted by time
+            idx_lo, idx_hi = channel_index.channel_offsets[ch : ch + 2]
+            times_channel = channel_index.times_by_channel[idx_lo:idx_hi]
+            idx_start = idx_lo + np.searchsorted(times_channel, t_start, side="left")
+            idx_stop = idx_lo + np.searchsorted(
+                times_channel, t_stop, side="right" if include_stop else "left"
+            )
+            event_indices.append(channel_index.order[idx_start:idx_stop])
+
+        # - Restore temporal order of events
+        return np.sort(np.concatenate(event_indices + [np.zeros(0, np.intp)]))
+
     def _matching_channels(
         self,
         channels: Union[int, ArrayLike, None] = None,
@@ -2425,24 +2899,38 @@ class TSEvent(TimeSeries):
             all_times = _extend_periodic_times(t_start, t_stop, self)
             num_reps = int(np.round(all_times.size / self.channels.size))
             all_channels = np.tile(self.channels, num_reps)
-        else:
-            all_times = self.times
-            all_channels = self.channels
 
-        # - Events with matching channels
-        channel_matches = self._matching_channels(channels, all_channels)
+            # - Events with matching channels
+            channel_matches = self._matching_channels(channels, all_channels)
 
-        # - Handle events at stop time
-        if include_stop:
-            choose_events_stop: np.ndarray = all_times <= t_stop
-        else:
-            choose_events_stop: np.ndarray = all_times < t_stop
+            # - Handle events at stop time
+            if include_stop:
+                choose_events_stop: np.ndarray = all_times <= t_stop
+            else:
+                choose_events_stop: np.ndarray = all_times < t_stop
 
-        # - Extract matching events and return
-        choose_events: np.ndarray = (
-            (all_times >= t_start) & (choose_events_stop) & channel_matches
-        )
-        return all_times[choose_events], all_channels[choose_events]
+            # - Extract matching events and return
+            choose_events: np.ndarray = (
+                (all_times >= t_start) & (choose_events_stop) & channel_matches
+            )
+            return all_times[choose_events], all_channels[choose_events]
+
+        if channels is not None and self.use_channel_index:
+            # - Look up events of each channel within the time window
+            idcs = self._channel_event_indices(t_start, t_stop, channels, include_stop)
+            return self._times[idcs], self._channels[idcs]
+
+        # - Events are sorted, so the time window can be found by bisection
+        idx_start, idx_stop = self._index_range(t_start, t_stop, include_stop)
+        window_times = np.array(self._times[idx_start:idx_stop])
+        window_channels = np.array(self._channels[idx_start:idx_stop])
+
+        if channels is None:
+            return window_times, window_channels
+        else:
+            # - Extract events with matching channels
+            channel_matches = self._matching_channels(channels, window_channels)
+            return window_times[channel_matches], window_channels[channel_matches]
 
     def __getitem__(self, ind: Union[ArrayLike, slice, int]) -> "TSEvent":
         """
@@ -2520,8 +3008,9 @@ class TSEvent(TimeSeries):
                 #     f"TSEvent `{self.name}`: `num_channels` has been increased "
                 #     + f"to {self.num_channels}."
                 # )
-        # - Assign channels
+        # - Assign channels and discard index of events per channel
         self._channels = new_channels
+        self._channel_index = None
 
     @property
     def num_channels(self):
@@ -2546,7 +3035,9 @@ class TSEvent(TimeSeries):
 
 def load_ts_from_file(path: str, expected_type: Optional[str] = None) -> TimeSeries:
     """
-    Load a timeseries object from an ``npz`` file
+    Load a timeseries object from an ``npz`` file, or from a directory written by ``save_chunked()``
+
+    Time series stored with :py:meth:`TSContinuous.save_chunked` or :py:meth:`TSEvent.save_chunked` are memory-mapped rather than read, so loading takes constant time. Methods such as ``clip()``, ``raster()`` or sampling the series then only read the chunks they need.
 
     :param str path:                    Filepath to load file
     :param Optional[str] expected_type: Specify expected type of timeseires (:py:class:`TSContinuous` or py:class:`TSEvent`). Default: ``None``, use whichever type is loaded.
@@ -2557,6 +3048,10 @@ def load_ts_from_file(path: str, expected_type: Optional[str] = None) -> TimeSer
     # - Make sure path is string (and not Path object)
     path = str(path)
 
+    # - Load memory-mapped series from a chunked directory
+    if os.path.isdir(path):
+        return _load_ts_chunked(path, expected_type)
+
     # - Load npz file from specified path
     dLoaded = np.load(path)
 
@@ -2595,3 +3090,224 @@ def load_ts_from_file(path: str, expected_type: Optional[str] = None) -> TimeSer
         )
     else:
         raise TypeError("Type `{}` not supported.".format(loaded_type))
+
+
+### --- Chunked, memory-mapped storage of time series
+
+# - Data types of arrays in chunked storage
+_CHUNKED_DTYPES = {"times": "float64", "samples": "float64", "channels": "int64"}
+
+
+def _load_chunked_meta(path: str) -> dict:
+    """
+    Load the attributes and chunk index of a time series saved with ``save_chunked()``
+
+    :param str path:    Directory containing the time series
+
+    :return dict:       Attributes and chunk index
+    """
+    with open(os.path.join(path, "meta.json"), "r") as file:
+        return json.load(file)
+
+
+def _map_chunked_array(path: str, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+    """
+    Memory-map a data array of a time series saved with ``save_chunked()``
+
+    Arrays are mapped copy-on-write: they can be modified in memory, but changes are not written to disk.
+
+    :param str path:                Directory containing the time series
+    :param str name:                Name of the array (``"times"``, ``"samples"`` or ``"channels"``)
+    :param Tuple[int, ...] shape:   Shape of the array
+
+    :return np.ndarray:             The memory-mapped array
+    """
+    dtype = _CHUNKED_DTYPES[name]
+
+    # - Empty files cannot be mapped
+    if np.prod(shape) == 0:
+        return np.zeros(shape, dtype)
+
+    return np.memmap(
+        os.path.join(path, name + ".dat"), dtype=dtype, mode="c", shape=shape
+    )
+
+
+def _save_chunked(
+    path: str,
+    series: TimeSeries,
+    str_type: str,
+    data: dict,
+    attributes: dict,
+    chunk_duration: Optional[float],
+    append: bool,
+):
+    """
+    Write a time series as raw binary files with an index of chunk start times
+
+    Chunks are consecutive time intervals of length ``chunk_duration``, starting at the start time of the first stored series. For each chunk, the start time and the index of its first sample are stored in ``meta.json``.
+
+    :param str path:                        Directory to write files into
+    :param TimeSeries series:               The time series to store
+    :param str str_type:                    Type of the time series (``"TSContinuous"`` or ``"TSEvent"``)
+    :param dict data:                       Data arrays other than ``times``, by name
+    :param dict attributes:                 Type-specific attributes to store
+    :param Optional[float] chunk_duration:  Duration of a single chunk
+    :param bool append:                     If ``True``, append to existing files
+    """
+    path = str(path)
+    times = np.asarray(series.times, float)
+
+    if append and os.path.isfile(os.path.join(path, "meta.json")):
+        meta = _load_chunked_meta(path)
+        if meta["str_type"] != str_type:
+            raise TypeError(
+                f"Time series at `{path}` is of type `{meta['str_type']}`. "
+                + f"Cannot append a `{str_type}`."
+            )
+
+        # - Make sure new samples follow the stored ones
+        num_stored = meta["num_samples"]
+        times_stored = _map_chunked_array(path, "times", (num_stored,))
+        if times.size > 0 and num_stored > 0 and times[0] < times_stored[-1]:
+            raise ValueError(
+                f"{str_type} `{series.name}`: Cannot append to `{path}`, because "
+                + "the series starts before the end of the stored series."
+            )
+
+        # - Number of channels must match for continuous series
+        if (
+            str_type == "TSContinuous"
+            and num_stored > 0
+            and attributes["num_channels"] != meta["num_channels"]
+        ):
+            raise ValueError(
+                f"TSContinuous `{series.name}`: Number of channels "
+                + f"({attributes['num_channels']}) does not match that of the "
+                + f"series stored in `{path}` ({meta['num_channels']})."
+            )
+        meta["num_channels"] = max(meta["num_channels"], attributes["num_channels"])
+        meta["t_stop"] = max(meta["t_stop"], float(series.t_stop))
+
+        # - Samples remain evenly spaced if spacing continues across the boundary
+        times_tail = np.r_[times_stored[-2:], times[:2]]
+        meta["uniform"] = bool(
+            (meta["uniform"] or num_stored < 2)
+            and (times.size < 2 or _is_uniform(times))
+            and (times_tail.size < 3 or _is_uniform(times_tail))
+        )
+
+        if chunk_duration is not None and chunk_duration != meta["chunk_duration"]:
+            warn(
+                f"{str_type} `{series.name}`: Using stored chunk duration "
+                + f"{meta['chunk_duration']} instead of {chunk_duration}."
+            )
+        file_mode = "ab"
+
+    else:
+        if chunk_duration is None:
+            chunk_duration = series.duration / 10 if series.duration > 0 else 1.0
+        if chunk_duration <= 0:
+            raise ValueError(f"{str_type} `{series.name}`: `chunk_duration` must be > 0.")
+
+        meta = {
+            "str_type": str_type,
+            "name": series.name,
+            "periodic": bool(series.periodic),
+            "t_start": float(series.t_start),
+            "t_stop": float(series.t_stop),
+            "num_samples": 0,
+            "uniform": bool(times.size < 2 or _is_uniform(times)),
+            "chunk_duration": float(chunk_duration),
+            "chunk_origin": float(min(series.t_start, times[0]))
+            if times.size > 0
+            else float(series.t_start),
+            "chunk_times": [],
+            "chunk_offsets": [],
+        }
+        meta.update(attributes)
+        meta["num_channels"] = int(meta["num_channels"])
+        os.makedirs(path, exist_ok=True)
+        file_mode = "wb"
+
+    # - Extend chunk index to cover the new samples
+    if times.size > 0:
+        idx_first = len(meta["chunk_times"])
+        idx_last = int(
+            np.floor((times[-1] - meta["chunk_origin"]) / meta["chunk_duration"])
+        )
+        chunk_times = (
+            meta["chunk_origin"]
+            + np.arange(idx_first, idx_last + 1) * meta["chunk_duration"]
+        )
+        chunk_offsets = meta["num_samples"] + np.searchsorted(times, chunk_times)
+        meta["chunk_times"] += chunk_times.tolist()
+        meta["chunk_offsets"] += chunk_offsets.tolist()
+
+    # - Write data
+    for name, array in [("times", times)] + list(data.items()):
+        with open(os.path.join(path, name + ".dat"), file_mode) as file:
+            np.ascontiguousarray(array, _CHUNKED_DTYPES[name]).tofile(file)
+    meta["num_samples"] += int(times.size)
+
+    with open(os.path.join(path, "meta.json"), "w") as file:
+        json.dump(meta, file)
+
+
+def _load_ts_chunked(path: str, expected_type: Optional[str] = None) -> TimeSeries:
+    """
+    Load a time series saved with ``save_chunked()``, memory-mapping its data
+
+    :param str path:                    Directory containing the time series
+    :param Optional[str] expected_type: Specify expected type of timeseires (:py:class:`TSContinuous` or py:class:`TSEvent`). Default: ``None``, use whichever type is loaded.
+
+    :return TimeSeries: Loaded time series object
+    :raises TypeError:  Unsupported or unexpected type
+    """
+    meta = _load_chunked_meta(path)
+    loaded_type = meta["str_type"]
+    if expected_type is not None and loaded_type != expected_type:
+        raise TypeError(
+            "Timeseries at `{}` is of type `{}`, which does not match expected type `{}`.".format(
+                path, loaded_type, expected_type
+            )
+        )
+
+    num_samples = meta["num_samples"]
+    if loaded_type == "TSContinuous":
+        series = TSContinuous(
+            num_channels=meta["num_channels"],
+            t_start=meta["t_start"],
+            t_stop=meta["t_stop"],
+            periodic=meta["periodic"],
+            name=meta["name"],
+            units=meta["units"],
+            interp_kind=meta["interp_kind"],
+        )
+        series._samples = _map_chunked_array(
+            path, "samples", (num_samples, meta["num_channels"])
+        )
+    elif loaded_type == "TSEvent":
+        series = TSEvent(
+            num_channels=meta["num_channels"],
+            t_start=meta["t_start"],
+            t_stop=meta["t_stop"],
+            periodic=meta["periodic"],
+            name=meta["name"],
+        )
+        series._channels = _map_chunked_array(path, "channels", (num_samples,))
+    else:
+        raise TypeError("Type `{}` not supported.".format(loaded_type))
+
+    # - Assign time trace and chunk index
+    series._times = _map_chunked_array(path, "times", (num_samples,))
+    series._chunk_index = _ChunkIndex(
+        times=series._times,
+        chunk_times=np.array(meta["chunk_times"], float),
+        chunk_offsets=np.array(meta["chunk_offsets"], np.intp),
+        uniform=meta["uniform"],
+    )
+    if loaded_type == "TSContinuous":
+        series._create_interpolator()
+
+    return series
@@ -12,6 +12,18 @@ dModules = {
     ),
     ".gpl.type_handling": ("ArrayLike", "to_scalar"),
     ".gpl.timedarray_shift": "TimedArray",
+    ".gpl.time_buckets": (
+        "bucket_length",
+        "pad_to_bucket",
+        "masked_mean",
+        "BucketSpec",
+    ),
+    ".gpl.kernel_cache": (
+        "get_kernel",
+        "clear_kernel_registry",
+        "enable_compilation_cache",
+    ),
+    ".gpl.shared_buffer": "SharedArrayBuffer",
 }
 
 
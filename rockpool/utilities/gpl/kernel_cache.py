@@ -0,0 +1,112 @@
+"""
+kernel_cache.py - Process-wide registry of compiled simulation kernels, and an on-disk
+                  cache for numba and JAX compilation results.
+"""
+
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+from warnings import warn
+
+# - Configure exports
+__all__ = ["get_kernel", "clear_kernel_registry", "enable_compilation_cache"]
+
+# - Registry of compiled kernels {family: {key: kernel}}, each family in least-recently-used order
+_kernel_registry: Dict[str, "OrderedDict[Hashable, Callable]"] = {}
+
+# - Maximum number of kernels kept per family
+MAX_KERNELS_PER_FAMILY = 16
+
+# - Environment variable that enables the on-disk cache when rockpool is imported
+CACHE_DIR_ENV = "ROCKPOOL_CACHE_DIR"
+
+
+def get_kernel(family: str, key: Hashable, builder: Callable[[], Callable]) -> Callable:
+    """
+    Return a compiled kernel from the process-wide registry, building it on first use
+
+    Kernels that are generated for a given key, such as an activation function (or other parameters that have to be fixed at compile time), are shared between all layers of a process that use the same key, so that the compilation cost is only paid once. Keys are compared by identity for functions, so layers with different function objects, e.g. separately defined lambdas, get separate kernels. At most ``MAX_KERNELS_PER_FAMILY`` kernels are kept per family; the least recently used kernel is dropped from the registry when a new one is added. Layers keep their own references to the kernels they use, so dropping a kernel from the registry only means that it is compiled again for the next layer with that key.
+
+    :param str family:          Name of the kernel family, e.g. ``"rate.ff_evolve"``
+    :param Hashable key:        Key identifying the kernel within its family, e.g. the activation function
+    :param Callable builder:    Function without arguments that builds the kernel, if it is not yet in the registry
+
+    :return Callable:           The compiled kernel
+    """
+    kernels = _kernel_registry.setdefault(family, OrderedDict())
+    try:
+        kernels.move_to_end(key)
+        return kernels[key]
+    except KeyError:
+        kernel = kernels[key] = builder()
+        while len(kernels) > MAX_KERNELS_PER_FAMILY:
+            kernels.popitem(last=False)
+        return kernel
+
+
+def clear_kernel_registry(family: Optional[str] = None):
+    """
+    Remove kernels from the process-wide registry
+
+    :param Optional[str] family:    If provided, only remove kernels of this family. Default: ``None``, remove all kernels
+    """
+    if family is None:
+        _kernel_registry.clear()
+    else:
+        _kernel_registry.pop(family, None)
+
+
+def enable_compilation_cache(cache_dir: Optional[str] = None) -> str:
+    """
+    Store numba and JAX compilation results on disk, so that they can be reused by later processes
+
+    numba kernels decorated with ``cache=True`` choose their cache location when their module is imported. This function should therefore be called before importing any layers, or the environment variable ``ROCKPOOL_CACHE_DIR`` should be set, in which case the cache is enabled when :py:mod:`rockpool` is imported. The JAX cache is only enabled if the installed version of JAX supports a persistent compilation cache.
+
+    :param Optional[str] cache_dir: Directory for the cache. Default: ``$ROCKPOOL_CACHE_DIR`` if set, otherwise ``~/.cache/rockpool``
+
+    :return str:                    The cache directory in use
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get(
+            CACHE_DIR_ENV, os.path.join(os.path.expanduser("~"), ".cache", "rockpool")
+        )
+    cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+
+    # - numba: set cache directory for this process and any worker processes
+    numba_dir = os.path.join(cache_dir, "numba")
+    os.makedirs(numba_dir, exist_ok=True)
+    os.environ["NUMBA_CACHE_DIR"] = numba_dir
+    try:
+        from numba import config as numba_config
+
+        numba_config.CACHE_DIR = numba_dir
+    except ImportError:
+        pass
+
+    # - JAX: persistent compilation cache, if available
+    jax_dir = os.path.join(cache_dir, "jax")
+    try:
+        import jax
+    except ImportError:
+        pass
+    else:
+        os.makedirs(jax_dir, exist_ok=True)
+        try:
+            jax.config.update("jax_compilation_cache_dir", jax_dir)
+        except (AttributeError, KeyError):
+            try:
+                from jax.experimental.compilation_cache import compilation_cache
+
+                compilation_cache.initialize_cache(jax_dir)
+            except (ImportError, AttributeError):
+                warn(
+                    "The installed version of JAX does not support a persistent "
+                    + "compilation cache. JAX functions will be compiled in each process."
+                )
+
+    return cache_dir
+
+
+# - Enable on-disk cache if requested through the environment
+if os.environ.get(CACHE_DIR_ENV):
+    enable_compilation_cache()
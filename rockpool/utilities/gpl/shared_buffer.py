@@ -0,0 +1,238 @@
+"""
+shared_buffer.py - Ring buffer in shared memory, for passing arrays between processes
+                   without pickling them into queues
+"""
+
+from typing import Optional, Tuple, List, Any
+import numpy as np
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    # - Python < 3.8: Arrays are passed in the messages themselves
+    SharedMemory = None
+
+# - Configure exports
+__all__ = ["SharedArrayBuffer"]
+
+# - Alignment of arrays within the buffer, in bytes
+_ALIGNMENT = 64
+
+# - Names of shared memory blocks created by this process
+_owned_blocks = set()
+
+
+def _attach_block(name: str) -> "SharedMemory":
+    """
+    Attach to an existing shared memory block, without registering it for clean-up by this process
+
+    :param str name:        Name of the block
+
+    :return SharedMemory:   The attached block
+    """
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+
+    # - Python < 3.13: Attaching registers the block with the resource tracker
+    from multiprocessing import parent_process, resource_tracker
+
+    tracker = resource_tracker._resource_tracker
+    tracker_running = getattr(tracker, "_fd", None) is not None
+    block = SharedMemory(name=name)
+
+    # - Processes started by `multiprocessing` share the tracker of their parent, and the
+    #   owner of a block shares the tracker of its own process. That tracker keeps the
+    #   registration of the owner, which is removed when the owner unlinks the block.
+    #   Only a tracker of this process alone must forget the block, so that it does not
+    #   unlink it when this process exits.
+    shares_tracker = name in _owned_blocks or (
+        tracker_running and parent_process() is not None
+    )
+    if not shares_tracker:
+        resource_tracker.unregister(block._name, "shared_memory")
+    return block
+
+
+def _create_block(size: int) -> "SharedMemory":
+    """
+    Create a new shared memory block, owned by this process
+
+    :param int size:        Size of the block in bytes
+
+    :return SharedMemory:   The new block
+    """
+    block = SharedMemory(create=True, size=size)
+    _owned_blocks.add(block.name)
+    return block
+
+
+def _release_block(block: "SharedMemory"):
+    """
+    Close and unlink a shared memory block that is owned by this process
+
+    :param SharedMemory block:  The block to release
+    """
+    block.close()
+    block.unlink()
+    _owned_blocks.discard(block.name)
+
+
+class SharedArrayBuffer:
+    """
+    Ring buffer in shared memory, for passing numpy arrays from one process to another
+
+    One process creates the buffer with a given capacity and owns the underlying shared memory block. Other processes create an unattached buffer and attach to the block named in the messages they receive. `.put` copies arrays into the buffer and returns a small message describing their location, which can be sent through a queue instead of the arrays. `.get` copies the arrays out of the buffer. Successive messages are written one after the other, wrapping around at the end of the buffer, so a message must be read before the writer wraps around to it. This is the case for synchronous request / result protocols.
+
+    Messages that do not fit into the buffer, and all messages if shared memory is not available (Python < 3.8), contain the arrays themselves.
+
+    :Usage:
+
+    >>> buffer = SharedArrayBuffer(capacity=2 ** 20)  # Owner process
+    >>> queue.put(buffer.put(times, samples))
+    ...
+    >>> buffer = SharedArrayBuffer()  # Other process
+    >>> times, samples = buffer.get(queue.get())
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        """
+        Ring buffer in shared memory for passing numpy arrays between processes
+
+        :param Optional[int] capacity:  Size of the buffer in bytes. If provided, a new shared memory block is created and owned by this object. Default: ``None``, do not create a block, but attach to blocks named in received messages
+        """
+        self._block = None
+        self._owner = capacity is not None
+        self._position = 0
+        if self._owner and SharedMemory is not None:
+            self._block = _create_block(max(int(capacity), 1))
+
+    @property
+    def name(self) -> Optional[str]:
+        """ (str) Name of the shared memory block in use, or ``None`` """
+        return None if self._block is None else self._block.name
+
+    @property
+    def capacity(self) -> int:
+        """ (int) Size of the buffer in bytes """
+        return 0 if self._block is None else self._block.size
+
+    def attach(self, name: Optional[str]):
+        """
+        Use the shared memory block with a given name, for example after the owner has enlarged the buffer
+
+        :param Optional[str] name:  Name of the shared memory block. If ``None``, messages contain the arrays themselves
+        """
+        if self._owner:
+            raise RuntimeError(
+                "SharedArrayBuffer: The owner of a buffer cannot attach to other blocks."
+            )
+        if name == self.name:
+            return
+        if self._block is not None:
+            self._block.close()
+        self._block = None if name is None else _attach_block(name)
+        self._position = 0
+
+    def reserve(self, num_bytes: int):
+        """
+        Make sure that a message of a given size fits into the buffer, enlarging it if necessary
+
+        Only the owner can enlarge the buffer. Processes that write to the buffer must then `.attach` to the new block.
+
+        :param int num_bytes:   Size of the message, in bytes
+        """
+        if not self._owner or self._block is None:
+            return
+        num_bytes += _ALIGNMENT * 8
+        if num_bytes > self._block.size:
+            new_size = max(num_bytes, 2 * self._block.size)
+            _release_block(self._block)
+            self._block = _create_block(new_size)
+            self._position = 0
+
+    def put(self, *arrays: Optional[np.ndarray]) -> Tuple[Optional[str], List[Any]]:
+        """
+        Copy arrays into the buffer
+
+        :param Optional[np.ndarray] arrays: Arrays to pass on. ``None`` is passed on as ``None``
+
+        :return (name, descriptors):        Message to be sent to the reading process
+        """
+        arrays = [None if a is None else np.ascontiguousarray(a) for a in arrays]
+        sizes = [0 if a is None else _aligned(a.nbytes) for a in arrays]
+
+        if self._block is None or sum(sizes) > self._block.size:
+            # - Pass arrays in the message itself
+            return None, arrays
+
+        if self._position + sum(sizes) > self._block.size:
+            # - Wrap around to the start of the buffer
+            self._position = 0
+
+        descriptors = []
+        for array, size in zip(arrays, sizes):
+            if array is None:
+                descriptors.append(None)
+                continue
+            target = np.ndarray(
+                array.shape, array.dtype, buffer=self._block.buf, offset=self._position
+            )
+            target[...] = array
+            del target
+            descriptors.append((self._position, array.dtype.str, array.shape))
+            self._position += size
+
+        return self.name, descriptors
+
+    def get(
+        self, message: Tuple[Optional[str], List[Any]]
+    ) -> List[Optional[np.ndarray]]:
+        """
+        Copy arrays out of the buffer
+
+        :param Tuple message:   Message as returned by `.put` of the writing process
+
+        :return List[Optional[np.ndarray]]: The arrays passed to `.put`
+        """
+        name, descriptors = message
+        if name is None:
+            # - Arrays are contained in the message
+            return list(descriptors)
+
+        if name != self.name:
+            self.attach(name)
+
+        arrays = []
+        for descriptor in descriptors:
+            if descriptor is None:
+                arrays.append(None)
+            else:
+                offset, dtype, shape = descriptor
+                source = np.ndarray(shape, dtype, buffer=self._block.buf, offset=offset)
+                arrays.append(source.copy())
+                del source
+        return arrays
+
+    def close(self):
+        """
+        Detach from the shared memory block. The owner also releases the block
+        """
+        if self._block is not None:
+            if self._owner:
+                _release_block(self._block)
+            else:
+                self._block.close()
+            self._block = None
+
+
+def _aligned(num_bytes: int) -> int:
+    """
+    Round a number of bytes up to the alignment of arrays in the buffer
+
+    :param int num_bytes:   Number of bytes
+
+    :return int:            Aligned number of bytes
+    """
+    return -(-num_bytes // _ALIGNMENT) * _ALIGNMENT
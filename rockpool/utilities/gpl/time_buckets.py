@@ -0,0 +1,90 @@
+"""
+time_buckets.py - Pad time series to a small set of bucket lengths, so that compiled
+                  functions can be reused for inputs of different durations.
+"""
+
+from typing import Optional, Union, Tuple, Any
+import numpy as np
+
+from .type_handling import ArrayLike
+
+# - Configure exports
+__all__ = ["bucket_length", "pad_to_bucket", "masked_mean", "BucketSpec"]
+
+# - Type alias for bucket specifications
+BucketSpec = Optional[Union[str, ArrayLike]]
+
+
+def bucket_length(num_timesteps: int, buckets: BucketSpec = "pow2") -> int:
+    """
+    Determine the length of the bucket that holds a given number of time steps
+
+    :param int num_timesteps:   Number of time steps to be held
+    :param BucketSpec buckets:  ``None``: No bucketing, the bucket length is ``num_timesteps``. ``"pow2"``: Round up to the next power of two. Sequence of ints: Round up to the next of these lengths. Longer inputs are rounded up to a multiple of the longest bucket. Default: ``"pow2"``
+
+    :return int:                Bucket length
+    """
+    num_timesteps = int(num_timesteps)
+
+    if buckets is None:
+        return num_timesteps
+
+    if isinstance(buckets, str):
+        if buckets != "pow2":
+            raise ValueError(
+                f"Unknown bucket specification `{buckets}`. Use `'pow2'`, a sequence of lengths or `None`."
+            )
+        return 1 if num_timesteps <= 1 else 1 << (num_timesteps - 1).bit_length()
+
+    lengths = np.sort(np.asarray(buckets, int).ravel())
+    if lengths.size == 0 or lengths[0] < 1:
+        raise ValueError("Bucket lengths must be positive integers.")
+
+    idx_bucket = np.searchsorted(lengths, num_timesteps)
+    if idx_bucket < lengths.size:
+        return int(lengths[idx_bucket])
+    else:
+        return int(np.ceil(num_timesteps / lengths[-1])) * int(lengths[-1])
+
+
+def pad_to_bucket(
+    data: np.ndarray, buckets: BucketSpec = "pow2", axis: int = 0
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Pad a time series with zeros along its time axis, up to the length of its bucket
+
+    :param np.ndarray data:     Time series to pad [T, ...]
+    :param BucketSpec buckets:  Bucket specification. See :py:func:`bucket_length`. Default: ``"pow2"``
+    :param int axis:            Time axis of ``data``. Default: ``0``
+
+    :return (np.ndarray, np.ndarray, int): (padded, valid_ts, length)
+        padded:     Padded time series [L, ...]
+        valid_ts:   Boolean mask, ``True`` for time steps of the original series [L,]
+        length:     Bucket length ``L``
+    """
+    num_timesteps = np.shape(data)[axis]
+    length = bucket_length(num_timesteps, buckets)
+    if length > num_timesteps:
+        padding = [(0, 0)] * np.ndim(data)
+        padding[axis] = (0, length - num_timesteps)
+        data = np.pad(np.asarray(data), padding)
+    valid_ts = np.arange(length) < num_timesteps
+    return data, valid_ts, length
+
+
+def masked_mean(data: Any, valid_ts: Optional[Any] = None) -> Any:
+    """
+    Mean of a time series over valid time steps only
+
+    Uses array methods only, so that this works for ``numpy`` as well as ``jax`` arrays.
+
+    :param data:        Time series [T, ...]
+    :param valid_ts:    Boolean mask of valid time steps [T,]. If ``None``, all time steps are valid
+
+    :return:            Mean over all valid entries
+    """
+    if valid_ts is None:
+        return data.mean()
+
+    valid = valid_ts.reshape((-1,) + (1,) * (data.ndim - 1))
+    return (data * valid).sum() / (valid_ts.sum() * (data.size // data.shape[0]))
@@ -0,0 +1,114 @@
+"""
+Test RecAEIFSpkInNumba layer in aeif_numba.py and its use as backend of VirtualDynapse
+"""
+
+import numpy as np
+
+
+def test_imports():
+    from rockpool.layers import RecAEIFSpkInNumba
+
+
+def test_aeif_numba_evolve():
+    """ Evolutions in consecutive blocks are identical to a single evolution """
+    from rockpool import TSEvent
+    from rockpool.layers import RecAEIFSpkInNumba
+
+    np.random.seed(1)
+    weights_in = np.array([[0.1, 0.0, 0.0], [0.0, 0.1, 0.0]])
+    weights_rec = np.array([[0, 0.1, 0.1], [0, 0, -0.05], [0, 0, 0]])
+    ts_input = TSEvent(
+        np.sort(np.random.rand(20)) * 0.1,
+        np.random.randint(2, size=20),
+        t_start=0,
+        t_stop=0.1,
+        num_channels=2,
+    )
+
+    lyr = RecAEIFSpkInNumba(
+        weights_in=weights_in,
+        weights_rec=weights_rec,
+        v_thresh=0.01,
+        v_reset=0,
+        v_rest=0,
+        spike_adapt=10.0,
+        subthresh_adapt=0.0,
+        record=True,
+        num_cores=2,
+    )
+    assert lyr.size_in == 2
+    assert lyr.size == 3
+
+    ts_out = lyr.evolve(ts_input, duration=0.1)
+    assert lyr.t == 0.1
+    assert ts_out.times.size > 0
+    assert np.all(np.diff(ts_out.times) >= 0)
+    assert lyr.recorded_states.samples.shape == (1000, 3)
+    assert np.all(lyr.adapt >= 0)
+
+    # - Same result in two blocks, carrying states and spikes in transit
+    lyr.reset_all()
+    ts_out_0 = lyr.evolve(ts_input, duration=0.0537)
+    ts_out_1 = lyr.evolve(ts_input, duration=0.1 - lyr.t)
+    assert np.allclose(np.r_[ts_out_0.times, ts_out_1.times], ts_out.times)
+    assert np.array_equal(np.r_[ts_out_0.channels, ts_out_1.channels], ts_out.channels)
+
+    # - Reconstruct from dict
+    lyr_copy = RecAEIFSpkInNumba.load_from_dict(lyr.to_dict())
+    ts_out_copy = lyr_copy.evolve(ts_input, duration=0.1)
+    assert np.allclose(ts_out_copy.times, ts_out.times)
+
+
+def test_virtual_dynapse_numba():
+    """ Simulate the full virtual device in-process """
+    from inspect import signature
+    from rockpool import TSEvent
+    from rockpool.layers import VirtualDynapse
+
+    # - NEST remains the default backend, also for configurations without `backend`
+    assert signature(VirtualDynapse).parameters["backend"].default == "nest"
+
+    # - External input to chip 0, which projects to chip 1, then 2, then 3
+    num_neurons_chip = 1024
+    connections_ext = np.zeros((num_neurons_chip, 4 * num_neurons_chip), int)
+    connections_rec = np.zeros((4 * num_neurons_chip, 4 * num_neurons_chip), int)
+    ids_in = np.arange(0, num_neurons_chip, 8)
+    connections_ext[ids_in, ids_in] = 1
+    for chip in range(3):
+        ids_pre = ids_in + chip * num_neurons_chip
+        connections_rec[ids_pre, ids_pre + num_neurons_chip] = 1
+
+    outputs = []
+    for num_threads in (1, 2):
+        vd = VirtualDynapse(
+            connections_ext=connections_ext,
+            connections_rec=connections_rec,
+            baseweight_e=0.1,
+            mismatch=False,
+            num_threads=num_threads,
+            backend="numba",
+        )
+        assert vd.backend == "numba"
+        assert vd.num_threads == num_threads
+
+        ts_input = TSEvent(
+            np.repeat([0.001, 0.011], ids_in.size),
+            np.tile(ids_in, 2),
+            t_start=0,
+            t_stop=0.05,
+            num_channels=num_neurons_chip,
+        )
+        outputs.append(vd.evolve(ts_input, duration=0.05))
+
+    # - Activity propagates through all chips
+    ts_out = outputs[0]
+    first_spikes = [
+        ts_out.times[(ts_out.channels // num_neurons_chip) == chip].min()
+        for chip in range(4)
+    ]
+    assert np.all(np.diff(first_spikes) > 0)
+    assert set(np.unique(ts_out.channels % num_neurons_chip)) == set(ids_in)
+
+    # - Result does not depend on the number of threads
+    assert np.array_equal(outputs[1].times, ts_out.times)
+    assert np.array_equal(outputs[1].channels, ts_out.channels)
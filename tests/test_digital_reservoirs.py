@@ -100,6 +100,46 @@ def test_cliaf_evolve_resetting():
     assert (rl.state == 0).all(), "State has not been reset correctly"
 
 
+def test_cliaf_evolve_delay():
+    """
+    Test that recurrent spikes of RecCLIAF arrive after the synaptic delay, also across evolutions.
+    """
+    from rockpool.layers import RecCLIAF
+    from rockpool.timeseries import TSEvent
+
+    # - Input weight matrix
+    weights_in = np.array([[12, 0, 0]])
+    # - Recurrent weight matrix
+    weights_rec = np.array([[0, 6, 0], [0, 0, 0], [0, 0, 0]])
+
+    # - Generate layer
+    rl = RecCLIAF(
+        weights_in=weights_in,
+        weights_rec=weights_rec,
+        v_thresh=5,
+        dt=0.1,
+        delay=0.35,
+        v_subtract=5,
+    )
+
+    # - Input spike
+    ts_input = TSEvent(times=[0.15], channels=[0], t_stop=1)
+
+    # - Expectation: Neuron 0 spikes twice at t=0.2, which makes neuron 1
+    #                spike twice at t=0.5. Evolution is split before t=0.5
+    tsOutput0 = rl.evolve(ts_input, duration=0.4)
+    tsOutput1 = rl.evolve(ts_input, duration=0.4)
+
+    assert np.allclose(
+        tsOutput0.times, [0.2, 0.2]
+    ), "Output spike times not as expected"
+    assert (tsOutput0.channels == 0).all(), "Output spike channels not as expected"
+    assert np.allclose(
+        tsOutput1.times, [0.5, 0.5]
+    ), "Output spike times not as expected"
+    assert (tsOutput1.channels == 1).all(), "Output spike channels not as expected"
+
+
 ### --- Test iaf_digital.RecDIAF
 
 
@@ -243,3 +283,90 @@ def test_diaf_evolve_vfvrest():
     #                and of neuron 2 to decrease. Due to the leak, both potentials
     #                should have moved back to 0 after 0.32 s.
     assert np.allclose(rl.state, np.zeros(3)), "Final state not as expected"
+
+
+def test_diaf_numba_heap():
+    """
+    Test that the compiled engine of RecDIAF matches the heap-based reference implementation.
+    """
+    from rockpool.layers import RecDIAF
+    from rockpool.timeseries import TSEvent
+
+    np.random.seed(1)
+    weights_in = np.round(np.random.randn(4, 20) * 20) * (np.random.rand(4, 20) < 0.5)
+    weights_rec = np.round(np.random.randn(20, 20) * 10) * (
+        np.random.rand(20, 20) < 0.3
+    )
+
+    kwargs = dict(
+        weights_in=weights_in,
+        weights_rec=weights_rec,
+        v_thresh=30,
+        v_subtract=20,
+        delay=0.002,
+        refractory=0.001,
+        tau_leak=0.005,
+        leak=1,
+        v_rest=0,
+        monitor_id=[0, 5, 10],
+    )
+    rl_numba = RecDIAF(use_numba=True, **kwargs)
+    rl_heap = RecDIAF(use_numba=False, **kwargs)
+
+    for i_evolve in range(2):
+        ts_input = TSEvent(
+            times=np.sort(np.random.rand(300)) * 0.1 + 0.1 * i_evolve,
+            channels=np.random.randint(4, size=300),
+            t_start=0.1 * i_evolve,
+            t_stop=0.1 * (i_evolve + 1),
+        )
+        ts_out_numba = rl_numba.evolve(ts_input, duration=0.1)
+        ts_out_heap = rl_heap.evolve(ts_input, duration=0.1)
+
+        assert np.array_equal(
+            ts_out_numba.times, ts_out_heap.times
+        ), "Output spike times differ between engines"
+        assert np.array_equal(
+            ts_out_numba.channels, ts_out_heap.channels
+        ), "Output spike channels differ between engines"
+        assert np.array_equal(rl_numba.state, rl_heap.state), "States differ"
+        assert np.allclose(
+            rl_numba.ts_recorded.samples,
+            rl_heap.ts_recorded.samples,
+            equal_nan=True,
+        ), "Recorded states differ"
+
+
+def test_diaf_events_after_evolution():
+    """
+    Test that events after the end of an evolution remain on the heap, with both engines
+    """
+    from rockpool.layers import RecDIAF
+    from rockpool.timeseries import TSEvent
+
+    for use_numba in (True, False):
+        rl = RecDIAF(
+            weights_in=np.array([[20]]),
+            weights_rec=np.array([[5]]),
+            v_thresh=10,
+            v_reset=0,
+            delay=0.002,
+            tau_leak=1,
+            leak=0,
+            use_numba=use_numba,
+        )
+
+        # - Input spike causes an output spike, which arrives at the recurrent
+        #   synapse after the end of the evolution
+        ts_input = TSEvent(times=[0.0095], channels=[0], t_start=0, t_stop=0.01)
+        ts_out = rl.evolve(ts_input, duration=0.01)
+        assert np.allclose(ts_out.times, [0.0095]), "Output spike not as expected"
+        assert (rl.state == 0).all(), "Event after end of evolution was processed"
+        assert len(rl.heap_remaining_spikes) == 1, "Remaining events not as expected"
+        t_remaining, channel_remaining = rl.heap_remaining_spikes[0]
+        assert np.isclose(t_remaining, 0.0115) and channel_remaining == 1
+
+        # - Remaining event is processed in the next evolution
+        rl.evolve(duration=0.01)
+        assert (rl.state == 5).all(), "Remaining event has not been processed"
+        assert len(rl.heap_remaining_spikes) == 0
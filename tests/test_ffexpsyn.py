@@ -73,6 +73,52 @@ def test_ffexpsyn():
     # ), "Training led to different results"
 
 
+def test_ffexpsyn_evolve_batch():
+    # - Test batched evolution of FFExpSyn
+    from rockpool.layers import FFExpSyn
+    from rockpool.timeseries import TSEvent
+    import numpy as np
+    import pytest
+
+    size_in = 4
+    dt = 0.001
+    lyr = FFExpSyn(np.random.rand(size_in, 3), dt=dt, bias=0.1, tau_syn=0.01)
+
+    # - Input spike trains for a batch of trials
+    ts_inputs = [
+        TSEvent(
+            np.sort(np.random.rand(20)) * 0.05,
+            np.random.randint(size_in, size=20),
+            t_stop=0.05,
+            num_channels=size_in,
+        )
+        for _ in range(3)
+    ]
+    outputs = lyr.evolve_batch(ts_inputs)
+    assert lyr.t == 0
+
+    # - Compare with sequential evolution
+    for ts_input, output in zip(ts_inputs, outputs):
+        output_single = lyr.evolve(ts_input)
+        lyr.reset_all()
+        assert np.allclose(output.times, output_single.times)
+        assert np.allclose(output.samples, output_single.samples)
+
+    # - Raster input
+    rasters = np.random.randint(2, size=(2, 50, size_in))
+    outputs = lyr.evolve_batch(rasters)
+    assert len(outputs) == 2
+    assert outputs[0].samples.shape == (51, 3)
+
+    # - Rasters that are too short or have the wrong number of channels are rejected
+    with pytest.raises(ValueError):
+        lyr.evolve_batch(rasters, num_timesteps=60)
+    with pytest.raises(ValueError):
+        lyr.evolve_batch(rasters, duration=0.06)
+    with pytest.raises(ValueError):
+        lyr.evolve_batch(np.random.randint(2, size=(2, 50, size_in + 1)))
+
+
 def test_ffexpsyntorch():
     # - Test FFIAFTorch
 
@@ -135,3 +181,105 @@ def test_ffexpsyntorch():
             np.isclose(flT.weights, flM.weights, rtol=1e-4, atol=1e-2).all()
             and np.isclose(flT.bias, flM.bias, rtol=1e-4, atol=1e-2).all()
         ), "Training led to different results"
+
+
+def test_ffexpsyn_filter_state():
+    # - Test recursive filtering with synaptic state carried across batches
+    from rockpool.layers import FFExpSyn
+    from rockpool.timeseries import TSEvent, TSContinuous
+    import numpy as np
+
+    size_in = 4
+    dt = 0.001
+    tau_syn = 0.01
+    lyr = FFExpSyn(np.random.rand(size_in, 2), dt=dt, tau_syn=tau_syn)
+
+    # - Recursive filter matches convolution with the synaptic kernel
+    raster = np.random.randint(2, size=(100, size_in)).astype(float)
+    filtered, state = lyr._filter_data(raster, num_timesteps=100)
+    kernel = np.r_[0, np.exp(-np.arange(100) * dt / tau_syn)]
+    expected = np.array([np.convolve(ch, kernel)[:100] for ch in raster.T]).T
+    assert np.allclose(filtered, expected)
+
+    # - Filtering in two parts with carried state matches a single pass
+    first, state_mid = lyr._filter_data(raster[:60], num_timesteps=60)
+    second, state_end = lyr._filter_data(
+        raster[60:], num_timesteps=40, state=state_mid
+    )
+    assert np.allclose(np.vstack((first, second)), filtered)
+    assert np.allclose(state_end, state)
+
+    # - Training data from two batches matches training data from a single batch
+    ts_input = TSEvent(
+        np.sort(np.random.choice(100, 30, replace=False) + 0.5) * dt,
+        np.random.randint(size_in, size=30),
+        t_stop=0.1,
+        num_channels=size_in,
+    )
+    target = np.random.rand(100, 2)
+    ts_target = TSContinuous(np.arange(100) * dt, target)
+    inp_full, __, __ = lyr._prepare_training_data(
+        ts_target, ts_input, is_first=True, is_last=True
+    )
+    inp_first, __, __ = lyr._prepare_training_data(
+        TSContinuous(np.arange(51) * dt, target[:51]),
+        ts_input,
+        is_first=True,
+        is_last=False,
+    )
+    inp_second, __, __ = lyr._prepare_training_data(
+        TSContinuous(np.arange(50, 100) * dt, target[50:]),
+        ts_input,
+        is_first=False,
+        is_last=True,
+    )
+    assert np.allclose(np.vstack((inp_first, inp_second)), inp_full)
+
+
+def test_ffexpsyn_train_logreg_batches():
+    # - Logistic regression training on two batches sees the same data as on one batch
+    from rockpool.layers import FFExpSyn
+    from rockpool.timeseries import TSEvent, TSContinuous
+    import numpy as np
+
+    size_in = 4
+    dt = 0.001
+    ts_input = TSEvent(
+        np.sort(np.random.choice(100, 30, replace=False) + 0.5) * dt,
+        np.random.randint(size_in, size=30),
+        t_stop=0.1,
+        num_channels=size_in,
+    )
+    target = np.random.randint(2, size=(101, 2)).astype(float)
+
+    def record_gradients(lyr):
+        # - Record training data passed on to gradient computation
+        gradient_inputs = []
+        gradients = lyr._gradients
+
+        def _gradients(inp, target, regularize):
+            gradient_inputs.append((inp, target))
+            return gradients(inp, target, regularize)
+
+        lyr._gradients = _gradients
+        return gradient_inputs
+
+    lyr = FFExpSyn(np.zeros((size_in, 2)), dt=dt, tau_syn=0.01)
+    gradient_inputs = record_gradients(lyr)
+    lyr.train_logreg(TSContinuous(np.arange(101) * dt, target), ts_input)
+    inp_full, target_full = gradient_inputs[0]
+    state_full = lyr._training_state
+
+    lyr_batched = FFExpSyn(np.zeros((size_in, 2)), dt=dt, tau_syn=0.01)
+    gradient_inputs = record_gradients(lyr_batched)
+    lyr_batched.train_logreg(TSContinuous(np.arange(51) * dt, target[:51]), ts_input)
+    lyr_batched.train_logreg(
+        TSContinuous(np.arange(50, 101) * dt, target[50:]), ts_input
+    )
+    (inp_first, target_first), (inp_second, target_second) = gradient_inputs
+
+    assert inp_full.shape == (100, size_in + 1)
+    assert np.all(inp_full[:, -1] == 1)
+    assert np.allclose(np.vstack((inp_first, inp_second)), inp_full)
+    assert np.allclose(np.vstack((target_first, target_second)), target_full)
+    assert np.allclose(lyr_batched._training_state, state_full)
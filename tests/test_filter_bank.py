@@ -138,5 +138,55 @@ def test_butter_filter():
     lyr.reset_all()
     lyr.terminate()
 
+def test_filter_bank_streaming():
+    # - Evolving in consecutive blocks matches a single evolution
+    from rockpool.layers import ButterMelFilter
+
+    fs = 10e3
+    signal = np.random.randn(4000)
+    ts_input = TSContinuous(times=np.arange(4000) / fs, samples=signal)
+
+    for num_workers in (1, 2):
+        lyr = ButterMelFilter(fs=fs, num_filters=16, num_workers=num_workers)
+        ts_full = lyr.evolve(ts_input)
+        lyr.reset_all()
+
+        # - Second block does not start at a retained sample
+        ts_first = lyr.evolve(ts_input, num_timesteps=1550)
+        ts_second = lyr.evolve(ts_input)
+        lyr.terminate()
+
+        assert np.allclose(
+            np.concatenate((ts_first.times, ts_second.times)), ts_full.times
+        )
+        assert np.allclose(
+            np.vstack((ts_first.samples, ts_second.samples)), ts_full.samples
+        )
+
+
+def test_filter_bank_decimation():
+    # - Fused filtering and decimation matches full-rate filtering with scipy
+    from scipy.signal import sosfilt
+    from rockpool.layers import ButterMelFilter
+
+    fs = 10e3
+    signal = np.random.randn(2000)
+    ts_input = TSContinuous(times=np.arange(2000) / fs, samples=signal)
+
+    lyr = ButterMelFilter(fs=fs, num_filters=8, num_workers=3)
+    ts_output = lyr.evolve(ts_input)
+    lyr.terminate()
+
+    expected = np.array(
+        [
+            sosfilt(lyr.filter_lowpass, np.abs(sosfilt(sos, signal)))[
+                :: lyr.downsample
+            ]
+            for sos in lyr.filters
+        ]
+    ).T
+    assert np.allclose(ts_output.samples, expected)
+
+
 test_butter_filter()
 test_butter_mel_filter()
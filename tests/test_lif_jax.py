@@ -89,6 +89,98 @@ def test_RecLIFJax():
         )
 
 
+def test_RecLIFJax_evolve_batch():
+    """ Test batched evolution of RecLIFJax """
+    from rockpool import TSEvent
+    from rockpool.layers import RecLIFJax
+
+    net_size = 2
+    dt = 1e-3
+
+    fl0 = RecLIFJax(
+        w_recurrent=2 * np.random.rand(net_size, net_size) - 1,
+        bias=2 * np.random.rand(net_size) - 1,
+        tau_mem=20e-3 * np.ones(net_size),
+        tau_syn=20e-3 * np.ones(net_size),
+        dt=dt,
+    )
+
+    # - Input spike trains for a batch of trials
+    ts_inputs = [
+        TSEvent(
+            np.arange(15) * dt,
+            np.random.randint(net_size, size=15),
+            t_start=0.0,
+            t_stop=16 * dt,
+            num_channels=net_size,
+        )
+        for _ in range(3)
+    ]
+    outputs = fl0.evolve_batch(ts_inputs)
+    assert fl0.t == 0
+
+    # - Compare with sequential evolution
+    for ts_input, output in zip(ts_inputs, outputs):
+        output_single = fl0.evolve(ts_input)
+        fl0.reset_all()
+        assert np.allclose(output.times, output_single.times)
+        assert (output.channels == output_single.channels).all()
+
+
+def test_RecLIFJax_checkpoint():
+    """ Test that rematerialised evolution reproduces outputs and gradients """
+    from rockpool.layers import RecLIFJax
+    from jax import grad
+    import jax.numpy as jnp
+
+    net_size = 3
+    num_timesteps = 50
+
+    np.random.seed(1)
+    fl0 = RecLIFJax(
+        w_recurrent=2 * np.random.rand(net_size, net_size) - 1,
+        bias=0.5 * np.ones(net_size),
+        tau_mem=20e-3 * np.ones(net_size),
+        tau_syn=20e-3 * np.ones(net_size),
+        dt=1e-3,
+    )
+    inp = (np.random.rand(num_timesteps, net_size) < 0.2).astype(float)
+
+    def loss(w_rec, evolve):
+        _, _, output_ts, _, _, Vmem_ts, _ = evolve(
+            fl0._state,
+            fl0._w_in,
+            w_rec,
+            fl0._w_out,
+            fl0._tau_mem,
+            fl0._tau_syn,
+            fl0._bias,
+            0.0,
+            inp,
+            inp * 0.0,
+            fl0._rng_key,
+            fl0._dt,
+        )
+        return jnp.mean(output_ts ** 2) + jnp.mean(Vmem_ts ** 2)
+
+    # - Segment length that does not divide the number of time steps
+    evolve_full = fl0._evolve_jit
+    fl0.checkpoint_segment = 7
+    evolve_ckpt = fl0._evolve_jit
+    assert evolve_ckpt is not evolve_full
+
+    w_rec = fl0.weights
+    assert np.allclose(loss(w_rec, evolve_full), loss(w_rec, evolve_ckpt))
+    assert np.allclose(
+        grad(lambda w: loss(w, evolve_full))(w_rec),
+        grad(lambda w: loss(w, evolve_ckpt))(w_rec),
+    )
+
+    # - Segment lengths must be positive
+    with pytest.raises(ValueError):
+        fl0.checkpoint_segment = 0
+
+
 def test_RecLIFCurrentInJax():
     """ Test RecLIFCurrentInJax """
     from rockpool import TSContinuous
@@ -456,3 +548,43 @@ def test_training_FFwd():
 
         l_fcn()
         g_fcn()
+
+
+def test_training_batch():
+    from rockpool import TSEvent, TSContinuous
+    from rockpool.layers import FFLIFJax_IO
+    from rockpool.layers.training import add_shim_lif_jax_sgd
+
+    N = 10
+    Nin = 5
+    Nout = 1
+    dt = 1e-3
+    T = 50
+    num_trials = 3
+
+    lyrIO = FFLIFJax_IO(
+        w_in=(np.random.rand(Nin, N) - 0.5) / Nin,
+        w_out=2 * np.random.rand(N, Nout) - 1,
+        tau_mem=50e-3,
+        tau_syn=100e-3,
+        bias=np.zeros(N),
+        dt=dt,
+    )
+    lyrIO = add_shim_lif_jax_sgd(lyrIO)
+    w_out_before = np.array(lyrIO.w_out)
+
+    # - Batch of input rasters and targets
+    inputs = (np.random.rand(num_trials, T, Nin) < 0.1).astype(float)
+    targets = np.random.rand(num_trials, T, Nout)
+
+    loss_first = lyrIO.train_output_target_batch(
+        inputs, targets, num_steps=10, is_first=True
+    )
+    loss_last = lyrIO.train_output_target_batch(
+        inputs, targets, num_steps=10, is_last=True
+    )
+
+    # - Parameters are written back to the layer; time is not modified
+    assert not np.allclose(w_out_before, lyrIO.w_out)
+    assert np.isfinite(loss_first) and np.isfinite(loss_last)
+    assert lyrIO.t == 0
@@ -0,0 +1,118 @@
+"""
+Test evolution methods of the `Network` class
+"""
+
+import numpy as np
+
+
+def test_evolve_chunked():
+    """
+    Test that evolving a network in chunks matches a single evolution
+    """
+    from rockpool import Network, TSContinuous
+    from rockpool.layers import FFRateEuler
+
+    np.random.seed(1)
+    weights_0 = np.random.rand(2, 3)
+    weights_1 = np.random.rand(3, 2)
+    ts_input = TSContinuous(
+        np.arange(100) * 0.01, np.random.rand(100, 2), name="input"
+    )
+
+    net = Network(FFRateEuler(weights_0, dt=0.01), FFRateEuler(weights_1, dt=0.01))
+    output_full = net.evolve(ts_input, verbose=False)
+    net.reset_all()
+
+    chunks = list(net.evolve_chunked(ts_input, chunk_duration=0.3))
+    assert len(chunks) == 4
+    assert np.isclose(net.t, output_full[net.evol_order[-1].name].t_stop)
+
+    for chunk in chunks:
+        for lyr in net.evol_order:
+            ts_chunk = chunk[lyr.name]
+            assert np.allclose(
+                ts_chunk.samples, output_full[lyr.name](ts_chunk.times)
+            )
+
+
+def test_stream():
+    """
+    Test that streaming through a network matches evolution for constant input
+    """
+    from rockpool import Network, TSContinuous
+    from rockpool.layers import FFRateEuler
+
+    np.random.seed(1)
+    weights_0 = np.random.rand(2, 3)
+    weights_1 = np.random.rand(3, 2)
+    ts_input = TSContinuous([0, 1], [[0.5, 1], [0.5, 1]], periodic=True)
+
+    net = Network(FFRateEuler(weights_0, dt=0.01), FFRateEuler(weights_1, dt=0.01))
+    output_evolve = net.evolve(ts_input, duration=0.5, verbose=False)
+    net.reset_all()
+
+    output_stream = net.stream(ts_input, duration=0.5)
+    assert np.isclose(net.t, 0.5)
+
+    for lyr in net.evol_order:
+        ts_stream = output_stream[lyr.name]
+        assert ts_stream.samples.shape == (51, lyr.size)
+        assert np.allclose(ts_stream.samples, output_evolve[lyr.name].samples)
+
+
+def test_evolve_many():
+    """
+    Test that evolving many trials in parallel matches sequential evolution
+    """
+    from rockpool import Network, TSContinuous
+    from rockpool.layers import FFRateEuler
+
+    np.random.seed(1)
+    net = Network(
+        FFRateEuler(np.random.rand(2, 3), dt=0.01),
+        FFRateEuler(np.random.rand(3, 2), dt=0.01),
+    )
+    inputs = [
+        TSContinuous(np.arange(20) * 0.01, np.random.rand(20, 2)) for _ in range(5)
+    ]
+
+    for n_workers in (1, 2):
+        outputs = list(net.evolve_many(inputs, n_workers=n_workers))
+        assert len(outputs) == len(inputs)
+        assert net.t == 0
+
+        for ts_input, output in zip(inputs, outputs):
+            output_single = net.evolve(ts_input, verbose=False)
+            net.reset_all()
+            for lyr in net.evol_order:
+                assert np.allclose(
+                    output[lyr.name].samples, output_single[lyr.name].samples
+                )
+
+
+def test_warmup():
+    """
+    Test that warming up a network shares compiled kernels and leaves it unchanged
+    """
+    from rockpool import Network
+    from rockpool.layers import FFRateEuler
+
+    np.random.seed(1)
+    net = Network(
+        FFRateEuler(np.random.rand(2, 3), dt=0.01),
+        FFRateEuler(np.random.rand(3, 2), dt=0.01),
+    )
+
+    # - Layers with the same activation function share one solver
+    assert net.evol_order[0]._evolveEuler is net.evol_order[1]._evolveEuler
+
+    for lyr in net.evol_order:
+        lyr.state = np.random.rand(lyr.size)
+    states_before = [np.copy(lyr.state) for lyr in net.evol_order]
+
+    net.warmup(num_timesteps=10)
+
+    assert net.t == 0
+    for lyr, state in zip(net.evol_order, states_before):
+        assert lyr.t == 0
+        assert (lyr.state == state).all()
@@ -138,3 +138,148 @@ def test_RecRateEuler():
 
     with pytest.raises(TypeError):
         RecRateEuler(weights=np.zeros((2, 2)), noise_std=None)
+
+
+def test_rate_evolve_batch():
+    """ Test batched evolution of FFRateEuler and RecRateEuler """
+    from rockpool import TSContinuous
+    from rockpool.layers import FFRateEuler, RecRateEuler
+
+    # - Layers
+    ff_lyr = FFRateEuler(weights=2 * np.random.rand(3, 2) - 1, bias=0.1, dt=0.01)
+    rec_lyr = RecRateEuler(weights=0.2 * np.random.rand(3, 3), tau=0.1, dt=0.01)
+
+    # - Input for a batch of trials
+    inputs = np.random.rand(4, 21, 3)
+    ts_inputs = [TSContinuous(np.arange(21) * 0.01, inp) for inp in inputs]
+
+    for lyr in (ff_lyr, rec_lyr):
+        lyr.state = np.random.rand(lyr.size)
+        state_before = np.copy(lyr.state)
+
+        outputs = lyr.evolve_batch(inputs)
+        outputs_ts = lyr.evolve_batch(ts_inputs)
+
+        # - Layer state and time are not modified
+        assert lyr.t == 0
+        assert (lyr.state == state_before).all()
+
+        # - Compare with sequential evolution
+        assert len(outputs) == len(inputs)
+        for ts_input, output, output_ts in zip(ts_inputs, outputs, outputs_ts):
+            lyr.state = np.copy(state_before)
+            lyr.reset_time()
+            output_single = lyr.evolve(ts_input)
+            assert np.allclose(output.times, output_single.times)
+            assert np.allclose(output.samples, output_single.samples)
+            assert np.allclose(output_ts.samples, output_single.samples)
+
+    # - Batched input must be three-dimensional
+    with pytest.raises(ValueError):
+        ff_lyr.evolve_batch(inputs[0])
+
+
+def test_ridge_regression_regularizations():
+    """ Test solving ridge regression for several regularization parameters at once """
+    from rockpool.layers.training.gpl.train_rr import RidgeRegrTrainer, gram_matrix
+
+    np.random.seed(1)
+    inp = np.random.rand(200, 5)
+    target = inp @ np.random.rand(5, 2) + 0.1 * np.random.randn(200, 2)
+    regularizations = [0.01, 0.1, 1.0, 10.0]
+
+    # - Gram matrix from symmetric rank-k update
+    assert np.allclose(gram_matrix(inp), inp.T @ inp)
+
+    # - Accumulate statistics over two batches
+    trainer = RidgeRegrTrainer(
+        num_features=5,
+        num_outputs=2,
+        regularize=regularizations,
+        fisher_relabelling=False,
+        standardize=False,
+        train_biases=True,
+    )
+    trainer.train_batch(inp[:120], target[:120])
+    trainer.train_batch(inp[120:], target[120:])
+    weights, biases, scores = trainer.solve_regularizations(regularizations, gcv=True)
+    assert weights.shape == (4, 5, 2)
+    assert biases.shape == (4, 2)
+    assert scores.shape == (4, 2)
+
+    # - Compare with single solves and explicit GCV
+    inp_bias = np.hstack((inp, np.ones((200, 1))))
+    for reg, w, b, score in zip(regularizations, weights, biases, scores):
+        hat = inp_bias @ np.linalg.solve(
+            inp_bias.T @ inp_bias + reg * np.eye(6), inp_bias.T
+        )
+        solution = hat @ target
+        assert np.allclose(inp @ w + b, solution)
+        gcv = np.mean((target - solution) ** 2, axis=0) / (
+            1 - np.trace(hat) / 200
+        ) ** 2
+        assert np.allclose(score, gcv)
+
+    # - Model uses parameter with lowest score
+    trainer.update_model()
+    idx_best = np.argmin(np.mean(scores, axis=1))
+    assert trainer.regularize_best == regularizations[idx_best]
+    assert np.allclose(trainer.weights, weights[idx_best])
+
+
+def test_ridge_regression_merge_parallel():
+    """ Test merging training statistics and parallel training over data shards """
+    from rockpool import TSContinuous
+    from rockpool.layers import FFRateEuler
+    from rockpool.layers.training.gpl.train_rr import RidgeRegrTrainer
+
+    np.random.seed(1)
+    inp = np.random.rand(200, 5)
+    target = inp @ np.random.rand(5, 2) + 0.1 * np.random.randn(200, 2)
+    trainer_args = dict(
+        num_features=5,
+        num_outputs=2,
+        regularize=0.1,
+        fisher_relabelling=False,
+        standardize=False,
+        train_biases=True,
+    )
+
+    # - Statistics of disjoint data, merged into one trainer
+    trainer = RidgeRegrTrainer(**trainer_args)
+    trainer.train_batch(inp[:120], target[:120])
+    trainer_part = RidgeRegrTrainer(**trainer_args)
+    trainer_part.train_batch(inp[120:], target[120:])
+    trainer.merge_statistics(trainer_part.get_statistics())
+    assert trainer.num_samples == 200
+
+    trainer_full = RidgeRegrTrainer(**trainer_args)
+    trainer_full.train_batch(inp, target)
+    trainer.update_model()
+    trainer_full.update_model()
+    assert np.allclose(trainer.weights, trainer_full.weights)
+    assert np.allclose(trainer.bias, trainer_full.bias)
+
+    # - Statistics with different settings cannot be merged
+    trainer_bias = RidgeRegrTrainer(**dict(trainer_args, train_biases=False))
+    with pytest.raises(ValueError):
+        trainer.merge_statistics(trainer_bias.get_statistics())
+
+    # - Parallel training over complete shards uses all samples of each shard
+    shards = [
+        (
+            TSContinuous(np.arange(50) * 0.01, target[i : i + 50]),
+            TSContinuous(np.arange(50) * 0.01, inp[i : i + 50]),
+        )
+        for i in range(0, 200, 50)
+    ]
+    fl_seq = FFRateEuler(weights=np.zeros((5, 2)), dt=0.01)
+    tr_data = fl_seq.train_rr_parallel(shards, regularize=0.1, n_workers=1)
+    assert tr_data["training_progress"]["num_samples"] == 200
+    assert np.allclose(fl_seq.weights, trainer_full.weights)
+    assert np.allclose(fl_seq.bias, trainer_full.bias)
+
+    fl_par = FFRateEuler(weights=np.zeros((5, 2)), dt=0.01)
+    fl_par.train_rr_parallel(shards, regularize=0.1, n_workers=2)
+    assert np.allclose(fl_par.weights, trainer_full.weights)
+    assert np.allclose(fl_par.bias, trainer_full.bias)
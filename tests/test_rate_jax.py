@@ -84,6 +84,73 @@ def test_RecRateEulerJax():
         )
 
 
+def test_RecRateEulerJax_evolve_batch():
+    """ Test batched evolution of RecRateEulerJax """
+    from rockpool import TSContinuous
+    from rockpool.layers import RecRateEulerJax
+
+    # - Layer generation
+    fl0 = RecRateEulerJax(
+        w_in=2 * np.random.rand(1, 2) - 1,
+        w_recurrent=2 * np.random.rand(2, 2) - 1,
+        w_out=2 * np.random.rand(2, 1) - 1,
+        bias=2 * np.random.rand(2) - 1,
+        tau=20e-3 * np.ones(2),
+        dt=0.01,
+    )
+
+    # - Input for a batch of trials
+    inputs = np.random.rand(3, 11, 1)
+    ts_inputs = [TSContinuous(np.arange(11) * 0.01, inp) for inp in inputs]
+
+    outputs = fl0.evolve_batch(ts_inputs)
+    assert fl0.t == 0
+
+    # - Compare with sequential evolution
+    for ts_input, output in zip(ts_inputs, outputs):
+        output_single = fl0.evolve(ts_input)
+        fl0.reset_all()
+        assert np.allclose(output.samples, output_single.samples, atol=1e-6)
+
+    assert len(fl0.evolve_batch(inputs)) == 3
+
+
+def test_RecRateEulerJax_time_buckets():
+    """ Test evolution of RecRateEulerJax with inputs padded to bucket lengths """
+    from rockpool import TSContinuous
+    from rockpool.layers import RecRateEulerJax
+    from rockpool.utilities import bucket_length
+
+    assert bucket_length(11, "pow2") == 16
+    assert bucket_length(16, "pow2") == 16
+    assert bucket_length(11, [5, 20]) == 20
+    assert bucket_length(45, [5, 20]) == 60
+    assert bucket_length(11, None) == 11
+
+    params = dict(
+        w_in=2 * np.random.rand(1, 2) - 1,
+        w_recurrent=2 * np.random.rand(2, 2) - 1,
+        w_out=2 * np.random.rand(2, 1) - 1,
+        bias=2 * np.random.rand(2) - 1,
+        tau=20e-3 * np.ones(2),
+        dt=0.01,
+    )
+    fl0 = RecRateEulerJax(**params)
+    fl_bucket = RecRateEulerJax(time_buckets="pow2", **params)
+
+    # - Inputs of different lengths share a bucket
+    for num_samples in (9, 11):
+        ts_input = TSContinuous(
+            np.arange(num_samples) * 0.01, np.random.rand(num_samples, 1)
+        )
+        output = fl0.evolve(ts_input)
+        output_bucket = fl_bucket.evolve(ts_input)
+        assert fl_bucket.bucket_last_evolution == 16
+        assert np.isclose(fl_bucket.t, fl0.t)
+        assert np.allclose(output.samples, output_bucket.samples, atol=1e-6)
+        assert np.allclose(fl0.state, fl_bucket.state, atol=1e-6)
+
+
 def test_ForceRateEulerJax():
     """ Test ForceRateEulerJax """
     from rockpool import TSContinuous
@@ -139,3 +206,36 @@ def test_ForceRateEulerJax():
             tau=np.zeros(2),
             bias=np.zeros(3),
         )
+
+
+def test_ForceRateEulerJax_evolve_batch():
+    """ Test batched evolution of ForceRateEulerJax """
+    from rockpool import TSContinuous
+    from rockpool.layers import ForceRateEulerJax
+
+    # - Layer generation
+    fl0 = ForceRateEulerJax(
+        w_in=2 * np.random.rand(1, 2) - 1,
+        w_out=2 * np.random.rand(2, 1) - 1,
+        bias=2 * np.random.rand(2) - 1,
+        tau=20e-3 * np.ones(2),
+        dt=0.01,
+    )
+
+    # - Inputs and forces for a batch of trials
+    times = np.arange(11) * 0.01
+    ts_inputs = [TSContinuous(times, inp) for inp in np.random.rand(3, 11, 1)]
+    ts_forces = [TSContinuous(times, force) for force in np.random.rand(3, 11, 2)]
+
+    outputs = fl0.evolve_batch(ts_inputs, ts_forces)
+    assert fl0.t == 0
+
+    # - Compare with sequential evolution
+    for ts_input, ts_force, output in zip(ts_inputs, ts_forces, outputs):
+        output_single = fl0.evolve(ts_input, ts_force)
+        fl0.reset_all()
+        assert np.allclose(output.samples, output_single.samples, atol=1e-6)
+
+    # - Forces are not ignored
+    outputs_unforced = fl0.evolve_batch(ts_inputs)
+    assert not np.allclose(outputs_unforced[0].samples, outputs[0].samples)
@@ -0,0 +1,188 @@
+"""
+Test shared memory transport between layers and their worker processes
+"""
+
+import importlib.machinery
+import importlib.util
+import multiprocessing
+import os
+import subprocess
+import sys
+import types
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def iaf_nest(monkeypatch):
+    """ `iaf_nest` module, with an empty stand-in for the `nest` package if it is not installed """
+    module_name = "rockpool.layers.gpl.iaf_nest"
+    if importlib.util.find_spec("nest") is not None:
+        yield importlib.import_module(module_name)
+        return
+
+    nest = types.ModuleType("nest")
+    nest.__spec__ = importlib.machinery.ModuleSpec("nest", None)
+    monkeypatch.setitem(sys.modules, "nest", nest)
+    try:
+        yield importlib.import_module(module_name)
+    finally:
+        sys.modules.pop(module_name, None)
+
+
+def _stand_in_layer(iaf_nest):
+    """
+    `FFIAFNest` subclass, whose NEST process only replaces NEST: It emits an event whenever an input exceeds 0.5 and records the inputs as states
+    """
+
+    class StandInProcess(iaf_nest.FFIAFNest.NestProcess):
+        def init_nest(self):
+            pass
+
+        def setup_nest_network(self):
+            pass
+
+        def evolve(self, time_base, input_steps, num_timesteps):
+            idcs_time, event_channels = np.nonzero(input_steps[:num_timesteps] > 0.5)
+            states = input_steps.T if self.record else None
+            return time_base[idcs_time], event_channels, states
+
+    class StandInLayer(iaf_nest.FFIAFNest):
+        def _setup_nest(self):
+            nest_process = StandInProcess(
+                self.request_q,
+                self.result_q,
+                self._weights,
+                self._bias,
+                self._dt,
+                self._tau_mem,
+                self._capacity,
+                self._v_thresh,
+                self._v_reset,
+                self._v_rest,
+                self._refractory,
+                self._record,
+                self._num_cores,
+            )
+            # - Fork, so that the stand-in classes need not be imported by the process
+            self._nest_process = multiprocessing.get_context("fork").Process(
+                target=nest_process.run, daemon=True
+            )
+            self._nest_process.start()
+
+    return StandInLayer
+
+
+def test_shared_buffer_process(iaf_nest, monkeypatch):
+    pytest.importorskip("multiprocessing.shared_memory")
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("Stand-in NEST process requires the 'fork' start method")
+    from rockpool import TSContinuous
+
+    # - Start with small buffers, so that longer evolutions require them to grow
+    capacity = 2 ** 12
+    monkeypatch.setattr(iaf_nest, "SHARED_BUFFER_CAPACITY", capacity)
+    dt = 1e-3
+    lyr = _stand_in_layer(iaf_nest)(weights=np.eye(3), dt=dt, record=True)
+
+    try:
+        for num_timesteps in (10, 100, 2000, 20):
+            t_start = lyr.t
+            times = t_start + np.arange(num_timesteps + 1) * dt
+            ts_input = TSContinuous(times, np.random.rand(num_timesteps + 1, 3))
+            ts_out = lyr.evolve(ts_input, num_timesteps=num_timesteps)
+
+            # - Inputs have been passed to the process and recorded as states
+            states = lyr.recorded_states.samples
+            assert np.allclose(states, ts_input(lyr.recorded_states.times))
+
+            # - Events have been passed back from the process
+            idcs_time, channels = np.nonzero(states[:num_timesteps] > 0.5)
+            order = np.lexsort((ts_out.channels, ts_out.times))
+            assert np.allclose(ts_out.times[order], t_start + idcs_time * dt)
+            assert np.array_equal(ts_out.channels[order], channels)
+            assert ts_out.t_start == t_start
+            assert np.isclose(lyr.t, t_start + num_timesteps * dt)
+
+        # - Buffers have grown and are still used
+        assert lyr._buffer_in.capacity > capacity
+        assert lyr._buffer_out.capacity > capacity
+
+    finally:
+        lyr.terminate()
+
+
+_TRACKER_SCRIPT = """
+import multiprocessing
+import sys
+import numpy as np
+from rockpool.utilities import SharedArrayBuffer
+
+
+def read(message, result_q):
+    buffer = SharedArrayBuffer()
+    result_q.put(buffer.get(message)[0])
+    buffer.close()
+
+
+if __name__ == "__main__":
+    context = multiprocessing.get_context(sys.argv[1])
+    buffer = SharedArrayBuffer(2 ** 10)
+    result_q = context.Queue()
+    data = np.arange(10.0)
+    process = context.Process(target=read, args=(buffer.put(data), result_q))
+    process.start()
+    assert np.array_equal(result_q.get(), data)
+    process.join()
+    buffer.close()
+"""
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_shared_buffer_resource_tracker(start_method, tmp_path):
+    pytest.importorskip("multiprocessing.shared_memory")
+    if start_method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"Start method '{start_method}' is not available")
+    import rockpool
+
+    # - Run owner and reader in a fresh interpreter, to capture resource tracker output
+    script = tmp_path / "tracker_script.py"
+    script.write_text(_TRACKER_SCRIPT)
+    python_path = [os.path.dirname(os.path.dirname(rockpool.__file__))]
+    python_path += os.environ.get("PYTHONPATH", "").split(os.pathsep)
+    result = subprocess.run(
+        [sys.executable, str(script), start_method],
+        capture_output=True,
+        text=True,
+        cwd=tmp_path,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(python_path)),
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+    # - The tracker neither fails to unregister the block nor warns about leaks
+    assert "Traceback" not in result.stderr
+    assert "resource_tracker" not in result.stderr
+
+
+def test_shared_buffer_fallback():
+    from rockpool.utilities import SharedArrayBuffer
+
+    buffer = SharedArrayBuffer(2 ** 10)
+
+    # - Consecutive messages wrap around the end of the buffer
+    for _ in range(5):
+        data = np.random.rand(40)
+        name, descriptors = buffer.put(data, None)
+        data_out, none_out = buffer.get((name, descriptors))
+        assert np.array_equal(data_out, data)
+        assert none_out is None
+
+    # - Messages that do not fit contain the arrays themselves
+    data = np.random.rand(1000)
+    name, descriptors = buffer.put(data)
+    assert name is None
+    assert np.array_equal(buffer.get((name, descriptors))[0], data)
+
+    buffer.close()
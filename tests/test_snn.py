@@ -157,6 +157,51 @@ def test_cliaf_evolve_resetting():
     assert (lyrFF.state == 0).all(), "State has not been reset correctly"
 
 
+def test_spike_bt_evolve():
+    """
+    Test evolution of RecFSSpikeEulerBT, with and without learning callback
+    """
+    from rockpool.layers import RecFSSpikeEulerBT
+    from rockpool.timeseries import TSContinuous
+
+    np.random.seed(1)
+    size = 10
+    weights_fast = -np.eye(size) * 1e-3
+    weights_slow = np.random.randn(size, size) * 1e-4
+    kwargs = dict(
+        weights_fast=weights_fast,
+        weights_slow=weights_slow,
+        v_thresh=-55e-3,
+        v_reset=-65e-3,
+        v_rest=-65e-3,
+        dt=1e-4,
+    )
+
+    # - Input that drives all neurons above threshold
+    times = np.arange(0, 0.1, 1e-3)
+    ts_input = TSContinuous(times, np.ones((times.size, size)) * 15e-3)
+
+    lyr = RecFSSpikeEulerBT(**kwargs)
+    ts_out = lyr.evolve(ts_input, duration=0.05)
+    assert ts_out.times.size > 0, "No output spikes"
+    assert np.all(
+        (ts_out.channels >= 0) & (ts_out.channels < size)
+    ), "Output spike channels out of range"
+    assert np.isclose(lyr.t, 0.05), "Time has not been updated correctly"
+
+    # - Callback is called for each spike, with identical results
+    callback_spikes = []
+    lyr_cb = RecFSSpikeEulerBT(
+        spike_callback=lambda l, t, i: callback_spikes.append((t, i)), **kwargs
+    )
+    ts_out_cb = lyr_cb.evolve(ts_input, duration=0.05)
+    assert np.allclose(ts_out_cb.times, ts_out.times), "Spike times differ"
+    assert np.array_equal(ts_out_cb.channels, ts_out.channels), "Channels differ"
+    assert [i for _, i in callback_spikes] == list(
+        ts_out.channels
+    ), "Callback not called for each spike"
+
+
 # Place holder
 # def test_raise_exception_on_incorrect_shape():
 #    '''
@@ -239,6 +239,34 @@ def test_continuous_call():
     assert (samples_single[4] == np.array([3, 2])).all()
 
 
+def test_continuous_call_uniform():
+    """
+    Test sampling of series on evenly spaced time points against `interp1d`
+    """
+    from rockpool import TSContinuous
+    from scipy.interpolate import interp1d
+
+    times = np.arange(20) * 0.1 + 0.3
+    samples = np.random.randn(20, 3)
+    times_query = np.r_[
+        np.random.rand(50) * 2.2 + 0.2, times, (times[1:] + times[:-1]) / 2
+    ]
+
+    for kind in ("linear", "previous", "nearest"):
+        ts = TSContinuous(times, samples, interp_kind=kind)
+        samples_ref = interp1d(
+            times, samples, kind=kind, axis=0, bounds_error=False, assume_sorted=True
+        )(times_query)
+        assert np.allclose(ts(times_query), samples_ref, equal_nan=True)
+
+    # - Interpolator follows changes of samples and interpolation type
+    ts = TSContinuous(times, samples)
+    ts.samples = samples * 2
+    assert np.allclose(ts(times), samples * 2)
+    ts.interp_kind = "previous"
+    assert np.allclose(ts(times[:-1] + 0.05), samples[:-1] * 2)
+
+
 def test_continuous_clip():
     from rockpool import TSContinuous
 
@@ -627,6 +655,57 @@ def test_event_raster():
     assert raster.shape == (1, 1)
 
 
+def test_event_raster_add_events_out():
+    """
+    Test TSEvent raster with counted events, channel selection and an output buffer
+    """
+    from rockpool import TSEvent
+
+    ts = TSEvent([0, 0.5, 1, 1.2, 2.5, 3], [0, 0, 1, 2, 1, 0], num_channels=3)
+
+    # - Count events per time step
+    raster = ts.raster(dt=1, add_events=True)
+    assert raster.dtype == int
+    assert (raster == [[2, 0, 0], [0, 1, 1], [0, 1, 0]]).all()
+
+    # - Select and reorder channels
+    raster = ts.raster(dt=1, channels=[2, 0], add_events=True)
+    assert (raster == [[0, 2], [1, 0], [0, 0]]).all()
+
+    # - Write into a preallocated buffer, overwriting its content
+    out = np.ones((3, 3), bool)
+    raster = ts.raster(dt=1, out=out)
+    assert raster is out
+    assert (out == [[True, False, False], [False, True, True], [False, True, False]]).all()
+
+    # - Buffer of wrong shape
+    with pytest.raises(ValueError):
+        ts.raster(dt=1, out=np.zeros((2, 3), bool))
+
+
+def test_event_raster_sparse():
+    """
+    Test that TSEvent sparse raster matches the dense raster
+    """
+    from rockpool import TSEvent
+    from scipy.sparse import issparse
+
+    ts = TSEvent([0, 0.5, 1, 1.2, 2.5, 3], [0, 0, 1, 2, 1, 0], num_channels=3)
+
+    for add_events in (False, True):
+        raster_sparse = ts.raster_sparse(dt=1, add_events=add_events)
+        raster = ts.raster(dt=1, add_events=add_events)
+        assert issparse(raster_sparse)
+        assert raster_sparse.dtype == raster.dtype
+        assert (raster_sparse.toarray() == raster).all()
+
+    # - Periodic series and selected channels
+    ts.periodic = True
+    raster_sparse = ts.raster_sparse(dt=0.5, t_stop=5, channels=[1, 2])
+    raster = ts.raster(dt=0.5, t_stop=5, channels=[1, 2])
+    assert (raster_sparse.toarray() == raster).all()
+
+
 def test_event_raster_explicit_num_channels():
     """
     Test TSEvent raster method when the function is initialized with explicit number of Channels
@@ -696,6 +775,38 @@ def test_event_clip():
     assert ts_empty.clip(2, 3, channels=0).t_stop == 3
 
 
+def test_event_channel_index():
+    """
+    Test that selecting events via the per-channel index matches plain selection
+    """
+    from rockpool import TSEvent
+
+    times = [0, 0.5, 1, 1, 1.2, 2.5, 3, 3.5]
+    channels = [0, 2, 1, 2, 2, 1, 0, 2]
+    ts = TSEvent(times, channels, num_channels=4, t_stop=4)
+    ts_idx = TSEvent(times, channels, num_channels=4, t_stop=4, use_channel_index=True)
+
+    for sel_channels in ([2], [0, 2], [3], [1, 1, 0]):
+        for include_stop in (False, True):
+            t, c = ts(0.5, 3, sel_channels, include_stop)
+            t_idx, c_idx = ts_idx(0.5, 3, sel_channels, include_stop)
+            assert (t == t_idx).all() and (c == c_idx).all()
+
+            ts_clip = ts_idx.clip(1, 3.5, sel_channels, include_stop=include_stop)
+            ts_clip_ref = ts.clip(1, 3.5, sel_channels, include_stop=include_stop)
+            assert (ts_clip.times == ts_clip_ref.times).all()
+            assert (ts_clip.channels == ts_clip_ref.channels).all()
+
+    # - Index is rebuilt after channels are assigned
+    ts_idx.channels = np.array([3, 2, 1, 0, 3, 2, 1, 0])
+    t_idx, c_idx = ts_idx(0, 4, [3])
+    assert (t_idx == [0, 1.2]).all() and (c_idx == 3).all()
+
+    # - Invalid channels
+    with pytest.raises(IndexError):
+        ts_idx(0, 1, [4])
+
+
 def test_event_append_c():
     """
     Test append_c method of TSEvent
@@ -987,6 +1098,52 @@ def test_save_load():
     remove("test_tse.npz")
 
 
+def test_save_load_chunked(tmp_path):
+    """
+    Test chunked, memory-mapped storage of timeseries
+    """
+    from rockpool import TSEvent, TSContinuous, load_ts_from_file
+
+    # - Generate time series objects
+    times = np.arange(100) * 0.1
+    samples = np.random.randn(100, 2)
+    channels = np.random.randint(3, size=100)
+    tsc = TSContinuous(times, samples, t_stop=10, name="continuous")
+    tse = TSEvent(times, channels, num_channels=4, t_stop=10, name="events")
+
+    # - Store objects, the continuous one in two parts
+    tsc.clip(0, 5, include_stop=False, sample_limits=False).save_chunked(
+        tmp_path / "tsc", 1
+    )
+    tsc.clip(5, 10, sample_limits=False).save_chunked(tmp_path / "tsc", append=True)
+    tse.save_chunked(tmp_path / "tse", chunk_duration=1)
+
+    # - Load objects
+    tscl = load_ts_from_file(tmp_path / "tsc")
+    tsel = load_ts_from_file(tmp_path / "tse", expected_type="TSEvent")
+    assert isinstance(tscl.samples, np.memmap)
+    assert isinstance(tsel.times, np.memmap)
+
+    # - Verify that data and attributes are still correct
+    assert np.allclose(tscl.times, times) and tscl.t_stop == 10
+    assert np.allclose(tscl.samples, samples)
+    assert (tsel.times == times).all() and (tsel.channels == channels).all()
+    assert tsel.name == "events" and tsel.num_channels == 4
+
+    # - Access parts of the data
+    assert np.allclose(tscl([1.05, 7.33]), tsc([1.05, 7.33]))
+    assert np.allclose(tscl.clip(2, 3).samples, tsc.clip(2, 3).samples)
+    tsel_clipped = tsel.clip(2.5, 6.5, channels=[0, 2])
+    tse_clipped = tse.clip(2.5, 6.5, channels=[0, 2])
+    assert (tsel_clipped.times == tse_clipped.times).all()
+    assert (tsel_clipped.channels == tse_clipped.channels).all()
+    assert (tsel.raster(0.5, t_start=3) == tse.raster(0.5, t_start=3)).all()
+
+    # - Cannot append a series that starts earlier
+    with pytest.raises(ValueError):
+        tse.save_chunked(tmp_path / "tse", append=True)
+
+
 def test_event_raster_periodic_iss5():
     from rockpool import TSEvent
 
@@ -50,3 +50,37 @@ def test_adam():
 
     # - Perform final training step
     fl0.train_adam(ts_input, ts_target, is_last=True)
+
+
+def test_adam_batch():
+    from rockpool.layers import RecRateEulerJax
+    from rockpool.layers.training import add_train_output
+    from rockpool import TSContinuous
+
+    # - Layer generation
+    fl0 = RecRateEulerJax(
+        w_in=2 * np.random.rand(1, 2) - 1,
+        w_recurrent=2 * np.random.rand(2, 2) - 1,
+        w_out=2 * np.random.rand(2, 1) - 1,
+        bias=0,
+        noise_std=0.1,
+        tau=20,
+        dt=1,
+    )
+    fl0 = add_train_output(fl0)
+    w_out_before = np.array(fl0.w_out)
+
+    # - Batch of inputs and targets, as arrays and as time series
+    inputs = np.random.rand(4, 10, 1)
+    targets = np.random.rand(4, 10, 1)
+    ts_inputs = [TSContinuous(np.arange(10), inp) for inp in inputs]
+    ts_targets = [TSContinuous(np.arange(10), tgt) for tgt in targets]
+
+    # - Several optimiser steps per call
+    loss_first = fl0.train_adam_batch(inputs, targets, num_steps=20, is_first=True)
+    loss_last = fl0.train_adam_batch(ts_inputs, ts_targets, num_steps=20, is_last=True)
+
+    # - Parameters are written back to the layer; state and time are not modified
+    assert not np.allclose(w_out_before, fl0.w_out)
+    assert np.isfinite(loss_first) and np.isfinite(loss_last)
+    assert fl0.t == 0
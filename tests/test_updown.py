@@ -74,3 +74,26 @@ def test_updown_in_net():
     net.evolve(tsInCont, duration=0.1)
     assert net.t == 0.1
     assert (vStateBefore != fl1.state).any()
+
+
+def test_updown_multiplex_repeat():
+    """ Test multiplexed, repeated and distributed output events of FFUpDown """
+    from rockpool import TSContinuous
+    from rockpool.layers import FFUpDown
+
+    # - One input channel, events distributed over two output channels each
+    fl0 = FFUpDown(weights=(1, 2), repeat_output=2, dt=0.1, thr_up=0.1, thr_down=0.1)
+
+    # - Two up-events at second time step, one down-event at fourth time step
+    tsInCont = TSContinuous(
+        times=np.arange(5) * 0.1, samples=np.array([0, 0.25, 0.25, 0.05, 0.05])
+    )
+    tsOut = fl0.evolve(tsInCont, num_timesteps=4)
+
+    assert np.allclose(
+        tsOut.times, [0.2, 0.2, 0.2, 0.2, 0.4, 0.4]
+    ), "Output spike times not as expected"
+    assert (
+        tsOut.channels == np.array([0, 1, 0, 1, 2, 3])
+    ).all(), "Output spike channels not as expected"
+    assert np.allclose(fl0.state, 0.1), "State not as expected"